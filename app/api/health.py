@@ -0,0 +1,70 @@
+import time
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.crud.user import telegram_id_lookups, user_index
+from app.db.session import database
+from app.depends.rate_limit_dep import ip_limiter, telegram_id_limiter
+from app.services.auth import token_cache
+from app.services.session_janitor import session_janitor
+from app.services.warmup import startup_report
+
+router = APIRouter(prefix="/health", tags=["Health"])
+
+
+@router.get("/ready")
+async def readiness_listener() -> JSONResponse:
+    # Трафик можно пускать после прогрева пула, выражений и кэшей
+    return JSONResponse(status_code=200 if startup_report.is_ready else 503, content=startup_report.snapshot())
+
+
+@router.get("/db")
+async def db_health_listener() -> JSONResponse:
+    engine = database.connect().engine
+    start = time.perf_counter()
+    try:
+        async with engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+        is_available = True
+    except SQLAlchemyError:
+        is_available = False
+    ping_seconds = time.perf_counter() - start
+
+    return JSONResponse(
+        status_code=200 if is_available else 503,
+        content={
+            "database": "ok" if is_available else "unavailable",
+            "ping_seconds": round(ping_seconds, 6),
+            "pool": engine.pool.snapshot(),
+            "replica": database.replica.snapshot() if database.replica else None,
+        },
+    )
+
+
+@router.get("/janitor")
+async def janitor_health_listener() -> dict:
+    return session_janitor.snapshot()
+
+
+@router.get("/token-cache")
+async def token_cache_health_listener() -> dict:
+    # Попадания — проверки подписи JWT, которых удалось избежать
+    return {"token_cache": token_cache.stats()}
+
+
+@router.get("/rate-limit")
+async def rate_limit_health_listener() -> dict:
+    return {"telegram_id": telegram_id_limiter.stats(), "ip": ip_limiter.stats()}
+
+
+@router.get("/single-flight")
+async def single_flight_health_listener() -> dict:
+    return {"telegram_id": telegram_id_lookups.stats() if telegram_id_lookups else None}
+
+
+@router.get("/user-index")
+async def user_index_health_listener() -> dict:
+    return {"user_index": user_index.stats() if user_index else None}
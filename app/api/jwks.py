@@ -0,0 +1,12 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from app.utils.jwt_codec import get_jwt_codec
+
+router = APIRouter(tags=["Authentication"])
+
+
+@router.get("/.well-known/jwks.json")
+async def jwks_listener() -> JSONResponse:
+    # Другие сервисы проверяют токены сами по этим ключам, не обращаясь к /v1/auth/me
+    return JSONResponse(get_jwt_codec().jwks(), headers={"Cache-Control": "public, max-age=300"})
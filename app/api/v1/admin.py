@@ -0,0 +1,73 @@
+from typing import AsyncIterator, Type
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import settings
+from app.crud.base import BaseDAO
+from app.crud.user import UserDAO, UserSessionDAO
+from app.db.session import read_session_maker
+from app.depends.admin_dep import check_admin_privileges
+from app.depends.dao_dep import get_session_without_commit
+from app.schemas.user import UserModel, UserSessionModel
+from app.utils.query_accounting import query_budget
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+router = APIRouter(prefix="/v1/admin", tags=["Admin"], dependencies=[Depends(check_admin_privileges)])
+
+
+@router.get("/users")
+@query_budget(2)
+async def list_users_listener(
+        after_id: int | None = None,
+        limit: int = Query(default=1000, ge=1, le=10000),
+        session: AsyncSession = Depends(get_session_without_commit),
+) -> Response:
+    records = await UserDAO(session).find_page(after_id=after_id, limit=limit)
+    return _ndjson_page(records, UserModel, limit)
+
+
+@router.get("/users/export")
+async def export_users_listener() -> StreamingResponse:
+    return StreamingResponse(_stream_ndjson(UserDAO, UserModel), media_type=NDJSON_MEDIA_TYPE)
+
+
+@router.get("/sessions")
+@query_budget(2)
+async def list_sessions_listener(
+        after_id: str | None = None,
+        limit: int = Query(default=1000, ge=1, le=10000),
+        session: AsyncSession = Depends(get_session_without_commit),
+) -> Response:
+    records = await UserSessionDAO(session).find_page(after_id=after_id, limit=limit)
+    return _ndjson_page(records, UserSessionModel, limit)
+
+
+@router.get("/sessions/export")
+async def export_sessions_listener() -> StreamingResponse:
+    return StreamingResponse(_stream_ndjson(UserSessionDAO, UserSessionModel), media_type=NDJSON_MEDIA_TYPE)
+
+
+def _ndjson_page(records: list, schema: Type[BaseModel], limit: int) -> Response:
+    body = "".join(schema.model_validate(record).model_dump_json() + "\n" for record in records)
+    headers = {}
+    # Полная страница — значит, могут быть еще записи; клиент продолжает с X-Next-After-Id
+    if len(records) == limit:
+        headers["X-Next-After-Id"] = str(records[-1].id)
+    return Response(content=body, media_type=NDJSON_MEDIA_TYPE, headers=headers)
+
+
+async def _stream_ndjson(dao_class: Type[BaseDAO], schema: Type[BaseModel]) -> AsyncIterator[str]:
+    # Сессия открывается внутри генератора: ответ отдается уже после выхода из зависимостей роута
+    async with read_session_maker() as session:
+        batch = []
+        async for record in dao_class(session).stream_all(batch_size=settings.ADMIN_EXPORT_BATCH_SIZE):
+            batch.append(schema.model_validate(record).model_dump_json())
+            if len(batch) >= settings.ADMIN_EXPORT_BATCH_SIZE:
+                yield "\n".join(batch) + "\n"
+                batch = []
+        if batch:
+            yield "\n".join(batch) + "\n"
@@ -7,30 +7,35 @@ from fastapi.requests import Request
 from app.crud.user import UserDAO
 from app.depends.auth_dep import get_current_user
 from app.depends.dao_dep import get_session_with_commit, get_session_without_commit
+from app.depends.rate_limit_dep import limit_login, limit_refresh
 from app.models.user import User
 from app.services.auth import refresh_tokens, logout, get_access_token
 
 from app.schemas.user import UserModel
 from app.utils.exceptions import UserNotFoundException, ServerErrorException
+from app.utils.query_accounting import query_budget
 from app.utils.security import issue_tokens
+from app.utils.serialization import model_response
 
 router = APIRouter(prefix="/v1/auth", tags=["Authentication"])
 
 
 @router.get("/me", response_model=UserModel)
+@query_budget(1)
 async def get_user_listener(
         user_data: User = Depends(get_current_user)
-) -> UserModel:
-    return UserModel.model_validate(user_data)
+) -> Response:
+    return model_response(UserModel, user_data)
 
 
-@router.post("/login", response_model=UserModel)
+@router.post("/login", response_model=UserModel, dependencies=[Depends(limit_login)])
+@query_budget(3)
 async def login_listener(
         telegram_id: int,
         request: Request,
         response: Response,
         session: AsyncSession = Depends(get_session_with_commit)
-) -> UserModel:
+) -> Response:
     dao = UserDAO(session)
     user = await dao.find_one_or_none_by_telegram_id(
         telegram_id=telegram_id,
@@ -44,10 +49,11 @@ async def login_listener(
     if not is_authenticated:
         raise ServerErrorException
 
-    return UserModel.model_validate(user)
+    return model_response(UserModel, user, response=response)
 
 
-@router.get("/refresh")
+@router.get("/refresh", dependencies=[Depends(limit_refresh)])
+@query_budget(2)
 async def refresh_tokens_listener(
         response: Response,
         request: Request,
@@ -57,6 +63,7 @@ async def refresh_tokens_listener(
 
 
 @router.post("/logout")
+@query_budget(2)
 async def logout_listener(
         response: Response,
         token: str = Depends(get_access_token),
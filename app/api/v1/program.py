@@ -0,0 +1,42 @@
+from fastapi import APIRouter, Header, Query
+from fastapi.responses import Response
+
+from app.constants.enums import Age
+from app.schemas.program import ProgramModel
+from app.services.program import program_catalog
+from app.utils.exceptions import IncorrectDataException, ProgramCatalogUnavailableException
+from app.utils.query_accounting import query_budget
+
+router = APIRouter(prefix="/v1/program", tags=["Program"])
+
+
+@router.get("/match", response_model=list[ProgramModel])
+@query_budget(0)
+async def match_programs_listener(
+        age: int | None = Query(default=None, ge=0, le=100, description="Точный возраст ребенка"),
+        group: Age | None = Query(default=None, description="Возрастная группа"),
+) -> list[ProgramModel]:
+    # Ответ только из индекса в памяти, без обращения к БД
+    if (age is None) == (group is None):
+        raise IncorrectDataException
+    if not program_catalog.is_loaded:
+        raise ProgramCatalogUnavailableException
+
+    index = program_catalog.index
+    if age is not None:
+        return list(index.find_by_age(age))
+    return list(index.find_by_group(group))
+
+
+@router.get("/catalog", response_model=list[ProgramModel])
+@query_budget(0)
+async def program_catalog_listener(if_none_match: str | None = Header(default=None)) -> Response:
+    # Тело сериализовано при загрузке каталога; при совпадении ETag тело не отправляется вовсе
+    if not program_catalog.is_loaded:
+        raise ProgramCatalogUnavailableException
+
+    snapshot = program_catalog.snapshot
+    headers = {"ETag": snapshot.etag, "Cache-Control": "no-cache"}
+    if snapshot.matches(if_none_match):
+        return Response(status_code=304, headers=headers)
+    return Response(content=snapshot.body, media_type="application/json", headers=headers)
@@ -1,40 +1,76 @@
-from fastapi import APIRouter, Depends
+import codecs
+from typing import AsyncIterator
+
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.crud.user import UserDAO
+from app.depends.admin_dep import check_admin_privileges
 from app.depends.auth_dep import get_current_user
 from app.depends.dao_dep import get_session_with_commit
 from app.models.user import User
-from app.schemas.user import UserModel, UserCreateModel, UserUpdateModel, UserDeleteModel, UserUpdateBodyModel
-from app.services.user import create_user, update_user, delete_user
-from app.utils.exceptions import UserAlreadyExistsException, IncorrectDataException
+from app.schemas.user import UserModel, UserCreateModel, UserUpdateModel, UserDeleteModel, UserUpdateBodyModel, \
+    UserImportReportModel
+from app.services.user import create_user, update_user, delete_user, import_users
+from app.utils.exceptions import UserAlreadyExistsException, IncorrectDataException, ForbiddenException
+from app.utils.query_accounting import query_budget
+from app.utils.serialization import model_response
 
 router = APIRouter(prefix="/v1/user", tags=["User"])
 
 @router.post("/register", response_model=UserModel)
+@query_budget(2)
 async def create_user_listener(
         user: UserCreateModel,
         session: AsyncSession = Depends(get_session_with_commit),
-) -> UserModel:
+) -> Response:
     dao = UserDAO(session)
-    is_available = dao.find_admin_or_none_by_telegram_id(user.telegram_id)
-    if is_available:
+    existing_user = await dao.find_one_or_none_by_telegram_id(user.telegram_id)
+    if existing_user:
         raise UserAlreadyExistsException
     new_user = await create_user(user=user, session=session)
 
     if not new_user:
         raise IncorrectDataException
 
-    return UserModel.model_validate(new_user)
+    return model_response(UserModel, new_user)
+
+
+@router.post("/import", response_model=UserImportReportModel, dependencies=[Depends(check_admin_privileges)])
+async def import_users_listener(
+        request: Request,
+        session: AsyncSession = Depends(get_session_with_commit),
+) -> UserImportReportModel:
+    # Тело читается потоком: JSONL по умолчанию, CSV с заголовком при Content-Type text/csv
+    is_csv = request.headers.get("Content-Type", "").startswith("text/csv")
+    return await import_users(lines=_iter_body_lines(request), is_csv=is_csv, session=session)
+
+
+async def _iter_body_lines(request: Request) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    tail = ""
+    async for chunk in request.stream():
+        lines = (tail + decoder.decode(chunk)).split("\n")
+        tail = lines.pop()
+        for line in lines:
+            yield line.rstrip("\r")
+    tail += decoder.decode(b"", final=True)
+    if tail:
+        yield tail.rstrip("\r")
 
 
 @router.patch("/update", response_model=UserUpdateModel)
+@query_budget(2)
 async def update_user_listener(
         body: UserUpdateBodyModel,
         user_data: User = Depends(get_current_user),
         session: AsyncSession = Depends(get_session_with_commit),
 
-) -> UserUpdateModel:
+) -> Response:
+    # Назначать администраторов может только администратор, иначе любой выдал бы права себе сам
+    if body.is_admin and not user_data.is_admin:
+        raise ForbiddenException
 
     updated_user = await update_user(
         telegram_id=user_data.telegram_id,
@@ -42,10 +78,11 @@ async def update_user_listener(
         session=session
     )
 
-    return updated_user
+    return model_response(UserUpdateModel, updated_user)
 
 
 @router.delete("/delete")
+@query_budget(3)
 async def delete_user_listener(
         user_data: User = Depends(get_current_user),
         session: AsyncSession = Depends(get_session_with_commit),
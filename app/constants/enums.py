@@ -9,3 +9,10 @@ class Age(Enum):
 class TokenType(Enum):
     ACCESS_TOKEN = "access-token"
     REFRESH_TOKEN = "refresh-token"
+
+
+class ImportStatus(Enum):
+    CREATED = "created"
+    EXISTS = "exists"
+    DUPLICATE = "duplicate"
+    INVALID = "invalid"
@@ -16,16 +16,80 @@ class Settings(BaseSettings):
     JWT_ISSUER: str = None
     JWT_AUDIENCE: str = None
     JWT_CLOCK_SKEW_SECONDS: int = None
+    JWT_KEYS_DIR: str = "keys"
+    JWT_ACTIVE_KID: str | None = None
+    TOKEN_CACHE_MAX_SIZE: int = 10000
+    SESSION_TABLE_ENABLED: bool = True
+    SESSION_TABLE_NAME: str = "cube_bot_sessions"
+    SESSION_TABLE_SLOTS: int = 65536
+    USER_IMPORT_CHUNK_SIZE: int = 1000
+    ADMIN_EXPORT_BATCH_SIZE: int = 1000
     MODE: str = None
+    DATABASE_URL: str | None = None
+    REPLICA_DATABASE_URL: str | None = None
+    REPLICA_RETRY_SECONDS: float = 30
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    DB_WARMUP_ENABLED: bool = True
+    DB_WARMUP_CONNECTIONS: int = 5
+    SESSION_JANITOR_ENABLED: bool = True
+    SESSION_JANITOR_BATCH_SIZE: int = 500
+    SESSION_JANITOR_PAUSE_SECONDS: float = 0.5
+    SESSION_JANITOR_INTERVAL_SECONDS: float = 300
+    SESSION_JANITOR_MAX_RUN_SECONDS: float = 30
+    LOG_LEVEL: str = "INFO"
+    LOG_ENQUEUE: bool = True
+    LOG_QUEUE_SIZE: int = 10000
+    LOG_SAMPLE_RATE: int = 1
+    METRICS_ENABLED: bool = True
+    METRICS_DIR: str = ""
+    METRICS_MAX_ROUTES: int = 128
+    QUERY_ACCOUNTING_ENABLED: bool = True
+    QUERY_REPEAT_THRESHOLD: int = 2
+    QUERY_BUDGET_STRICT: bool = False
+    PROGRAM_CATALOG_REFRESH_SECONDS: float = 300
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_TELEGRAM_ID_PER_MINUTE: float = 10
+    RATE_LIMIT_TELEGRAM_ID_BURST: int = 5
+    RATE_LIMIT_IP_PER_MINUTE: float = 300
+    RATE_LIMIT_IP_BURST: int = 100
+    RATE_LIMIT_MAX_KEYS: int = 100000
+    RATE_LIMIT_SHARDS: int = 16
+    SINGLE_FLIGHT_ENABLED: bool = True
+    USER_INDEX_ENABLED: bool = False
+    USER_INDEX_REFRESH_SECONDS: float = 300
+    USER_INDEX_MAX_AGE_SECONDS: float = 600
+    USER_INDEX_BATCH_SIZE: int = 10000
 
     model_config = SettingsConfigDict(
         env_file=os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../", ".env")
     )
 
     def get_database_url(self):
+        if self.DATABASE_URL:
+            return self.DATABASE_URL
         if self.MODE == "development":
             return f"sqlite+aiosqlite:///app/db/db.sqlite3"
         return f"postgresql+asyncpg://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
 
+    def get_engine_options(self, url: str | None = None) -> dict:
+        options = {
+            "echo": self.DB_ECHO,
+            "pool_size": self.DB_POOL_SIZE,
+            "max_overflow": self.DB_MAX_OVERFLOW,
+            "pool_timeout": self.DB_POOL_TIMEOUT,
+            "pool_recycle": self.DB_POOL_RECYCLE,
+            "pool_pre_ping": self.DB_POOL_PRE_PING,
+        }
+        if (url or self.get_database_url()).startswith("postgresql+asyncpg"):
+            # Кэш подготовленных выражений asyncpg на каждом соединении
+            options["connect_args"] = {"statement_cache_size": self.DB_STATEMENT_CACHE_SIZE}
+        return options
+
 
 settings = Settings()
@@ -0,0 +1,90 @@
+import queue
+import sys
+import threading
+from typing import TextIO
+
+from loguru import logger
+
+from app.core.config import settings
+
+# Минимальный включенный уровень; до настройки логирования пропускаем все
+_min_level_no = 0
+
+_DEBUG_NO = 10
+_INFO_NO = 20
+
+
+class BackgroundSink:
+    """Sink loguru: сообщение кладется в очередь, а в поток вывода его пишет отдельный поток.
+
+    Обработчик запроса не ждет ввода-вывода; при переполнении очереди сообщения
+    отбрасываются и учитываются в dropped.
+    """
+
+    def __init__(self, stream: TextIO, max_size: int):
+        self._stream = stream
+        self._queue: queue.Queue[str | None] = queue.Queue(maxsize=max_size)
+        self.dropped = 0
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, message: str) -> None:
+        try:
+            self._queue.put_nowait(message)
+        except queue.Full:
+            self.dropped += 1
+
+    def stop(self) -> None:
+        # Вызывается loguru при logger.remove(), в том числе при выходе из процесса
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            message = self._queue.get()
+            if message is None:
+                break
+            self._stream.write(message)
+            if self._queue.empty():
+                self._stream.flush()
+        self._stream.flush()
+
+
+def setup_logging() -> None:
+    global _min_level_no
+    logger.remove()
+    sink = BackgroundSink(sys.stderr, max_size=settings.LOG_QUEUE_SIZE) if settings.LOG_ENQUEUE else sys.stderr
+    logger.add(sink, level=settings.LOG_LEVEL, colorize=False, backtrace=False, diagnose=False)
+    _min_level_no = logger.level(settings.LOG_LEVEL).no
+
+
+class SampledLogger:
+    """Логгер для частых сообщений: с каждого места вызова пропускает только каждое every-е.
+
+    Сообщения форматируются loguru в стиле "{}" только если уровень включен,
+    поэтому аргументы передаются отдельно, а не f-строкой.
+    """
+
+    def __init__(self, every: int):
+        self._every = max(every, 1)
+        self._counters: dict[tuple, int] = {}
+        self._logger = logger.opt(depth=1)
+
+    def debug(self, message: str, *args, **kwargs) -> None:
+        if self._is_enabled(_DEBUG_NO):
+            self._logger.debug(message, *args, **kwargs)
+
+    def info(self, message: str, *args, **kwargs) -> None:
+        if self._is_enabled(_INFO_NO):
+            self._logger.info(message, *args, **kwargs)
+
+    def _is_enabled(self, level_no: int) -> bool:
+        if level_no < _min_level_no:
+            return False
+        if self._every == 1:
+            return True
+        frame = sys._getframe(2)
+        key = (frame.f_code, frame.f_lineno)
+        count = self._counters.get(key, 0)
+        self._counters[key] = count + 1
+        return count % self._every == 0
@@ -1,15 +1,28 @@
-from typing import TypeVar, Type
+from typing import TypeVar, Type, AsyncIterator, Any
 
 from pydantic import BaseModel
-from sqlalchemy import select, func, update as sqlalchemy_update, delete as sqlalchemy_delete
+from sqlalchemy import inspect, select, func, case, insert as sqlalchemy_insert, update as sqlalchemy_update, \
+    delete as sqlalchemy_delete
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import lazyload, make_transient_to_detached
+from sqlalchemy.sql import Select
 
+from app.core import settings
+from app.core.logging import SampledLogger
 from app.db import Base
+from app.db.routing import WRITTEN_TABLES_KEY, get_written_tables
+from app.utils.single_flight import SingleFlight
 from loguru import logger
 
 T = TypeVar("T", bound=Base)
 
+# Сообщения, которые пишутся на каждый запрос, семплируются
+dao_logger = SampledLogger(every=settings.LOG_SAMPLE_RATE)
+
+
 class BaseDAO:
     model: Type[T] = None
 
@@ -19,107 +32,260 @@ class BaseDAO:
         if self.model is None:
             raise ValueError("Модель должна быть указана в дочернем классе")
 
+    def _mark_written(self) -> None:
+        self._session.info.setdefault(WRITTEN_TABLES_KEY, set()).add(self.model.__tablename__)
+
+    async def _find_one_coalesced(self, flight: SingleFlight | None, key: Any, query: Select) -> T | None:
+        """Чтение одной записи, склеенное с такими же одновременными чтениями из других сессий.
+
+        Ведущий вызов выполняет запрос и сразу снимает значения колонок; остальные получают
+        копию записи в своей сессии через merge(load=False), без запроса к БД. Склеиваются только
+        чтения из одной базы: сессия, переключенная на основную БД, не получит ответ реплики.
+        """
+        # Незакоммиченные изменения своей транзакции другим сессиям не отдаем и чужие не берем
+        if flight is None or self.model.__tablename__ in get_written_tables(self._session):
+            result = await self._session.execute(query)
+            return result.scalar_one_or_none()
+
+        mapper = inspect(self.model)
+        record = None
+
+        async def load() -> dict | None:
+            nonlocal record
+            result = await self._session.execute(query)
+            record = result.scalar_one_or_none()
+            if record is None:
+                return None
+            return {attribute.key: getattr(record, attribute.key) for attribute in mapper.column_attrs}
+
+        bind = self._session.get_bind(clause=query)
+        values, is_shared = await flight.run((bind.url, key), load)
+        if not is_shared or values is None:
+            return record
+        return await self._attach(values)
+
+    async def _attach(self, values: dict) -> T:
+        """Объект в этой сессии по уже известным значениям колонок, без запроса к БД."""
+        mapper = inspect(self.model)
+        # Уже загруженный в эту сессию объект не перезаписываем, как и обычный SELECT
+        existing = self._session.identity_map.get(mapper.identity_key_from_primary_key(
+            [values[mapper.get_property_by_column(column).key] for column in mapper.primary_key]
+        ))
+        if existing is not None:
+            return existing
+        instance = self.model(**values)
+        make_transient_to_detached(instance)
+        return await self._session.merge(instance, load=False)
+
     async def find_one_or_none_by_id(self, data_id: int):
         try:
             query = select(self.model).filter_by(id=data_id)
             result = await self._session.execute(query)
             record = result.scalar_one_or_none()
-            log_message = f"Запись {self.model.__name__} с ID {data_id} {'найдена' if record else 'не найдена'}."
-            logger.info(log_message)
+            dao_logger.info("Запись {} с ID {} {}.", self.model.__name__, data_id, "найдена" if record else "не найдена")
             return record
         except SQLAlchemyError as e:
-            logger.error(f"Ошибка при поиске записи с ID {data_id}: {e}")
+            logger.error("Ошибка при поиске записи с ID {}: {}", data_id, e)
             raise
 
     async def find_one_or_none(self, filters: BaseModel):
         filter_dict = filters.model_dump(exclude_unset=True)
-        logger.info(f"Поиск одной записи {self.model.__name__} по фильтрам: {filter_dict}")
+        dao_logger.info("Поиск одной записи {} по фильтрам: {}", self.model.__name__, filter_dict)
         try:
             query = select(self.model).filter_by(**filter_dict)
             result = await self._session.execute(query)
             record = result.scalar_one_or_none()
-            log_message = f"Запись {'найдена' if record else 'не найдена'} по фильтрам: {filter_dict}"
-            logger.info(log_message)
+            dao_logger.info("Запись {} по фильтрам: {}", "найдена" if record else "не найдена", filter_dict)
             return record
         except SQLAlchemyError as e:
-            logger.error(f"Ошибка при поиске записи по фильтрам {filter_dict}: {e}")
+            logger.error("Ошибка при поиске записи по фильтрам {}: {}", filter_dict, e)
             raise
 
     async def find_all(self, filters: BaseModel | None = None):
         filter_dict = filters.model_dump(exclude_unset=True) if filters else {}
-        logger.info(f"Поиск всех записей {self.model.__name__} по фильтрам: {filter_dict}")
+        logger.info("Поиск всех записей {} по фильтрам: {}", self.model.__name__, filter_dict)
         try:
             query = select(self.model).filter_by(**filter_dict)
             result = await self._session.execute(query)
             records = result.scalars().all()
-            logger.info(f"Найдено {len(records)} записей.")
+            logger.info("Найдено {} записей.", len(records))
             return records
         except SQLAlchemyError as e:
-            logger.error(f"Ошибка при поиске всех записей по фильтрам {filter_dict}: {e}")
+            logger.error("Ошибка при поиске всех записей по фильтрам {}: {}", filter_dict, e)
+            raise
+
+    async def find_page(self, filters: BaseModel | None = None, after_id: Any = None, limit: int = 1000) -> list[T]:
+        # Keyset-пагинация по id: следующая страница начинается после последнего id предыдущей
+        filter_dict = filters.model_dump(exclude_unset=True) if filters else {}
+        logger.info("Поиск страницы записей {} после ID {} по фильтрам: {}", self.model.__name__, after_id, filter_dict)
+        try:
+            query = select(self.model).filter_by(**filter_dict).options(lazyload("*"))
+            if after_id is not None:
+                query = query.where(self.model.id > after_id)
+            query = query.order_by(self.model.id).limit(limit)
+            result = await self._session.execute(query)
+            records = result.scalars().all()
+            logger.info("Найдено {} записей.", len(records))
+            return list(records)
+        except SQLAlchemyError as e:
+            logger.error("Ошибка при поиске страницы записей по фильтрам {}: {}", filter_dict, e)
+            raise
+
+    async def stream_all(self, filters: BaseModel | None = None, batch_size: int = 1000) -> AsyncIterator[T]:
+        # Серверный курсор: в памяти одновременно не больше batch_size записей
+        filter_dict = filters.model_dump(exclude_unset=True) if filters else {}
+        logger.info("Потоковое чтение записей {} по фильтрам: {}", self.model.__name__, filter_dict)
+        try:
+            query = (
+                select(self.model)
+                .filter_by(**filter_dict)
+                .options(lazyload("*"))
+                .order_by(self.model.id)
+                .execution_options(yield_per=batch_size)
+            )
+            result = await self._session.stream_scalars(query)
+            async for record in result:
+                yield record
+        except SQLAlchemyError as e:
+            logger.error("Ошибка при потоковом чтении записей по фильтрам {}: {}", filter_dict, e)
             raise
 
     async def add(self, values: BaseModel):
         values_dict = values.model_dump(exclude_unset=True)
-        logger.info(f"Добавление записи {self.model.__name__} с параметрами: {values_dict}")
+        dao_logger.info("Добавление записи {} с параметрами: {}", self.model.__name__, values_dict)
+        self._mark_written()
         try:
             new_instance = self.model(**values_dict)
             self._session.add(new_instance)
-            logger.info(f"Запись {self.model.__name__} успешно добавлена.")
+            dao_logger.info("Запись {} успешно добавлена.", self.model.__name__)
             await self._session.flush()
             return new_instance
         except SQLAlchemyError as e:
-            logger.error(f"Ошибка при добавлении записи: {e}")
+            logger.error("Ошибка при добавлении записи: {}", e)
+            raise
+
+    async def add_many(self, values: list[BaseModel], conflict_columns: list[str] | None = None) -> list[T]:
+        # executemany с RETURNING SQLAlchemy собирает в многострочные INSERT (insertmanyvalues),
+        # строки, упершиеся в conflict_columns, пропускаются и не возвращаются
+        values_list = [value.model_dump(exclude_unset=True) for value in values]
+        logger.info("Пакетное добавление {} записей {}", len(values_list), self.model.__name__)
+        if not values_list:
+            return []
+        self._mark_written()
+        try:
+            query = self._insert_statement()
+            if conflict_columns:
+                query = query.on_conflict_do_nothing(index_elements=conflict_columns)
+            result = await self._session.execute(query.returning(self.model), values_list)
+            records = result.scalars().all()
+            logger.info("Добавлено {} записей {}.", len(records), self.model.__name__)
+            return list(records)
+        except SQLAlchemyError as e:
+            logger.error("Ошибка при пакетном добавлении записей: {}", e)
             raise
 
-    async def update(self, filters: BaseModel, values: BaseModel):
+    def _insert_statement(self):
+        dialect_name = self._session.get_bind().dialect.name
+        if dialect_name == "postgresql":
+            return postgresql_insert(self.model)
+        if dialect_name == "sqlite":
+            return sqlite_insert(self.model)
+        return sqlalchemy_insert(self.model)
+
+    async def update(self, filters: BaseModel, values: BaseModel) -> list[T]:
         filter_dict = filters.model_dump(exclude_unset=True)
         values_dict = values.model_dump(exclude_unset=True)
         logger.info(
-            f"Обновление записей {self.model.__name__} по фильтру: {filter_dict} с параметрами: {values_dict}")
+            "Обновление записей {} по фильтру: {} с параметрами: {}", self.model.__name__, filter_dict, values_dict)
+        self._mark_written()
         try:
+            # Обновленные строки возвращает сам UPDATE, без отдельного SELECT для синхронизации сессии;
+            # populate_existing обновляет уже загруженные в сессию объекты
             query = (
                 sqlalchemy_update(self.model)
                 .where(*[getattr(self.model, k) == v for k, v in filter_dict.items()])
                 .values(**values_dict)
-                .execution_options(synchronize_session="fetch")
+                .returning(self.model)
+                .execution_options(synchronize_session=False, populate_existing=True)
             )
             result = await self._session.execute(query)
-            record = result.scalar_one_or_none()
-            logger.info(f"Обновлено {result.rowcount} записей.")
-            logger.info(f"Данные: {record}")
-            await self._session.flush()
-            return record
+            records = list(result.scalars().all())
+            logger.info("Обновлено {} записей.", len(records))
+            logger.debug("Данные: {}", records)
+            return records
+        except SQLAlchemyError as e:
+            logger.error("Ошибка при обновлении записей: {}", e)
+            raise
+
+    async def update_many(self, values: dict[Any, BaseModel], chunk_size: int = 500) -> list[T]:
+        """Разные значения для многих записей по id: один UPDATE с CASE на каждую пачку из chunk_size id."""
+        logger.info("Пакетное обновление {} записей {}", len(values), self.model.__name__)
+        records: list[T] = []
+        items = [(data_id, value.model_dump(exclude_unset=True)) for data_id, value in values.items()]
+        self._mark_written()
+        try:
+            for start in range(0, len(items), chunk_size):
+                chunk = [(data_id, value_dict) for data_id, value_dict in items[start:start + chunk_size] if value_dict]
+                if not chunk:
+                    continue
+                columns = {name for _, value_dict in chunk for name in value_dict}
+                # Колонка, не заданная для записи, остается прежней: ELSE column
+                assignments = {
+                    name: case(
+                        {data_id: value_dict[name] for data_id, value_dict in chunk if name in value_dict},
+                        value=self.model.id,
+                        else_=getattr(self.model, name),
+                    )
+                    for name in columns
+                }
+                query = (
+                    sqlalchemy_update(self.model)
+                    .where(self.model.id.in_([data_id for data_id, _ in chunk]))
+                    .values(**assignments)
+                    .returning(self.model)
+                    .execution_options(synchronize_session=False, populate_existing=True)
+                )
+                result = await self._session.execute(query)
+                records.extend(result.scalars().all())
+            logger.info("Обновлено {} записей {}.", len(records), self.model.__name__)
+            return records
         except SQLAlchemyError as e:
-            logger.error(f"Ошибка при обновлении записей: {e}")
+            logger.error("Ошибка при пакетном обновлении записей: {}", e)
             raise
 
-    async def delete(self, filters: BaseModel):
+    async def delete(self, filters: BaseModel) -> list[T]:
         filter_dict = filters.model_dump(exclude_unset=True)
-        logger.info(f"Удаление записей {self.model.__name__} по фильтру: {filter_dict}")
+        logger.info("Удаление записей {} по фильтру: {}", self.model.__name__, filter_dict)
         if not filter_dict:
             logger.error("Нужен хотя бы один фильтр для удаления.")
             raise ValueError("Нужен хотя бы один фильтр для удаления.")
+        self._mark_written()
         try:
-            query = sqlalchemy_delete(self.model).filter_by(**filter_dict)
+            # Удаленные строки возвращает сам DELETE, как и в update
+            query = (
+                sqlalchemy_delete(self.model)
+                .filter_by(**filter_dict)
+                .returning(self.model)
+                .execution_options(synchronize_session=False)
+            )
             result = await self._session.execute(query)
-            logger.info(f"Удалено {result.rowcount} записей.")
-            logger.info(f"Данные: {result}")
-            await self._session.flush()
-            return result
+            records = list(result.scalars().all())
+            logger.info("Удалено {} записей.", len(records))
+            logger.debug("Данные: {}", records)
+            return records
         except SQLAlchemyError as e:
-            logger.error(f"Ошибка при удалении записей: {e}")
+            logger.error("Ошибка при удалении записей: {}", e)
             raise
 
-
     async def count(self, filters: BaseModel | None = None):
         filter_dict = filters.model_dump(exclude_unset=True) if filters else {}
-        logger.info(f"Подсчет количества записей {self.model.__name__} по фильтру: {filter_dict}")
+        logger.info("Подсчет количества записей {} по фильтру: {}", self.model.__name__, filter_dict)
         try:
             query = select(func.count(self.model.id)).filter_by(**filter_dict)
             result = await self._session.execute(query)
             count = result.scalar()
-            logger.info(f"Найдено {count} записей.")
+            logger.info("Найдено {} записей.", count)
             return count
         except SQLAlchemyError as e:
-            logger.error(f"Ошибка при подсчете записей: {e}")
+            logger.error("Ошибка при подсчете записей: {}", e)
             raise
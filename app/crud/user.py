@@ -1,26 +1,75 @@
+import time
+from datetime import datetime
+from typing import AsyncIterator
+
 from loguru import logger
-from sqlalchemy import select
+from sqlalchemy import select, and_, or_, func, literal, true, false, delete as sqlalchemy_delete, \
+    insert as sqlalchemy_insert, update as sqlalchemy_update
+from sqlalchemy.engine import Row
 from sqlalchemy.exc import SQLAlchemyError
 
 from app.models.user import User, UserSession
 from app.models.program import Program
 
-from .base import BaseDAO
+from app.core import settings
+from app.db.routing import get_written_tables
+from app.utils.session_table import get_user_change_table
+from app.utils.single_flight import SingleFlight
+from app.utils.user_index import IndexedUser, UserIndex
+
+from .base import BaseDAO, dao_logger
+
+# Одновременные поиски пользователя по одному Telegram ID выполняют один запрос
+telegram_id_lookups = SingleFlight() if settings.SINGLE_FLIGHT_ENABLED else None
+# Индекс пользователей в памяти процесса; загружается и обновляется в app.services.user_index
+user_index = UserIndex() if settings.USER_INDEX_ENABLED else None
+
+
+def get_indexed_user(telegram_id: int) -> IndexedUser | None:
+    """Запись индекса, если ей можно верить; None — нужно идти в базу."""
+    if user_index is None or not user_index.is_loaded:
+        return None
+    # Индекс, который давно не перезагружался (ошибки базы), мог пропустить изменения других хостов
+    max_age = settings.USER_INDEX_MAX_AGE_SECONDS
+    if max_age > 0 and time.time() * 1000 - user_index.version > max_age * 1000:
+        return None
+    indexed = user_index.get(telegram_id)
+    if indexed is None:
+        return None
+    # Пользователя изменил другой воркер позже, чем индекс узнал о нем
+    table = get_user_change_table()
+    changed_at = table.changed_at(telegram_id) if table is not None else None
+    if changed_at is not None and changed_at > user_index.version_of(telegram_id):
+        return None
+    return indexed
 
 
 class UserDAO(BaseDAO):
     model = User
 
+    async def find_indexed_by_telegram_id(self, telegram_id: int) -> User | None:
+        """Пользователь из индекса в памяти, без запроса к БД; None, если индекс не может ответить."""
+        if user_index is None or not self._can_use_index():
+            return None
+        indexed = get_indexed_user(telegram_id)
+        if indexed is None:
+            return None
+        return await self._attach(indexed._asdict())
+
     async def find_one_or_none_by_telegram_id(self, telegram_id: int) -> User:
         try:
+            record = await self.find_indexed_by_telegram_id(telegram_id)
+            if record is not None:
+                return record
             query = select(self.model).filter_by(telegram_id=telegram_id)
-            result = await self._session.execute(query)
-            record = result.scalar_one_or_none()
-            log_message = f"Запись {self.model.__name__} с Telegram ID {telegram_id} {'найдена' if record else 'не найдена'}."
-            logger.info(log_message)
+            # Прочитанное здесь в индекс не пишется: данные с реплики или из чужой транзакции могут
+            # быть старее индекса. Индекс меняют только закоммиченные изменения и перезагрузка
+            record = await self._find_one_coalesced(telegram_id_lookups, telegram_id, query)
+            dao_logger.info("Запись {} с Telegram ID {} {}.", self.model.__name__, telegram_id,
+                            "найдена" if record else "не найдена")
             return record
         except SQLAlchemyError as e:
-            logger.error(f"Ошибка при поиске записи с Telegram ID {telegram_id}: {e}")
+            logger.error("Ошибка при поиске записи с Telegram ID {}: {}", telegram_id, e)
             raise
 
     async def find_admin_or_none_by_telegram_id(self, telegram_id: int) -> User:
@@ -28,16 +77,185 @@ class UserDAO(BaseDAO):
             query = select(self.model).filter_by(telegram_id=telegram_id, is_admin=True)
             result = await self._session.execute(query)
             record = result.scalar_one_or_none()
-            log_message = f"Запись {self.model.__name__} администратора с Telegram ID {telegram_id} {'найдена' if record else 'не найдена'}."
-            logger.info(log_message)
+            dao_logger.info("Запись {} администратора с Telegram ID {} {}.", self.model.__name__, telegram_id,
+                            "найдена" if record else "не найдена")
             return record
 
         except SQLAlchemyError as e:
-            logger.error(f"Ошибка при поиске записи с Telegram ID {telegram_id}: {e}")
-        raise
+            logger.error("Ошибка при поиске записи с Telegram ID {}: {}", telegram_id, e)
+            raise
+
+    def _can_use_index(self) -> bool:
+        # Своя незакоммиченная запись в users важнее индекса, который обновляется после коммита
+        return self.model.__tablename__ not in get_written_tables(self._session)
+
+    async def stream_index_rows(self, batch_size: int = 10000) -> AsyncIterator[Row]:
+        """Строки (telegram_id, id, is_admin, username) по возрастанию telegram_id, без ORM-объектов."""
+        try:
+            query = (
+                select(self.model.telegram_id, self.model.id, self.model.is_admin, self.model.username)
+                .order_by(self.model.telegram_id)
+                .execution_options(yield_per=batch_size)
+            )
+            result = await self._session.stream(query)
+            async for row in result:
+                yield row
+        except SQLAlchemyError as e:
+            logger.error("Ошибка при чтении пользователей для индекса: {}", e)
+            raise
+
 
 class UserSessionDAO(BaseDAO):
     model = UserSession
 
+    async def find_one_or_none_with_user(self, session_id: str, telegram_id: int) -> Row | None:
+        # Пользователь и состояние его сессии одним запросом, без повторного join через UserSession.user
+        try:
+            query = (
+                select(User, self.model.id, self.model.is_active, self.model.expires_at)
+                .outerjoin(self.model, and_(self.model.user_id == User.id, self.model.id == session_id))
+                .where(User.telegram_id == telegram_id)
+            )
+            result = await self._session.execute(query)
+            record = result.one_or_none()
+            dao_logger.info("Сессия {} пользователя с Telegram ID {} {}.", session_id, telegram_id,
+                            "найдена" if record and record.id else "не найдена")
+            return record
+        except SQLAlchemyError as e:
+            logger.error("Ошибка при поиске сессии {} с Telegram ID {}: {}", session_id, telegram_id, e)
+            raise
+
+    async def find_active_session_id(self, user_id: int, user_agent: str | None) -> str | None:
+        # Только id: загрузка UserSession целиком подтянула бы пользователя через joined-связь
+        try:
+            query = select(self.model.id).filter_by(user_id=user_id, user_agent=user_agent, is_active=True).limit(1)
+            session_id = await self._session.scalar(query)
+            dao_logger.info("Активная сессия пользователя {} {}.", user_id, "найдена" if session_id else "не найдена")
+            return session_id
+        except SQLAlchemyError as e:
+            logger.error("Ошибка при поиске активной сессии пользователя {}: {}", user_id, e)
+            raise
+
+    async def rotate(
+            self,
+            session_id: str,
+            telegram_id: int,
+            new_session_id: str,
+            user_agent: str,
+            now: datetime,
+            expires_at: datetime,
+    ) -> Row | None:
+        """Деактивирует сессию, если она еще активна и не истекла, и создает на ее месте новую.
+
+        Возвращает строку (user_id, old_expires_at) или None, если сессию уже сменил другой запрос.
+        Из параллельных обновлений с одним токеном проходит ровно одно: условие is_active
+        проверяется самим UPDATE под блокировкой строки.
+        """
+        owner_id = select(User.id).where(User.telegram_id == telegram_id).scalar_subquery()
+        deactivate = (
+            sqlalchemy_update(self.model)
+            .where(
+                self.model.id == session_id,
+                self.model.is_active.is_(True),
+                self.model.expires_at > now,
+                self.model.user_id == owner_id,
+            )
+            .values(is_active=False)
+            .returning(self.model.user_id, self.model.expires_at.label("old_expires_at"))
+        )
+        self._mark_written()
+        try:
+            if self._session.get_bind().dialect.name == "postgresql":
+                record = await self._rotate_in_one_statement(deactivate, new_session_id, user_agent, now, expires_at)
+            else:
+                # Без изменяющих CTE (SQLite): UPDATE ... RETURNING и INSERT в одной транзакции
+                result = await self._session.execute(deactivate)
+                record = result.one_or_none()
+                if record:
+                    await self._session.execute(
+                        sqlalchemy_insert(self.model).values(
+                            id=new_session_id,
+                            user_id=record.user_id,
+                            user_agent=user_agent,
+                            created_at=now,
+                            expires_at=expires_at,
+                            is_active=True,
+                        )
+                    )
+            dao_logger.info("Сессия {} {}.", session_id, "заменена на " + new_session_id if record else "не заменена")
+            return record
+        except SQLAlchemyError as e:
+            logger.error("Ошибка при замене сессии {}: {}", session_id, e)
+            raise
+
+    async def _rotate_in_one_statement(
+            self,
+            deactivate,
+            new_session_id: str,
+            user_agent: str,
+            now: datetime,
+            expires_at: datetime,
+    ) -> Row | None:
+        # WITH old AS (UPDATE ... RETURNING), new AS (INSERT ... SELECT FROM old RETURNING) SELECT ...
+        old = deactivate.cte("old_session")
+        columns = self.model.__table__.c
+        new = (
+            sqlalchemy_insert(self.model)
+            .from_select(
+                ["id", "user_id", "user_agent", "created_at", "expires_at", "is_active"],
+                select(
+                    literal(new_session_id, columns.id.type),
+                    old.c.user_id,
+                    literal(user_agent, columns.user_agent.type),
+                    literal(now, columns.created_at.type),
+                    literal(expires_at, columns.expires_at.type),
+                    true(),
+                ),
+            )
+            .returning(self.model.user_id)
+            .cte("new_session")
+        )
+        result = await self._session.execute(select(new.c.user_id, old.c.old_expires_at).select_from(new, old))
+        return result.one_or_none()
+
+    async def delete_by_telegram_id(self, telegram_id: int) -> int:
+        # Внешний ключ user_sessions.user_id без ON DELETE CASCADE: сессии удаляются до пользователя
+        self._mark_written()
+        try:
+            owner_id = select(User.id).where(User.telegram_id == telegram_id).scalar_subquery()
+            result = await self._session.execute(sqlalchemy_delete(self.model).where(self.model.user_id == owner_id))
+            logger.info("Удалено {} сессий пользователя с Telegram ID {}.", result.rowcount, telegram_id)
+            return result.rowcount
+        except SQLAlchemyError as e:
+            logger.error("Ошибка при удалении сессий пользователя с Telegram ID {}: {}", telegram_id, e)
+            raise
+
+    async def delete_expired_batch(self, now: datetime, limit: int) -> int:
+        # Удаляем не больше limit истекших и limit неактивных строк за раз, чтобы не держать долгих
+        # блокировок. Условия в отдельных подзапросах: каждое идет по своему индексу, а не полным
+        # сканированием по OR
+        self._mark_written()
+        try:
+            expired_ids = select(self.model.id).where(self.model.expires_at < now).limit(limit)
+            inactive_ids = select(self.model.id).where(self.model.is_active == false()).limit(limit)
+            query = sqlalchemy_delete(self.model).where(
+                or_(self.model.id.in_(expired_ids), self.model.id.in_(inactive_ids))
+            )
+            result = await self._session.execute(query)
+            logger.info("Удалено {} истекших или неактивных сессий.", result.rowcount)
+            return result.rowcount
+        except SQLAlchemyError as e:
+            logger.error("Ошибка при удалении истекших сессий: {}", e)
+            raise
+
+    async def find_oldest_expires_at(self, now: datetime) -> datetime | None:
+        try:
+            query = select(func.min(self.model.expires_at)).where(self.model.expires_at < now)
+            result = await self._session.execute(query)
+            return result.scalar()
+        except SQLAlchemyError as e:
+            logger.error("Ошибка при поиске самой старой истекшей сессии: {}", e)
+            raise
+
 class ProgramDAO(BaseDAO):
     model = Program
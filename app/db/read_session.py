@@ -0,0 +1,45 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.routing import get_written_tables
+
+
+class ReleasingAsyncSession(AsyncSession):
+    """Сессия для чтения, которая держит соединение из пула только на время запроса.
+
+    Соединение берется при первом запросе (autobegin), а после каждого SELECT транзакция
+    завершается и соединение возвращается в пул, не дожидаясь закрытия сессии в конце ответа.
+    Загруженные объекты остаются в сессии (expire_on_commit=False). Если в транзакции что-то
+    записывалось, она живет до конца сессии, как в обычной AsyncSession.
+
+    Цена такого освобождения:
+    - каждый SELECT — отдельная транзакция, поэтому несколько чтений в одном запросе не видят
+      общего снимка БД; для get_current_user, проверки администратора и страниц админки это
+      допустимо, но согласованное чтение нескольких таблиц нужно делать одним запросом
+      или в обычной сессии;
+    - на каждый SELECT приходится лишний COMMIT (дешевый, транзакция только читала);
+    - ленивые загрузки после освобождения открывают новую транзакцию, поэтому связи нужно
+      загружать в том же запросе.
+    Писать через такую сессию нельзя: зависимость get_session_without_commit ее не коммитит,
+    и изменения откатываются при закрытии. Роуты, которые пишут, берут get_session_with_commit.
+    """
+
+    async def execute(self, statement, *args, **kwargs):
+        result = await super().execute(statement, *args, **kwargs)
+        await self._release_after(statement)
+        return result
+
+    async def scalar(self, statement, *args, **kwargs):
+        result = await super().scalar(statement, *args, **kwargs)
+        await self._release_after(statement)
+        return result
+
+    async def get(self, *args, **kwargs):
+        result = await super().get(*args, **kwargs)
+        await self._release_after(None)
+        return result
+
+    async def _release_after(self, statement) -> None:
+        is_read = statement is None or getattr(statement, "is_select", False)
+        if is_read and self.in_transaction() and not get_written_tables(self.sync_session):
+            # Транзакция только читала: commit просто отдает соединение в пул
+            await self.commit()
@@ -0,0 +1,104 @@
+import time
+
+from loguru import logger
+from sqlalchemy import event
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import Session, SessionTransaction
+from sqlalchemy.sql.dml import UpdateBase
+
+WRITTEN_TABLES_KEY = "written_tables"
+READ_PRIMARY_KEY = "read_primary"
+
+
+def get_written_tables(session: Session) -> set[str]:
+    """Таблицы, в которые писали в текущей транзакции сессии: запросами DAO или через flush."""
+    return session.info.get(WRITTEN_TABLES_KEY, set())
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_flushed_tables(session: Session, flush_context) -> None:
+    # Изменения через unit of work тоже считаются записью, не только запросы DAO
+    tables = {type(instance).__tablename__ for instance in (*session.new, *session.dirty, *session.deleted)}
+    if tables:
+        session.info.setdefault(WRITTEN_TABLES_KEY, set()).update(tables)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _clear_written_tables(session: Session, transaction: SessionTransaction) -> None:
+    # after_commit уже отработал; вложенные транзакции (savepoint) отметки не сбрасывают
+    if transaction.parent is None:
+        session.info.pop(WRITTEN_TABLES_KEY, None)
+
+
+class Replica:
+    """Реплика для чтения. После ошибки подключения не используется retry_seconds секунд."""
+
+    def __init__(self, engine: AsyncEngine, retry_seconds: float):
+        self.engine = engine
+        self._retry_seconds = retry_seconds
+        self._failed_until = 0.0
+        self.failures = 0
+
+    def is_available(self) -> bool:
+        return time.monotonic() >= self._failed_until
+
+    def mark_failed(self, error: Exception) -> None:
+        self.failures += 1
+        self._failed_until = time.monotonic() + self._retry_seconds
+        logger.warning("Реплика недоступна, чтение с основной БД {} с: {}", self._retry_seconds, error)
+
+    def snapshot(self) -> dict:
+        return {
+            "available": self.is_available(),
+            "failures": self.failures,
+            "pool": self.engine.pool.snapshot(),
+        }
+
+
+class RoutingSession(Session):
+    """Сессия, которая читает с реплики, а пишет в основную БД.
+
+    На основную БД уходят: запись и flush, чтения после записи в той же транзакции,
+    сессии с флагом READ_PRIMARY_KEY и все запросы, пока реплика недоступна.
+    """
+
+    def __init__(self, *args, replica: Replica, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._replica = replica
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self._is_replica_read(clause):
+            return self._replica.engine.sync_engine
+        return super().get_bind(mapper, clause=clause, **kwargs)
+
+    def _is_replica_read(self, clause) -> bool:
+        return (
+            not self._flushing
+            and not isinstance(clause, UpdateBase)
+            and not self.info.get(READ_PRIMARY_KEY)
+            and not get_written_tables(self)
+            and self._replica.is_available()
+        )
+
+    def _connection_for_bind(self, engine, execution_options=None, **kwargs):
+        if engine is not self._replica.engine.sync_engine:
+            return super()._connection_for_bind(engine, execution_options, **kwargs)
+        try:
+            return super()._connection_for_bind(engine, execution_options, **kwargs)
+        except (DBAPIError, OSError) as e:
+            # Здесь падает только подключение к реплике: запрос повторяется на основной БД
+            self._replica.mark_failed(e)
+            return super()._connection_for_bind(self.get_bind(), execution_options, **kwargs)
+
+
+def read_from_primary(session: AsyncSession) -> bool:
+    """Переключает дальнейшие чтения сессии на основную БД.
+
+    Возвращает False, если сессия и так читала с основной: повторять запрос нет смысла.
+    """
+    sync_session = session.sync_session
+    if not isinstance(sync_session, RoutingSession) or not sync_session._is_replica_read(None):
+        return False
+    session.info[READ_PRIMARY_KEY] = True
+    return True
@@ -1,8 +1,70 @@
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from app.core import settings
+from app.db.pool import InstrumentedQueuePool
+from app.db.read_session import ReleasingAsyncSession
+from app.db.routing import Replica, RoutingSession
 
 
 DATABASE_URL = settings.get_database_url()
 
-engine = create_async_engine(url=DATABASE_URL, echo=True)
-async_session_maker = async_sessionmaker(engine, expire_on_commit=False)
\ No newline at end of file
+
+class Database:
+    """Движки и фабрики сессий. Создаются при старте приложения (lifespan), а не при импорте модуля."""
+
+    def __init__(self):
+        self.engine: AsyncEngine | None = None
+        self.replica: Replica | None = None
+        self.session_maker: async_sessionmaker | None = None
+        self.read_session_maker: async_sessionmaker | None = None
+
+    def connect(self) -> "Database":
+        if self.engine is not None:
+            return self
+        self.engine = create_async_engine(
+            url=DATABASE_URL, poolclass=InstrumentedQueuePool, **settings.get_engine_options()
+        )
+        self.session_maker = async_sessionmaker(self.engine, expire_on_commit=False)
+        # Сессии только для чтения: соединение возвращается в пул после каждого запроса
+        self.read_session_maker = async_sessionmaker(
+            self.engine, expire_on_commit=False, class_=ReleasingAsyncSession
+        )
+        if settings.REPLICA_DATABASE_URL:
+            replica_engine = create_async_engine(
+                url=settings.REPLICA_DATABASE_URL,
+                poolclass=InstrumentedQueuePool,
+                **settings.get_engine_options(settings.REPLICA_DATABASE_URL),
+            )
+            self.replica = Replica(replica_engine, retry_seconds=settings.REPLICA_RETRY_SECONDS)
+            self.read_session_maker = async_sessionmaker(
+                self.engine,
+                expire_on_commit=False,
+                class_=ReleasingAsyncSession,
+                sync_session_class=RoutingSession,
+                replica=self.replica,
+            )
+        return self
+
+    async def dispose(self) -> None:
+        if self.replica is not None:
+            await self.replica.engine.dispose()
+        if self.engine is not None:
+            await self.engine.dispose()
+        self.engine = None
+        self.replica = None
+        self.session_maker = None
+        self.read_session_maker = None
+
+
+class LazySessionMaker:
+    """Фабрика сессий, которая подключает базу при первом вызове, если lifespan еще не сделал этого."""
+
+    def __init__(self, attribute: str):
+        self._attribute = attribute
+
+    def __call__(self, **kwargs):
+        return getattr(database.connect(), self._attribute)(**kwargs)
+
+
+database = Database()
+async_session_maker = LazySessionMaker("session_maker")
+read_session_maker = LazySessionMaker("read_session_maker")
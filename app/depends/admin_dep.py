@@ -1,23 +1,12 @@
-from fastapi import HTTPException
-from fastapi.params import Depends
-from sqlalchemy.ext.asyncio import AsyncSession
-from starlette.requests import Request
+from fastapi import Depends
 
-from app.crud.user import UserDAO
-from app.depends.dao_dep import get_session_with_commit
+from app.depends.auth_dep import get_current_user
+from app.models.user import User
+from app.utils.exceptions import ForbiddenException
 
 
-async def check_admin_privileges(request: Request, session: AsyncSession = Depends(get_session_with_commit)):
-    admin_telegram_id = request.query_params.get("admin_telegram_id", None)
-    if not admin_telegram_id:
-        raise HTTPException(400, detail="Отсутствует поле Telegram ID")
-
-    if admin_telegram_id.isdigit():
-        admin_telegram_id = int(admin_telegram_id)
-    else:
-        raise HTTPException(400, "Некорректный Telegram ID администратора")
-
-    dao = UserDAO(session)
-    is_admin = await dao.find_admin_or_none_by_telegram_id(telegram_id=admin_telegram_id)
-    if not is_admin:
-        raise HTTPException(401, "Пользователь с таким Telegram ID не является администратором")
+async def check_admin_privileges(user: User = Depends(get_current_user)) -> User:
+    # Права определяются по access-токену: Telegram ID не секрет и сам по себе личность не подтверждает
+    if not user.is_admin:
+        raise ForbiddenException
+    return user
@@ -35,4 +35,4 @@ async def check_refresh_token(
     user = await verify_token_and_session(token=token, token_type=TokenType.REFRESH_TOKEN, session=session)
     if not user:
         return False
-    return True
\ No newline at end of file
+    return True
@@ -1,6 +1,13 @@
 from typing import AsyncGenerator
+
+from fastapi import Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.db.session import async_session_maker
+
+from app.db.routing import READ_PRIMARY_KEY
+from app.db.session import async_session_maker, read_session_maker
+
+# Клиент, который только что что-то изменил, может потребовать чтение с основной БД
+READ_YOUR_WRITES_HEADER = "X-Read-Your-Writes"
 
 
 async def get_session_with_commit() -> AsyncGenerator[AsyncSession, None]:
@@ -16,9 +23,11 @@ async def get_session_with_commit() -> AsyncGenerator[AsyncSession, None]:
             await session.close()
 
 
-async def get_session_without_commit() -> AsyncGenerator[AsyncSession, None]:
-    """Асинхронная сессия без автоматического коммита."""
-    async with async_session_maker() as session:
+async def get_session_without_commit(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """Асинхронная сессия без автоматического коммита; читает с реплики, если она настроена."""
+    async with read_session_maker() as session:
+        if request.headers.get(READ_YOUR_WRITES_HEADER, "").lower() in ("1", "true"):
+            session.info[READ_PRIMARY_KEY] = True
         try:
             yield session
         except Exception:
@@ -0,0 +1,60 @@
+from fastapi import HTTPException, Request, status
+from jose import JWTError, jwt
+
+from app.constants.enums import TokenType
+from app.core import settings
+from app.utils.rate_limit import TokenBucketTable, retry_after_header
+
+# Лимиты на процесс: при нескольких воркерах общий лимит умножается на их число
+telegram_id_limiter = TokenBucketTable(
+    rate_per_second=settings.RATE_LIMIT_TELEGRAM_ID_PER_MINUTE / 60,
+    burst=settings.RATE_LIMIT_TELEGRAM_ID_BURST,
+    max_keys=settings.RATE_LIMIT_MAX_KEYS,
+    shards=settings.RATE_LIMIT_SHARDS,
+)
+ip_limiter = TokenBucketTable(
+    rate_per_second=settings.RATE_LIMIT_IP_PER_MINUTE / 60,
+    burst=settings.RATE_LIMIT_IP_BURST,
+    max_keys=settings.RATE_LIMIT_MAX_KEYS,
+    shards=settings.RATE_LIMIT_SHARDS,
+)
+
+
+def _check(action: str, telegram_id: str | None, request: Request) -> None:
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+    retry_after = 0.0
+    telegram_id_key = (action, telegram_id)
+    if telegram_id is not None:
+        retry_after = telegram_id_limiter.acquire(telegram_id_key)
+    if not retry_after:
+        # За прокси адрес клиента берется из X-Forwarded-For средствами uvicorn (--proxy-headers)
+        client_host = request.client.host if request.client else "unknown"
+        retry_after = ip_limiter.acquire((action, client_host))
+        # Отказ по IP не должен расходовать лимит пользователя: иначе чужой трафик с того же
+        # адреса исчерпывает и его ведро. Между acquire и refund нет await, так что это атомарно
+        if retry_after and telegram_id is not None:
+            telegram_id_limiter.refund(telegram_id_key)
+    if retry_after:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Слишком много запросов, попробуйте позже",
+            headers=retry_after_header(retry_after),
+        )
+
+
+async def limit_login(request: Request, telegram_id: int) -> None:
+    _check("login", str(telegram_id), request)
+
+
+async def limit_refresh(request: Request) -> None:
+    # Подпись здесь не проверяется: sub нужен только как ключ лимита, до любой работы с БД
+    token_name = TokenType.REFRESH_TOKEN.value
+    token = request.cookies.get(token_name) or request.headers.get("X-Refresh-Token")
+    telegram_id = None
+    if token:
+        try:
+            telegram_id = str(jwt.get_unverified_claims(token).get("sub"))
+        except JWTError:
+            pass
+    _check("refresh", telegram_id, request)
@@ -1,11 +1,67 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from loguru import logger
 
+from app.api.health import router as health_router
+from app.api.jwks import router as jwks_router
+from app.api.metrics import router as metrics_router
+from app.api.v1.admin import router as admin_router
 from app.api.v1.auth import router as auth_router
+from app.api.v1.program import router as program_router
 from app.api.v1.user import router as user_router
+from app.core import settings
+from app.core.logging import setup_logging
+from app.db.session import database
+from app.services.program import program_catalog
+from app.services.session_janitor import session_janitor
+from app.services.user_index import user_index_loader
+from app.services.warmup import startup_report, warm_up
+from app.utils.metrics import MetricsMiddleware, metrics_registry
+from app.utils.query_accounting import QueryAccountingMiddleware
+
+setup_logging()
+
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    startup_report.reset()
+    with startup_report.phase("database"):
+        database.connect()
+    if settings.DB_WARMUP_ENABLED:
+        try:
+            await warm_up(startup_report)
+        except Exception as e:
+            # Без прогрева приложение работает, только первые запросы медленнее
+            logger.error("Ошибка прогрева: {}", e)
+    with startup_report.phase("program_catalog"):
+        await program_catalog.start()
+    with startup_report.phase("user_index"):
+        await user_index_loader.start()
+    if settings.SESSION_JANITOR_ENABLED:
+        session_janitor.start()
+    startup_report.mark_ready()
+    yield
+    startup_report.is_ready = False
+    await session_janitor.stop()
+    await user_index_loader.stop()
+    await program_catalog.stop()
+    await database.dispose()
+
+
+app = FastAPI(lifespan=lifespan)
 app.include_router(auth_router)
 app.include_router(user_router)
+app.include_router(admin_router)
+app.include_router(program_router)
+app.include_router(health_router)
+app.include_router(metrics_router)
+app.include_router(jwks_router)
+
+if settings.QUERY_ACCOUNTING_ENABLED:
+    app.add_middleware(QueryAccountingMiddleware)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware, registry=metrics_registry)
 
 
 @app.get("/")
@@ -1,6 +1,6 @@
 from datetime import datetime, timezone
 
-from sqlalchemy import String, BIGINT, BOOLEAN, ForeignKey
+from sqlalchemy import String, BIGINT, BOOLEAN, ForeignKey, Index, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db import Base
@@ -18,6 +18,25 @@ class User(Base):
 
 class UserSession(Base):
     __tablename__ = "user_sessions"
+    __table_args__ = (
+        Index("ix_user_sessions_user_id_user_agent_is_active", "user_id", "user_agent", "is_active"),
+        # Вход ищет только активную сессию клиента, индекс по активным сессиям заметно меньше
+        Index(
+            "ix_user_sessions_active_user_id_user_agent",
+            "user_id",
+            "user_agent",
+            postgresql_where=text("is_active"),
+            sqlite_where=text("is_active = 1"),
+        ),
+        # Очистка сессий: истекшие ищутся по expires_at, неактивные — по частичному индексу
+        Index("ix_user_sessions_expires_at", "expires_at"),
+        Index(
+            "ix_user_sessions_inactive_id",
+            "id",
+            postgresql_where=text("NOT is_active"),
+            sqlite_where=text("is_active = 0"),
+        ),
+    )
 
     id: Mapped[str] = mapped_column(String, primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
@@ -0,0 +1,12 @@
+from pydantic import BaseModel, Field, ConfigDict, NonNegativeInt
+
+
+class ProgramModel(BaseModel):
+    program_name: str = Field(title="Название программы", description="Поле с названием программы",
+                              examples=["Программирование на Python"])
+    min_age: NonNegativeInt = Field(title="Минимальный возраст", description="Минимальный возраст ребенка, лет",
+                                    examples=[8])
+    max_age: NonNegativeInt = Field(title="Максимальный возраст", description="Максимальный возраст ребенка, лет",
+                                    examples=[12])
+
+    model_config = ConfigDict(from_attributes=True)
@@ -4,6 +4,8 @@ from datetime import datetime
 
 from pydantic import BaseModel, PositiveInt, Field, StrictBool, ConfigDict
 
+from app.constants.enums import ImportStatus
+
 
 class UserModel(BaseModel):
     telegram_id: PositiveInt = Field(title="Telegram ID", description="Поле с Telegram ID пользователя", examples=[123456789])
@@ -19,6 +21,21 @@ class UserCreateModel(BaseModel):
     username: str = Field(title="Имя пользователя", description="Поле с именем пользователя", examples=["Ivan", "Kate"])
 
 
+class UserImportRowModel(BaseModel):
+    line: PositiveInt = Field(title="Номер строки", description="Номер строки во входном файле")
+    telegram_id: Optional[int] = Field(default=None, title="Telegram ID", description="Telegram ID из строки, если он прочитан")
+    status: ImportStatus = Field(title="Результат", description="Результат импорта строки")
+    detail: Optional[str] = Field(default=None, title="Подробности", description="Описание ошибки валидации")
+
+
+class UserImportReportModel(BaseModel):
+    total: int = Field(title="Всего строк", description="Количество обработанных строк")
+    created: int = Field(title="Создано", description="Количество созданных пользователей")
+    skipped: int = Field(title="Пропущено", description="Строки с уже существующим или повторным Telegram ID")
+    invalid: int = Field(title="С ошибками", description="Строки, не прошедшие валидацию")
+    rows: list[UserImportRowModel] = Field(title="Строки", description="Результат по каждой строке")
+
+
 class UserUpdateBodyModel(BaseModel):
     username: Optional[str] = Field(title="Имя пользователя", description="Поле с именем пользователя",
                                     examples=["Ivan", "Kate"])
@@ -51,6 +68,17 @@ class UserSessionCreateModel(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class UserSessionModel(BaseModel):
+    id: str = Field(title="ID сессии")
+    user_id: int = Field(title="ID пользователя")
+    user_agent: str = Field(title="User-Agent клиента")
+    created_at: datetime = Field(title="Время создания")
+    expires_at: datetime = Field(title="Время истечения")
+    is_active: StrictBool = Field(title="Сессия активна?")
+
+    model_config = ConfigDict(from_attributes=True)
+
+
 class UserSessionUpdateModel(BaseModel):
     is_active: StrictBool = Field()
 
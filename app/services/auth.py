@@ -1,26 +1,99 @@
+import hashlib
+import time
 import uuid
+from collections import OrderedDict
 from datetime import datetime, timezone, timedelta
 
 from loguru import logger
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.requests import Request
 from fastapi.responses import Response
-from jose import jwt, ExpiredSignatureError, JWTError
 
 from app.constants.enums import TokenType
 from app.core import settings
 from app.crud.user import UserDAO, UserSessionDAO
+from app.db.routing import read_from_primary
 from app.models.user import User
 from app.schemas.user import UserSessionUpdateFilterModel, UserSessionUpdateModel
 from app.utils.exceptions import TokenNoFound, TokenExpiredException, NoJwtException, UserNotFoundException, \
     ForbiddenException, InvalidTokenFormatException, SessionNotValidException
-from app.utils.security import create_refresh_token, create_access_token, set_tokens_as_cookies, create_session
+from app.utils.security import create_refresh_token, create_access_token, set_tokens_as_cookies
+from app.utils.jwt_codec import ExpiredTokenError, InvalidTokenError, get_jwt_codec
+from app.utils.session_table import SessionState, get_session_table
+
+
+class VerifiedTokenCache:
+    """Ограниченный LRU-кэш проверенных JWT, запись живет до exp самого токена."""
+
+    def __init__(self, max_size: int):
+        self._max_size = max_size
+        self._entries: OrderedDict[bytes, tuple[float, dict]] = OrderedDict()
+        self._by_session: dict[str, set[bytes]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _make_key(token: str, token_type: TokenType) -> bytes:
+        return hashlib.blake2b(f"{token_type.value}:{token}".encode(), digest_size=16).digest()
+
+    def get(self, token: str, token_type: TokenType) -> dict | None:
+        key = self._make_key(token, token_type)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, payload = entry
+        if expires_at <= time.time():
+            self._discard(key)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return payload
+
+    def put(self, token: str, token_type: TokenType, payload: dict) -> None:
+        if self._max_size <= 0:
+            return
+        key = self._make_key(token, token_type)
+        self._entries[key] = (float(payload["exp"]), payload)
+        self._entries.move_to_end(key)
+        self._by_session.setdefault(payload["sid"], set()).add(key)
+        while len(self._entries) > self._max_size:
+            oldest_key = next(iter(self._entries))
+            self._discard(oldest_key)
+
+    def evict_session(self, session_id: str) -> None:
+        for key in self._by_session.pop(session_id, ()):
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._by_session.clear()
+
+    def stats(self) -> dict:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def _discard(self, key: bytes) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        session_id = entry[1]["sid"]
+        keys = self._by_session.get(session_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_session[session_id]
+
+
+token_cache = VerifiedTokenCache(max_size=settings.TOKEN_CACHE_MAX_SIZE)
 
 
 async def _get_token_from_request(request: Request, token_type: TokenType) -> str:
     # Пытаемся получить токен из кук
     token_name = token_type.value
-    logger.info(f"Token name: {token_name}")
+    logger.debug("Token name: {}", token_name)
     token = request.cookies.get(token_name)
     if token:
         return token
@@ -44,37 +117,63 @@ async def get_refresh_token(
     return await _get_token_from_request(request, TokenType.REFRESH_TOKEN)
 
 
+async def decode_token(token: str, token_type: TokenType) -> dict:
+    # Повторно присланный токен не проверяем заново, пока не истек его exp
+    payload = token_cache.get(token, token_type)
+    if payload is not None:
+        return payload
+
+    try:
+        payload = get_jwt_codec().decode(token)
+    except ExpiredTokenError:
+        raise TokenExpiredException
+    except InvalidTokenError as e:
+        logger.error("Ошибка проверки токена: {}", e)
+        raise NoJwtException
+
+    await validate_jwt_payload(payload, token_type)
+    token_cache.put(token, token_type, payload)
+    return payload
+
+
 async def verify_token_and_session(
     token: str,
     token_type: TokenType,
     session: AsyncSession
 ) -> User:
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-    except ExpiredSignatureError:
-        raise TokenExpiredException
-    except JWTError:
-        logger.error(f"payload error")
-        raise NoJwtException
-
-    is_valid_payload = validate_jwt_payload(payload, token_type)
-    if is_valid_payload:
-        telegram_id = payload.get("sub")
+    payload = await decode_token(token, token_type)
+    if payload:
+        telegram_id = int(payload.get("sub"))
         session_id = payload.get("sid")
 
-        user = await UserDAO(session).find_one_or_none_by_telegram_id(int(telegram_id))
-        if not user:
+        # Отозванную сессию отклоняем без похода в базу. Активную проверяем без базы, только если
+        # включен индекс пользователей (USER_INDEX_ENABLED): без него нужен запрос за самим пользователем
+        state = _check_shared_session_state(session_id, telegram_id)
+        if state is not None:
+            user = await UserDAO(session).find_indexed_by_telegram_id(telegram_id)
+            if user is not None:
+                return user
+
+        dao = UserSessionDAO(session)
+        record = await dao.find_one_or_none_with_user(session_id=session_id, telegram_id=telegram_id)
+        # Подписанный токен без сессии на реплике — скорее всего, отставание репликации
+        if (not record or not record.id) and read_from_primary(session):
+            record = await dao.find_one_or_none_with_user(session_id=session_id, telegram_id=telegram_id)
+        if not record:
             raise UserNotFoundException
 
-        user_session = await UserSessionDAO(session).find_one_or_none_by_id(data_id=session_id)
-        if (
-                not user_session
-                or not user_session.is_active
-                or user_session.user_id != user.id
-        ):
+        if not record.id or not record.is_active:
+            if record.id:
+                _remember_session_state(session_id, telegram_id, record.expires_at, is_active=False)
             raise ForbiddenException
 
-        return user
+        if _is_expired(record.expires_at):
+            raise SessionNotValidException
+
+        # Запись в общую таблицу берет файловую блокировку: не повторяем ее, если там уже то же самое
+        if state is None or state.expires_at != int(_as_utc(record.expires_at).timestamp()):
+            _remember_session_state(session_id, telegram_id, record.expires_at, is_active=True)
+        return record.User
 
 
 async def refresh_tokens(
@@ -86,48 +185,31 @@ async def refresh_tokens(
     if not refresh_token:
             raise TokenExpiredException
 
-    try:
-        payload = jwt.decode(refresh_token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-    except Exception:
-        raise NoJwtException
-
-    is_valid_payload = await validate_jwt_payload(payload=payload, token_type=TokenType.REFRESH_TOKEN)
-    if is_valid_payload:
+    payload = await decode_token(refresh_token, TokenType.REFRESH_TOKEN)
+    if payload:
         telegram_id = payload.get("sub")
         session_id = payload.get("sid")
 
-        user_session = await UserSessionDAO(session).find_one_or_none_by_id(session_id)
-        exp = user_session.expires_at
-        now = datetime.now(timezone.utc)
-
-        exp_ts = exp.timestamp()
-        new_ts = now.timestamp()
-
-        if (
-            not user_session
-            or not user_session.is_active
-            or exp_ts < new_ts
-            or user_session.user.telegram_id != int(telegram_id)
-        ):
-            raise SessionNotValidException
-
-        await UserSessionDAO(session).update(
-            filters=UserSessionUpdateFilterModel(
-                id=session_id,
-                is_active=True
-            ),
-            values=UserSessionUpdateModel(is_active=False),
-        )
-
         new_session_id = str(uuid.uuid4())
         user_agent = request.headers.get("User-Agent")
+        now = datetime.now(timezone.utc)
+        new_expires_at = now + timedelta(days=settings.REFRESH_EXPIRE_DAYS)
 
-        await create_session(
-            session_id=new_session_id,
+        # Проверка, деактивация старой сессии и создание новой — одна атомарная операция
+        rotated = await UserSessionDAO(session).rotate(
+            session_id=session_id,
+            telegram_id=int(telegram_id),
+            new_session_id=new_session_id,
             user_agent=user_agent,
-            user_id=user_session.user_id,
-            session=session
+            now=now,
+            expires_at=new_expires_at,
         )
+        if not rotated:
+            raise SessionNotValidException
+
+        token_cache.evict_session(session_id)
+        _remember_session_state(session_id, int(telegram_id), rotated.old_expires_at, is_active=False)
+        _remember_session_state(new_session_id, int(telegram_id), new_expires_at, is_active=True)
 
         # Всё прошло — генерим новую пару токенов
         new_access_token = await create_access_token(telegram_id, new_session_id)
@@ -146,24 +228,18 @@ async def logout(
     token: str,
     session: AsyncSession
 ):
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-    except Exception:
-        raise NoJwtException
-
-    is_valid_payload = await validate_jwt_payload(payload, TokenType.ACCESS_TOKEN)
+    payload = await decode_token(token, TokenType.ACCESS_TOKEN)
 
-    if is_valid_payload:
+    if payload:
         user_session_dao = UserSessionDAO(session=session)
-        user_dao = UserDAO(session=session)
 
         session_id = payload.get("sid")
-        telegram_id = payload.get("sub")
+        telegram_id = int(payload.get("sub"))
 
-        user = await user_dao.find_one_or_none_by_telegram_id(telegram_id=telegram_id)
-        user_session = await user_session_dao.find_one_or_none_by_id(data_id=session_id)
+        # Пользователь и его сессия одним запросом вместо двух отдельных
+        record = await user_session_dao.find_one_or_none_with_user(session_id=session_id, telegram_id=telegram_id)
 
-        if not user or not user_session or user_session.user_id != user.id:
+        if not record or not record.id:
             raise ForbiddenException
 
         await user_session_dao.update(
@@ -173,6 +249,8 @@ async def logout(
             ),
             values=UserSessionUpdateModel(is_active=False),
         )
+        token_cache.evict_session(session_id)
+        _remember_session_state(session_id, telegram_id, record.expires_at, is_active=False)
 
         if response:
             response.delete_cookie("access_token")
@@ -181,6 +259,44 @@ async def logout(
         return {"logout": True}
 
 
+def _as_utc(value: datetime) -> datetime:
+    # SQLite возвращает naive datetime, в базе время хранится в UTC
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _is_expired(expires_at: datetime) -> bool:
+    return _as_utc(expires_at) < datetime.now(timezone.utc)
+
+
+def _check_shared_session_state(session_id: str, telegram_id: int) -> SessionState | None:
+    """Активная сессия из общей таблицы или None при промахе; отозванная сразу дает ForbiddenException."""
+    table = get_session_table()
+    if table is None:
+        return None
+
+    state = table.lookup(session_id)
+    if state is None:
+        return None
+
+    if not state.is_active or state.telegram_id != telegram_id:
+        raise ForbiddenException
+    return state
+
+
+def _remember_session_state(session_id: str, telegram_id: int, expires_at: datetime, is_active: bool) -> None:
+    table = get_session_table()
+    if table is None:
+        return
+
+    expires_ts = _as_utc(expires_at).timestamp()
+    if is_active:
+        table.mark_active(session_id, telegram_id, expires_ts)
+    else:
+        table.mark_revoked(session_id, telegram_id, expires_ts)
+
+
 async def validate_jwt_payload(payload: dict, token_type: TokenType) -> bool:
     session_id = payload.get("sid")
     telegram_id = payload.get("sub")
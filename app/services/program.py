@@ -0,0 +1,165 @@
+import asyncio
+import hashlib
+import re
+from bisect import bisect_right
+
+from loguru import logger
+from pydantic import TypeAdapter
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.constants.enums import Age
+from app.core import settings
+from app.crud.user import ProgramDAO
+from app.db.routing import get_written_tables
+from app.db.session import async_session_maker
+from app.models.program import Program
+from app.schemas.program import ProgramModel
+
+AGE_RANGE_PATTERN = re.compile(r"(\d+)\s*-\s*(\d+)")
+
+_programs_adapter = TypeAdapter(list[ProgramModel])
+
+
+def age_range(age: Age) -> tuple[int, int]:
+    """Границы возрастной группы из значения enum, например "8 - 12 лет" -> (8, 12)."""
+    match = AGE_RANGE_PATTERN.search(age.value)
+    if not match:
+        raise ValueError(f"Не удалось разобрать возрастную группу: {age.value}")
+    return int(match.group(1)), int(match.group(2))
+
+
+class ProgramIndex:
+    """Интервальный индекс программ по возрасту.
+
+    Границы всех интервалов [min_age, max_age + 1) сортируются, между соседними границами
+    набор подходящих программ постоянен и вычисляется заранее. Поиск по возрасту — один bisect,
+    ответы для групп Age готовы при построении.
+    """
+
+    def __init__(self, programs: list[ProgramModel]):
+        self.programs = tuple(sorted(programs, key=lambda program: program.program_name))
+        self._boundaries = sorted(
+            {program.min_age for program in self.programs} | {program.max_age + 1 for program in self.programs}
+        )
+        # Отрезок i — возраст от boundaries[i] до boundaries[i + 1] не включительно
+        self._segments = [
+            tuple(program for program in self.programs if program.min_age <= start <= program.max_age)
+            for start in self._boundaries
+        ]
+        self._by_group = {age: self.find_by_range(*age_range(age)) for age in Age}
+
+    def find_by_age(self, age: int) -> tuple[ProgramModel, ...]:
+        index = bisect_right(self._boundaries, age) - 1
+        if index < 0:
+            return ()
+        return self._segments[index]
+
+    def find_by_range(self, min_age: int, max_age: int) -> tuple[ProgramModel, ...]:
+        """Программы, чей возрастной интервал пересекается с [min_age, max_age]."""
+        first = max(bisect_right(self._boundaries, min_age) - 1, 0)
+        last = bisect_right(self._boundaries, max_age)
+        found = {program.program_name for segment in self._segments[first:last] for program in segment}
+        return tuple(program for program in self.programs if program.program_name in found)
+
+    def find_by_group(self, age: Age) -> tuple[ProgramModel, ...]:
+        return self._by_group[age]
+
+
+class CatalogSnapshot:
+    """Каталог, заранее сериализованный в JSON, с хэшем содержимого в качестве ETag."""
+
+    def __init__(self, programs: tuple[ProgramModel, ...], version: int):
+        self.body = _programs_adapter.dump_json(list(programs))
+        self.etag = '"' + hashlib.blake2b(self.body, digest_size=16).hexdigest() + '"'
+        self.version = version
+
+    def matches(self, if_none_match: str | None) -> bool:
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        # Сравнение слабое: W/"..." совпадает с "..."
+        return any(tag.strip().removeprefix("W/") == self.etag for tag in if_none_match.split(","))
+
+
+class ProgramCatalog:
+    """Программы в памяти процесса. Чтения не обращаются к БД.
+
+    Индекс перестраивается после коммита, изменившего programs через DAO, и периодически,
+    чтобы подхватить изменения, сделанные другими воркерами.
+    """
+
+    def __init__(self, refresh_seconds: float):
+        self._refresh_seconds = refresh_seconds
+        self.index = ProgramIndex([])
+        self.snapshot = CatalogSnapshot((), version=0)
+        self.is_loaded = False
+        self._is_stale = False
+        self._reload_task: asyncio.Task | None = None
+        self._refresh_task: asyncio.Task | None = None
+
+    async def reload(self) -> None:
+        async with async_session_maker() as session:
+            records = await ProgramDAO(session).find_all()
+        # Индекс и снимок строятся целиком и подменяются без await между присваиваниями
+        index = ProgramIndex([ProgramModel.model_validate(record) for record in records])
+        snapshot = CatalogSnapshot(index.programs, version=self.snapshot.version)
+        if snapshot.etag != self.snapshot.etag or not self.is_loaded:
+            # Версия растет, только если содержимое каталога действительно изменилось
+            snapshot.version += 1
+        self.index = index
+        self.snapshot = snapshot
+        self.is_loaded = True
+        logger.info("Каталог программ загружен: {} программ, версия {}", len(index.programs), snapshot.version)
+
+    def reload_soon(self) -> None:
+        # Несколько коммитов подряд схлопываются в одну-две перезагрузки
+        self._is_stale = True
+        if self._reload_task is None or self._reload_task.done():
+            self._reload_task = asyncio.get_running_loop().create_task(self._reload_while_stale())
+
+    async def start(self) -> None:
+        try:
+            await self.reload()
+        except Exception as e:
+            logger.error("Ошибка загрузки каталога программ: {}", e)
+        if self._refresh_seconds > 0 and self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_forever(), name="program-catalog-refresh")
+
+    async def stop(self) -> None:
+        for task in (self._refresh_task, self._reload_task):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._refresh_task = None
+        self._reload_task = None
+
+    async def _reload_while_stale(self) -> None:
+        while self._is_stale:
+            self._is_stale = False
+            try:
+                await self.reload()
+            except Exception as e:
+                logger.error("Ошибка перезагрузки каталога программ: {}", e)
+                return
+
+    async def _refresh_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self._refresh_seconds)
+            try:
+                await self.reload()
+            except Exception as e:
+                logger.error("Ошибка обновления каталога программ: {}", e)
+
+
+program_catalog = ProgramCatalog(refresh_seconds=settings.PROGRAM_CATALOG_REFRESH_SECONDS)
+
+
+@event.listens_for(Session, "after_commit")
+def _reload_programs_after_commit(session: Session) -> None:
+    if Program.__tablename__ in get_written_tables(session):
+        program_catalog.reload_soon()
@@ -0,0 +1,106 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+
+from loguru import logger
+
+from app.core import settings
+from app.crud.user import UserSessionDAO
+from app.db.session import async_session_maker
+
+
+class SessionJanitor:
+    """Фоновая очистка user_sessions от истекших и неактивных сессий небольшими пачками."""
+
+    def __init__(self, batch_size: int, pause_seconds: float, interval_seconds: float, max_run_seconds: float):
+        self._batch_size = batch_size
+        self._pause_seconds = pause_seconds
+        self._interval_seconds = interval_seconds
+        self._max_run_seconds = max_run_seconds
+        self._task: asyncio.Task | None = None
+
+        self.rows_purged_total = 0
+        self.runs = 0
+        self.errors = 0
+        self.last_run_at: datetime | None = None
+        self.last_run_rows = 0
+        self.last_run_seconds = 0.0
+        self.lag_seconds = 0.0
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run_forever(), name="session-janitor")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def run_once(self) -> int:
+        started = time.monotonic()
+        deadline = started + self._max_run_seconds
+        now = datetime.now(timezone.utc)
+        purged = 0
+
+        # Каждая пачка в своей короткой транзакции; прогон ограничен по времени
+        while time.monotonic() < deadline:
+            async with async_session_maker() as session:
+                deleted = await UserSessionDAO(session).delete_expired_batch(now=now, limit=self._batch_size)
+                await session.commit()
+            purged += deleted
+            if deleted < self._batch_size:
+                break
+            await asyncio.sleep(self._pause_seconds)
+
+        async with async_session_maker() as session:
+            oldest_expires_at = await UserSessionDAO(session).find_oldest_expires_at(now=now)
+        if oldest_expires_at is None:
+            self.lag_seconds = 0.0
+        else:
+            if oldest_expires_at.tzinfo is None:
+                oldest_expires_at = oldest_expires_at.replace(tzinfo=timezone.utc)
+            self.lag_seconds = (now - oldest_expires_at).total_seconds()
+
+        self.runs += 1
+        self.rows_purged_total += purged
+        self.last_run_at = now
+        self.last_run_rows = purged
+        self.last_run_seconds = time.monotonic() - started
+        logger.info("Очистка сессий: удалено {}, отставание {:.0f} с", purged, self.lag_seconds)
+        return purged
+
+    def snapshot(self) -> dict:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "runs": self.runs,
+            "errors": self.errors,
+            "rows_purged_total": self.rows_purged_total,
+            "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None,
+            "last_run_rows": self.last_run_rows,
+            "last_run_seconds": round(self.last_run_seconds, 3),
+            "lag_seconds": round(self.lag_seconds, 3),
+        }
+
+    async def _run_forever(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errors += 1
+                logger.error("Ошибка очистки сессий: {}", e)
+            await asyncio.sleep(self._interval_seconds)
+
+
+session_janitor = SessionJanitor(
+    batch_size=settings.SESSION_JANITOR_BATCH_SIZE,
+    pause_seconds=settings.SESSION_JANITOR_PAUSE_SECONDS,
+    interval_seconds=settings.SESSION_JANITOR_INTERVAL_SECONDS,
+    max_run_seconds=settings.SESSION_JANITOR_MAX_RUN_SECONDS,
+)
@@ -1,10 +1,19 @@
+import csv
+import json
+from typing import AsyncIterator
+
 from fastapi import HTTPException
+from loguru import logger
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.crud.user import UserDAO
+from app.constants.enums import ImportStatus
+from app.core import settings
+from app.crud.user import UserDAO, UserSessionDAO
 from app.models.user import User
 from app.schemas.user import UserCreateModel, UserUpdateBodyModel, UserUpdateFilterModel,UserDeleteModel, \
-    UserUpdateModel
+    UserUpdateModel, UserImportRowModel, UserImportReportModel, UserModel
+from app.services.user_index import stage_user_changes
 
 
 async def get_user_by_telegram_id(telegram_id: int, session: AsyncSession) -> User:
@@ -16,32 +25,101 @@ async def get_user_by_telegram_id(telegram_id: int, session: AsyncSession) -> Us
 async def create_user(user: UserCreateModel, session: AsyncSession) -> User:
     dao = UserDAO(session)
     result = await dao.add(user)
+    stage_user_changes(session, upserted=[result])
     return result
 
 
 async def update_user(telegram_id: int, user: UserUpdateBodyModel, session: AsyncSession) -> UserUpdateModel:
     dao = UserDAO(session)
-    result = await dao.update(
+    records = await dao.update(
         filters=UserUpdateFilterModel(telegram_id=telegram_id),
         values=user
     )
-    if not result:
+    if not records:
         raise HTTPException(status_code=404, detail="Пользователь не найден!")
 
-    user = UserUpdateModel.model_validate(result)
-    user.is_updated = True
+    stage_user_changes(session, upserted=records)
 
-    return user
+    return UserUpdateModel(**UserModel.model_validate(records[0]).model_dump(), is_updated=True)
 
 
 async def delete_user(telegram_id: int, session: AsyncSession) -> UserDeleteModel:
-    dao = UserDAO(session)
-    result = await dao.delete(filters=UserUpdateFilterModel(telegram_id=telegram_id))
+    await UserSessionDAO(session).delete_by_telegram_id(telegram_id)
+    records = await UserDAO(session).delete(filters=UserUpdateFilterModel(telegram_id=telegram_id))
 
-    if not result:
+    if not records:
         raise HTTPException(status_code=404, detail="Пользователь не найден")
 
-    user = UserDeleteModel.model_validate(result)
-    user.is_deleted = True
+    stage_user_changes(session, deleted_telegram_ids=[telegram_id])
+
+    return UserDeleteModel(**UserModel.model_validate(records[0]).model_dump(), is_deleted=True)
+
+
+async def import_users(lines: AsyncIterator[str], is_csv: bool, session: AsyncSession) -> UserImportReportModel:
+    rows: list[UserImportRowModel] = []
+    chunk: list[tuple[int, UserCreateModel]] = []
+    seen_telegram_ids: set[int] = set()
+    csv_header: list[str] | None = None
+    line_number = 0
+
+    async for line in lines:
+        line_number += 1
+        if not line.strip():
+            continue
+
+        try:
+            if is_csv:
+                values = next(csv.reader([line]))
+                if csv_header is None:
+                    csv_header = [name.strip() for name in values]
+                    continue
+                user = UserCreateModel.model_validate(dict(zip(csv_header, values)))
+            else:
+                user = UserCreateModel.model_validate_json(line)
+        except (ValidationError, ValueError) as e:
+            rows.append(UserImportRowModel(line=line_number, status=ImportStatus.INVALID, detail=str(e)))
+            continue
+
+        if user.telegram_id in seen_telegram_ids:
+            rows.append(UserImportRowModel(line=line_number, telegram_id=user.telegram_id,
+                                           status=ImportStatus.DUPLICATE))
+            continue
+        seen_telegram_ids.add(user.telegram_id)
+
+        chunk.append((line_number, user))
+        if len(chunk) >= settings.USER_IMPORT_CHUNK_SIZE:
+            rows.extend(await _insert_user_chunk(session, chunk))
+            chunk = []
+
+    if chunk:
+        rows.extend(await _insert_user_chunk(session, chunk))
+
+    rows.sort(key=lambda row: row.line)
+    created = sum(1 for row in rows if row.status is ImportStatus.CREATED)
+    invalid = sum(1 for row in rows if row.status is ImportStatus.INVALID)
+    logger.info("Импорт пользователей завершен: строк {}, создано {}, с ошибками {}", len(rows), created, invalid)
+
+    return UserImportReportModel(
+        total=len(rows),
+        created=created,
+        skipped=len(rows) - created - invalid,
+        invalid=invalid,
+        rows=rows,
+    )
+
 
-    return user
+async def _insert_user_chunk(
+        session: AsyncSession,
+        chunk: list[tuple[int, UserCreateModel]],
+) -> list[UserImportRowModel]:
+    created_users = await UserDAO(session).add_many([user for _, user in chunk], conflict_columns=["telegram_id"])
+    stage_user_changes(session, upserted=created_users)
+    created_telegram_ids = {user.telegram_id for user in created_users}
+    return [
+        UserImportRowModel(
+            line=line_number,
+            telegram_id=user.telegram_id,
+            status=ImportStatus.CREATED if user.telegram_id in created_telegram_ids else ImportStatus.EXISTS,
+        )
+        for line_number, user in chunk
+    ]
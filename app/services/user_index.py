@@ -0,0 +1,149 @@
+import asyncio
+import time
+from typing import Iterable
+
+from loguru import logger
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, SessionTransaction
+
+from app.core import settings
+from app.crud.user import UserDAO, user_index
+from app.db.routing import READ_PRIMARY_KEY
+from app.db.session import read_session_maker
+from app.models.user import User
+from app.utils.session_table import get_user_change_table
+from app.utils.user_index import UserIndex
+
+USER_INDEX_CHANGES_KEY = "user_index_changes"
+# Без USER_INDEX_MAX_AGE_SECONDS индекс не устаревает, и отметка должна жить до перезагрузки воркера
+_UNBOUNDED_MARK_SECONDS = 365 * 24 * 3600
+
+
+def stage_user_changes(
+        session: AsyncSession,
+        upserted: Iterable[User] = (),
+        deleted_telegram_ids: Iterable[int] = (),
+) -> None:
+    """Запоминает изменения пользователей; в индекс они попадут только после коммита транзакции."""
+    if user_index is None:
+        return
+    changes = session.info.setdefault(USER_INDEX_CHANGES_KEY, [])
+    changes.extend((user.id, user.telegram_id, user.username, user.is_admin) for user in upserted)
+    changes.extend((None, telegram_id, None, None) for telegram_id in deleted_telegram_ids)
+
+
+class UserIndexLoader:
+    """Загрузка индекса пользователей при старте и периодическая перезагрузка.
+
+    Перезагрузка читает users одним потоковым запросом с основной БД и подменяет индекс целиком.
+    Изменения, закоммиченные за время чтения, повторно применяются к новому индексу. Каждое
+    закоммиченное изменение отмечается в общей таблице, чтобы остальные воркеры хоста читали
+    этого пользователя из базы, пока их индекс старше отметки.
+    """
+
+    def __init__(self, refresh_seconds: float, batch_size: int):
+        self._refresh_seconds = refresh_seconds
+        self._batch_size = batch_size
+        self._changes_during_reload: list[tuple] | None = None
+        self._refresh_task: asyncio.Task | None = None
+
+    async def reload(self) -> None:
+        self._changes_during_reload = []
+        try:
+            # Строки идут сразу в массивы, без промежуточного списка объектов
+            fresh = UserIndex()
+            # Версия — начало чтения: изменения после него другие воркеры отметят более поздним временем
+            fresh.version = _now_ms()
+            async with read_session_maker() as session:
+                # Реплика может отставать, а индекс с такой версией считался бы свежим
+                session.info[READ_PRIMARY_KEY] = True
+                async for telegram_id, user_id, is_admin, username in UserDAO(session).stream_index_rows(
+                        self._batch_size
+                ):
+                    fresh.append(telegram_id, user_id, is_admin, username)
+            fresh.is_loaded = True
+            for change in self._changes_during_reload:
+                _apply_change(fresh, change)
+            user_index.replace(fresh)
+        finally:
+            self._changes_during_reload = None
+        logger.info("Индекс пользователей загружен: {} записей, {} байт", len(user_index), user_index.memory_bytes())
+
+    def apply(self, changes: list[tuple]) -> None:
+        # Отметка пишется до изменения своего индекса: версия строки не меньше отметки
+        versioned = [(*change, _publish_change(change[1])) for change in changes]
+        for change in versioned:
+            _apply_change(user_index, change)
+        if self._changes_during_reload is not None:
+            self._changes_during_reload.extend(versioned)
+
+    async def start(self) -> None:
+        if user_index is None:
+            return
+        try:
+            await self.reload()
+        except Exception as e:
+            # Без индекса все поиски идут в БД
+            logger.error("Ошибка загрузки индекса пользователей: {}", e)
+        if self._refresh_seconds > 0 and self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_forever(), name="user-index-refresh")
+
+    async def stop(self) -> None:
+        if self._refresh_task is not None and not self._refresh_task.done():
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+        self._refresh_task = None
+
+    async def _refresh_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self._refresh_seconds)
+            try:
+                await self.reload()
+            except Exception as e:
+                logger.error("Ошибка обновления индекса пользователей: {}", e)
+
+
+def _apply_change(index: UserIndex, change: tuple) -> None:
+    user_id, telegram_id, username, is_admin, version = change
+    if user_id is None:
+        index.remove(telegram_id, version=version)
+    else:
+        index.upsert(user_id, telegram_id, username, is_admin, version=version)
+
+
+def _publish_change(telegram_id: int) -> int:
+    version = _now_ms()
+    table = get_user_change_table()
+    if table is not None:
+        # Отметка нужна, пока индексы других воркеров могут быть старше нее; дальше они устаревают сами
+        ttl = settings.USER_INDEX_MAX_AGE_SECONDS or _UNBOUNDED_MARK_SECONDS
+        table.mark_changed(telegram_id, version, time.time() + ttl)
+    return version
+
+
+def _now_ms() -> int:
+    return time.time_ns() // 1_000_000
+
+
+user_index_loader = UserIndexLoader(
+    refresh_seconds=settings.USER_INDEX_REFRESH_SECONDS,
+    batch_size=settings.USER_INDEX_BATCH_SIZE,
+)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_user_changes_after_commit(session: Session) -> None:
+    changes = session.info.pop(USER_INDEX_CHANGES_KEY, None)
+    if changes:
+        user_index_loader.apply(changes)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _drop_user_changes(session: Session, transaction: SessionTransaction) -> None:
+    # После отката изменения в индекс не попадают
+    if transaction.parent is None:
+        session.info.pop(USER_INDEX_CHANGES_KEY, None)
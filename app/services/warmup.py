@@ -0,0 +1,116 @@
+import asyncio
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Iterator
+
+from loguru import logger
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core import settings
+from app.crud.user import UserDAO, UserSessionDAO
+from app.db.session import async_session_maker, database, read_session_maker
+from app.schemas.user import UserModel, UserUpdateModel
+from app.utils.jwt_codec import get_jwt_codec
+from app.utils.serialization import get_adapter
+from app.utils.session_table import get_session_table
+
+# Ключи, которых заведомо нет в базе: запросы прогрева ничего не находят и не меняют
+WARMUP_TELEGRAM_ID = -1
+WARMUP_SESSION_ID = "00000000-0000-0000-0000-000000000000"
+
+
+class StartupReport:
+    """Время фаз старта приложения и готовность принимать трафик."""
+
+    def __init__(self):
+        self.phases: dict[str, float] = {}
+        self.is_ready = False
+        self._started = time.perf_counter()
+
+    def reset(self) -> None:
+        self.phases = {}
+        self.is_ready = False
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = time.perf_counter() - started
+
+    def mark_ready(self) -> None:
+        self.phases["total"] = time.perf_counter() - self._started
+        self.is_ready = True
+        logger.info(
+            "Приложение готово за {:.3f} с: {}",
+            self.phases["total"],
+            ", ".join(f"{name} {seconds:.3f} с" for name, seconds in self.phases.items() if name != "total"),
+        )
+
+    def snapshot(self) -> dict:
+        return {
+            "ready": self.is_ready,
+            "phases_seconds": {name: round(seconds, 6) for name, seconds in self.phases.items()},
+        }
+
+
+async def fill_pool(engine: AsyncEngine, size: int) -> None:
+    # Соединения открываются одновременно и сразу возвращаются в пул
+    connections = await asyncio.gather(*(engine.connect().start() for _ in range(size)))
+    await asyncio.gather(*(connection.close() for connection in connections))
+
+
+async def compile_hot_statements() -> None:
+    """Выполняет запросы входа, проверки токена и обновления сессии с несуществующими ключами.
+
+    Скомпилированные выражения попадают в кэш движка (и кэш подготовленных выражений asyncpg
+    на соединении), поэтому первые настоящие запросы не платят за компиляцию.
+    """
+    now = datetime.now(timezone.utc)
+    session_makers = [async_session_maker]
+    if database.replica is not None:
+        session_makers.append(read_session_maker)
+    for session_maker in session_makers:
+        async with session_maker() as session:
+            await UserDAO(session).find_one_or_none_by_telegram_id(WARMUP_TELEGRAM_ID)
+            await UserDAO(session).find_admin_or_none_by_telegram_id(WARMUP_TELEGRAM_ID)
+            await UserSessionDAO(session).find_one_or_none_with_user(
+                session_id=WARMUP_SESSION_ID, telegram_id=WARMUP_TELEGRAM_ID
+            )
+    async with async_session_maker() as session:
+        # UPDATE не находит сессию, INSERT не выполняется; транзакция все равно откатывается
+        await UserSessionDAO(session).rotate(
+            session_id=WARMUP_SESSION_ID,
+            telegram_id=WARMUP_TELEGRAM_ID,
+            new_session_id=str(uuid.uuid4()),
+            user_agent="warmup",
+            now=now,
+            expires_at=now,
+        )
+        await session.rollback()
+
+
+def prime_caches() -> None:
+    get_jwt_codec()
+    get_session_table()
+    for schema in (UserModel, UserUpdateModel):
+        get_adapter(schema)
+
+
+async def warm_up(report: StartupReport) -> None:
+    pool_size = min(settings.DB_WARMUP_CONNECTIONS, settings.DB_POOL_SIZE)
+    with report.phase("pool"):
+        await fill_pool(database.engine, pool_size)
+        if database.replica is not None:
+            await fill_pool(database.replica.engine, pool_size)
+    with report.phase("statements"):
+        await compile_hot_statements()
+    with report.phase("caches"):
+        prime_caches()
+
+
+startup_report = StartupReport()
@@ -76,3 +76,8 @@ ServerErrorException = HTTPException(
     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
     detail="Внутренняя ошибка сервера"
 )
+
+ProgramCatalogUnavailableException = HTTPException(
+    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+    detail="Каталог программ еще не загружен"
+)
@@ -0,0 +1,219 @@
+import base64
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+from functools import lru_cache
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+from cryptography.hazmat.primitives.asymmetric.utils import decode_dss_signature, encode_dss_signature
+from jose import ExpiredSignatureError, JWTError, jwk, jwt
+from loguru import logger
+
+from app.core import settings
+
+HMAC_ALGORITHMS = ("HS256", "HS384", "HS512")
+ASYMMETRIC_ALGORITHMS = ("ES256", "EdDSA")
+
+_ES256_COORDINATE_SIZE = 32
+
+
+class InvalidTokenError(Exception):
+    pass
+
+
+class ExpiredTokenError(InvalidTokenError):
+    pass
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+class JwtCodec(ABC):
+    """Кодирование и проверка подписи JWT. Проверку содержимого (iss, aud, type) делает вызывающий код."""
+
+    algorithm: str
+
+    @abstractmethod
+    def encode(self, payload: dict) -> str:
+        ...
+
+    @abstractmethod
+    def decode(self, token: str) -> dict:
+        ...
+
+    def jwks(self) -> dict:
+        """Публичные ключи в формате JWKS; у симметричного кодека их нет."""
+        return {"keys": []}
+
+
+class HmacJwtCodec(JwtCodec):
+    """HS256/384/512 через python-jose; ключ разбирается один раз при создании кодека."""
+
+    def __init__(self, secret: str, algorithm: str, audience: str, issuer: str):
+        self.algorithm = algorithm
+        self._key = jwk.construct(secret, algorithm)
+        self._audience = audience
+        self._issuer = issuer
+
+    def encode(self, payload: dict) -> str:
+        return jwt.encode(payload, self._key, algorithm=self.algorithm)
+
+    def decode(self, token: str) -> dict:
+        try:
+            return jwt.decode(
+                token, self._key, algorithms=[self.algorithm], audience=self._audience, issuer=self._issuer
+            )
+        except ExpiredSignatureError as e:
+            raise ExpiredTokenError(str(e))
+        except JWTError as e:
+            raise InvalidTokenError(str(e))
+
+
+class AsymmetricJwtCodec(JwtCodec):
+    """ES256 и EdDSA (Ed25519) на cryptography.
+
+    Подписывает активным ключом и пишет его kid в заголовок; проверяет любым ключом из набора,
+    поэтому при ротации старые токены остаются валидными, пока их ключ лежит в каталоге.
+    """
+
+    def __init__(self, algorithm: str, private_keys: dict, public_keys: dict, active_kid: str, leeway_seconds: int):
+        if algorithm not in ASYMMETRIC_ALGORITHMS:
+            raise ValueError(f"Алгоритм {algorithm} не поддерживается")
+        if active_kid not in private_keys:
+            raise ValueError(f"Нет закрытого ключа для активного kid {active_kid}")
+        self.algorithm = algorithm
+        self.active_kid = active_kid
+        self._signing_key = private_keys[active_kid]
+        self._public_keys = {kid: key.public_key() for kid, key in private_keys.items()} | public_keys
+        for kid, key in self._public_keys.items():
+            if algorithm == "ES256":
+                is_suitable = isinstance(key, ec.EllipticCurvePublicKey) and key.curve.name == "secp256r1"
+            else:
+                is_suitable = isinstance(key, ed25519.Ed25519PublicKey)
+            if not is_suitable:
+                raise ValueError(f"Ключ {kid} не подходит для {algorithm}")
+        self._leeway_seconds = leeway_seconds
+        header = {"alg": algorithm, "typ": "JWT", "kid": active_kid}
+        self._encoded_header = _b64encode(json.dumps(header, separators=(",", ":")).encode())
+        self._jwks = {"keys": [self._public_jwk(kid, key) for kid, key in self._public_keys.items()]}
+
+    def encode(self, payload: dict) -> str:
+        signing_input = f"{self._encoded_header}.{_b64encode(json.dumps(payload, separators=(',', ':')).encode())}"
+        return f"{signing_input}.{_b64encode(self._sign(signing_input.encode()))}"
+
+    def decode(self, token: str) -> dict:
+        try:
+            encoded_header, encoded_payload, encoded_signature = token.split(".")
+            header = json.loads(_b64decode(encoded_header))
+            signature = _b64decode(encoded_signature)
+        except ValueError as e:
+            raise InvalidTokenError(f"Некорректный формат токена: {e}")
+        # Заголовок приходит от клиента: любой другой JSON здесь — ошибка токена, а не сервера
+        if not isinstance(header, dict):
+            raise InvalidTokenError("Заголовок токена должен быть объектом")
+        if not isinstance(header.get("kid"), str):
+            raise InvalidTokenError("В заголовке токена нет строкового kid")
+
+        # Алгоритм задает сервер, а не заголовок токена
+        if header.get("alg") != self.algorithm:
+            raise InvalidTokenError(f"Неожиданный алгоритм {header.get('alg')}")
+        public_key = self._public_keys.get(header["kid"])
+        if public_key is None:
+            raise InvalidTokenError(f"Неизвестный kid {header.get('kid')}")
+        if not self._verify(public_key, f"{encoded_header}.{encoded_payload}".encode(), signature):
+            raise InvalidTokenError("Подпись не совпадает")
+
+        try:
+            payload = json.loads(_b64decode(encoded_payload))
+        except ValueError as e:
+            raise InvalidTokenError(f"Некорректное содержимое токена: {e}")
+        if not isinstance(payload, dict):
+            raise InvalidTokenError("Содержимое токена должно быть объектом")
+        exp = payload.get("exp")
+        if isinstance(exp, (int, float)) and exp + self._leeway_seconds < time.time():
+            raise ExpiredTokenError("Срок действия токена истек")
+        return payload
+
+    def jwks(self) -> dict:
+        return self._jwks
+
+    def _sign(self, data: bytes) -> bytes:
+        if self.algorithm == "EdDSA":
+            return self._signing_key.sign(data)
+        # JWS хранит подпись ES256 как r || s фиксированной длины, а не в DER
+        r, s = decode_dss_signature(self._signing_key.sign(data, ec.ECDSA(hashes.SHA256())))
+        return r.to_bytes(_ES256_COORDINATE_SIZE, "big") + s.to_bytes(_ES256_COORDINATE_SIZE, "big")
+
+    def _verify(self, public_key, data: bytes, signature: bytes) -> bool:
+        try:
+            if self.algorithm == "EdDSA":
+                public_key.verify(signature, data)
+            else:
+                if len(signature) != 2 * _ES256_COORDINATE_SIZE:
+                    return False
+                r = int.from_bytes(signature[:_ES256_COORDINATE_SIZE], "big")
+                s = int.from_bytes(signature[_ES256_COORDINATE_SIZE:], "big")
+                public_key.verify(encode_dss_signature(r, s), data, ec.ECDSA(hashes.SHA256()))
+            return True
+        except InvalidSignature:
+            return False
+
+    def _public_jwk(self, kid: str, public_key) -> dict:
+        if self.algorithm == "EdDSA":
+            raw = public_key.public_bytes(serialization.Encoding.Raw, serialization.PublicFormat.Raw)
+            return {"kty": "OKP", "crv": "Ed25519", "x": _b64encode(raw), "kid": kid, "use": "sig", "alg": "EdDSA"}
+        numbers = public_key.public_numbers()
+        return {
+            "kty": "EC",
+            "crv": "P-256",
+            "x": _b64encode(numbers.x.to_bytes(_ES256_COORDINATE_SIZE, "big")),
+            "y": _b64encode(numbers.y.to_bytes(_ES256_COORDINATE_SIZE, "big")),
+            "kid": kid,
+            "use": "sig",
+            "alg": "ES256",
+        }
+
+
+def load_keys(directory: str) -> tuple[dict, dict]:
+    """Закрытые ключи <kid>.pem и публичные <kid>.pub.pem (ключи, выведенные из подписи) из каталога."""
+    private_keys, public_keys = {}, {}
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        with open(path, "rb") as file:
+            data = file.read()
+        if name.endswith(".pub.pem"):
+            public_keys[name.removesuffix(".pub.pem")] = serialization.load_pem_public_key(data)
+        elif name.endswith(".pem"):
+            private_keys[name.removesuffix(".pem")] = serialization.load_pem_private_key(data, password=None)
+    return private_keys, public_keys
+
+
+@lru_cache(maxsize=1)
+def get_jwt_codec() -> JwtCodec:
+    algorithm = settings.ALGORITHM
+    if algorithm in HMAC_ALGORITHMS:
+        return HmacJwtCodec(
+            secret=settings.SECRET_KEY,
+            algorithm=algorithm,
+            audience=settings.JWT_AUDIENCE,
+            issuer=settings.JWT_ISSUER,
+        )
+    private_keys, public_keys = load_keys(settings.JWT_KEYS_DIR)
+    codec = AsymmetricJwtCodec(
+        algorithm=algorithm,
+        private_keys=private_keys,
+        public_keys=public_keys,
+        active_kid=settings.JWT_ACTIVE_KID,
+        leeway_seconds=settings.JWT_CLOCK_SKEW_SECONDS,
+    )
+    logger.info("JWT: {} с ключом {}, ключей для проверки: {}", algorithm, codec.active_kid, len(codec.jwks()["keys"]))
+    return codec
+
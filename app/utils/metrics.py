@@ -0,0 +1,244 @@
+import mmap
+import os
+import tempfile
+import time
+from bisect import bisect_left
+
+from app.core import settings
+from app.utils.query_accounting import count_queries
+
+# Границы корзин гистограммы задержек, секунды
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATUS_CLASSES = ("1xx", "2xx", "3xx", "4xx", "5xx")
+UNMATCHED_ROUTE = "<unmatched>"
+
+_MAGIC = 0x43554245_4D455452
+_LABEL_SIZE = 128
+# Заголовок файла: magic, pid, число занятых слотов, запросы в обработке
+_HEADER_FIELDS = 4
+_IN_FLIGHT = 3
+# Слот маршрута: count, сумма задержек и времени в БД (мкс), запросы к БД, классы статусов, корзины (+Inf последней)
+_COUNT = 0
+_SUM_US = 1
+_DB_SUM_US = 2
+_DB_QUERIES = 3
+_STATUS = 4
+_BUCKETS = _STATUS + len(STATUS_CLASSES)
+_SLOT_FIELDS = _BUCKETS + len(LATENCY_BUCKETS) + 1
+
+
+class MetricsFile:
+    """Счетчики одного процесса в mmap-файле: слоты выделены заранее, запись — сложение в memoryview.
+
+    Каждый воркер пишет в свой файл {pid}.metrics, /metrics суммирует все файлы каталога.
+    """
+
+    def __init__(self, path: str, max_routes: int, pid: int | None = None):
+        """pid задается только процессом-владельцем; без него файл лишь читается."""
+        self.path = path
+        self.max_routes = max_routes
+        self._labels_offset = _HEADER_FIELDS * 8
+        self._slots_offset = self._labels_offset + max_routes * _LABEL_SIZE
+        size = self._slots_offset + max_routes * _SLOT_FIELDS * 8
+
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            is_resized = os.fstat(fd).st_size != size
+            if is_resized:
+                if pid is None:
+                    raise ValueError(f"Файл метрик {path} другого формата")
+                os.ftruncate(fd, 0)
+                os.ftruncate(fd, size)
+            self._mmap = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+        self._header = memoryview(self._mmap)[:self._labels_offset].cast("q")
+        self._values = memoryview(self._mmap)[self._slots_offset:].cast("q")
+        if pid is not None:
+            if self._header[0] != _MAGIC:
+                self._header[2] = 0
+                self._header[0] = _MAGIC
+            self._header[1] = pid
+            self._header[_IN_FLIGHT] = 0
+        elif self._header[0] != _MAGIC:
+            raise ValueError(f"Файл метрик {path} другого формата")
+        self._slots: dict[str, int] = {label: index for index, label in enumerate(self.labels())}
+
+    def labels(self) -> list[str]:
+        labels = []
+        for index in range(self._header[2]):
+            start = self._labels_offset + index * _LABEL_SIZE
+            labels.append(self._mmap[start:start + _LABEL_SIZE].rstrip(b"\0").decode())
+        return labels
+
+    def slot(self, label: str) -> int:
+        index = self._slots.get(label)
+        if index is not None:
+            return index
+        index = self._header[2]
+        if index >= self.max_routes:
+            # Переполнение: все новые маршруты учитываются в последнем слоте
+            return self.max_routes - 1
+        encoded = label.encode()[:_LABEL_SIZE]
+        start = self._labels_offset + index * _LABEL_SIZE
+        self._mmap[start:start + len(encoded)] = encoded
+        self._header[2] = index + 1
+        self._slots[label] = index
+        return index
+
+    def add_in_flight(self, delta: int) -> None:
+        self._header[_IN_FLIGHT] += delta
+
+    def observe(self, label: str, status: int, seconds: float, db_seconds: float, db_queries: int) -> None:
+        base = self.slot(label) * _SLOT_FIELDS
+        values = self._values
+        values[base + _COUNT] += 1
+        values[base + _SUM_US] += int(seconds * 1_000_000)
+        values[base + _DB_SUM_US] += int(db_seconds * 1_000_000)
+        values[base + _DB_QUERIES] += db_queries
+        status_class = min(max(status // 100, 1), 5) - 1
+        values[base + _STATUS + status_class] += 1
+        values[base + _BUCKETS + bisect_left(LATENCY_BUCKETS, seconds)] += 1
+
+    def read(self) -> tuple[int, int, dict[str, list[int]]]:
+        slots = {}
+        for index, label in enumerate(self.labels()):
+            base = index * _SLOT_FIELDS
+            slots[label] = self._values[base:base + _SLOT_FIELDS].tolist()
+        return self._header[1], self._header[_IN_FLIGHT], slots
+
+
+class MetricsRegistry:
+    def __init__(self, directory: str, max_routes: int):
+        self.directory = directory
+        self.max_routes = max_routes
+        self._file: MetricsFile | None = None
+        self._pid = 0
+
+    @property
+    def file(self) -> MetricsFile:
+        pid = os.getpid()
+        # После fork воркер получает собственный файл
+        if self._pid != pid:
+            os.makedirs(self.directory, exist_ok=True)
+            self._file = MetricsFile(os.path.join(self.directory, f"{pid}.metrics"), self.max_routes, pid)
+            self._pid = pid
+        return self._file
+
+    def collect(self) -> tuple[int, dict[str, list[int]]]:
+        own_file = self.file
+        in_flight = 0
+        totals: dict[str, list[int]] = {}
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if not name.endswith(".metrics"):
+                continue
+            try:
+                metrics_file = own_file if path == own_file.path else MetricsFile(path, self.max_routes)
+                pid, file_in_flight, slots = metrics_file.read()
+            except (OSError, ValueError):
+                continue
+            # Счетчики завершившихся воркеров остаются, а их запросы в обработке — нет
+            if _is_alive(pid):
+                in_flight += file_in_flight
+            for label, values in slots.items():
+                current = totals.setdefault(label, [0] * _SLOT_FIELDS)
+                for i, value in enumerate(values):
+                    current[i] += value
+        return in_flight, totals
+
+    def render(self) -> str:
+        in_flight, totals = self.collect()
+        lines = [
+            "# HELP http_requests_in_flight Запросы в обработке",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {in_flight}",
+            "# HELP http_requests_total Обработанные запросы по маршруту и классу статуса",
+            "# TYPE http_requests_total counter",
+        ]
+        parsed = [(label.split(" ", 1), values) for label, values in sorted(totals.items())]
+        for (method, route), values in parsed:
+            for i, status_class in enumerate(STATUS_CLASSES):
+                if values[_STATUS + i]:
+                    lines.append(
+                        f'http_requests_total{{method="{method}",route="{route}",status="{status_class}"}} '
+                        f"{values[_STATUS + i]}"
+                    )
+        lines += [
+            "# HELP http_request_duration_seconds Время обработки запроса",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (method, route), values in parsed:
+            labels = f'method="{method}",route="{route}"'
+            cumulative = 0
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                cumulative += values[_BUCKETS + i]
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {values[_COUNT]}')
+            lines.append(f"http_request_duration_seconds_sum{{{labels}}} {values[_SUM_US] / 1_000_000}")
+            lines.append(f"http_request_duration_seconds_count{{{labels}}} {values[_COUNT]}")
+        lines += [
+            "# HELP http_request_db_seconds_total Время внутри SQLAlchemy по маршруту",
+            "# TYPE http_request_db_seconds_total counter",
+        ]
+        for (method, route), values in parsed:
+            lines.append(
+                f'http_request_db_seconds_total{{method="{method}",route="{route}"}} {values[_DB_SUM_US] / 1_000_000}'
+            )
+        lines += [
+            "# HELP http_request_db_queries_total Запросы к БД по маршруту",
+            "# TYPE http_request_db_queries_total counter",
+        ]
+        for (method, route), values in parsed:
+            lines.append(f'http_request_db_queries_total{{method="{method}",route="{route}"}} {values[_DB_QUERIES]}')
+        return "\n".join(lines) + "\n"
+
+
+def _is_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class MetricsMiddleware:
+    """ASGI-middleware: задержка, статус и время в БД каждого HTTP-запроса по шаблону маршрута."""
+
+    def __init__(self, app, registry: MetricsRegistry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metrics_file = self.registry.file
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        metrics_file.add_in_flight(1)
+        start = time.perf_counter()
+        try:
+            with count_queries() as stats:
+                await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            metrics_file.add_in_flight(-1)
+            route = scope.get("route")
+            label = f"{scope['method']} {getattr(route, 'path', UNMATCHED_ROUTE)}"
+            metrics_file.observe(label, status, elapsed, stats.seconds, stats.count)
+
+
+metrics_registry = MetricsRegistry(
+    directory=settings.METRICS_DIR or os.path.join(tempfile.gettempdir(), "cube_bot_metrics"),
+    max_routes=settings.METRICS_MAX_ROUTES,
+)
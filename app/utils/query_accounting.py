@@ -0,0 +1,130 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, TypeVar
+
+from loguru import logger
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core import settings
+
+F = TypeVar("F", bound=Callable)
+
+QUERY_COUNT_HEADER = "X-Query-Count"
+QUERY_BUDGET_ATTRIBUTE = "__query_budget__"
+
+
+class QueryBudgetExceeded(Exception):
+    """Роут выполнил больше запросов к БД, чем объявлено в query_budget (при QUERY_BUDGET_STRICT)."""
+
+
+class QueryStats:
+    """Запросы к БД в пределах одного HTTP-запроса или блока count_queries()."""
+
+    def __init__(self, parent: "QueryStats | None" = None):
+        self.parent = parent
+        self.count = 0
+        self.seconds = 0.0
+        self.statements: dict[str, int] = {}
+
+    def record(self, statement: str, seconds: float) -> None:
+        stats = self
+        # Вложенные блоки учитываются и во внешних: тест внутри запроса не сбивает метрики запроса
+        while stats is not None:
+            stats.count += 1
+            stats.seconds += seconds
+            stats.statements[statement] = stats.statements.get(statement, 0) + 1
+            stats = stats.parent
+
+    def repeated(self, threshold: int = 2) -> dict[str, int]:
+        """Одинаковые запросы, выполненные threshold и более раз, — признак N+1."""
+        return {statement: count for statement, count in self.statements.items() if count >= threshold}
+
+
+_current_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryStats]:
+    """Считает запросы внутри блока:
+
+        with count_queries() as stats:
+            await dao.find_one_or_none_by_telegram_id(telegram_id)
+        assert stats.count == 1
+    """
+    stats = QueryStats(parent=_current_stats.get())
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+def query_budget(max_queries: int) -> Callable[[F], F]:
+    """Объявляет бюджет запросов к БД для роута, считая запросы его зависимостей.
+
+    Функция не оборачивается, FastAPI видит исходную сигнатуру.
+    """
+    def decorator(endpoint: F) -> F:
+        setattr(endpoint, QUERY_BUDGET_ATTRIBUTE, max_queries)
+        return endpoint
+    return decorator
+
+
+def get_query_budget(endpoint: Callable) -> int | None:
+    return getattr(endpoint, QUERY_BUDGET_ATTRIBUTE, None)
+
+
+class QueryAccountingMiddleware:
+    """ASGI-middleware: считает запросы и время в БД на HTTP-запрос.
+
+    Повторы одинаковых запросов и превышение бюджета роута пишутся в лог,
+    в режиме development число запросов отдается в заголовке X-Query-Count.
+    При QUERY_BUDGET_STRICT превышение бюджета поднимает QueryBudgetExceeded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.is_header_enabled = settings.MODE == "development"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with count_queries() as stats:
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start" and self.is_header_enabled:
+                    headers = list(message.get("headers", []))
+                    headers.append((QUERY_COUNT_HEADER.lower().encode(), str(stats.count).encode()))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
+
+        route = scope.get("route")
+        if route is None:
+            return
+        for statement, count in stats.repeated(settings.QUERY_REPEAT_THRESHOLD).items():
+            logger.warning("{} {}: запрос выполнен {} раз: {}", scope["method"], route.path, count, statement)
+        budget = get_query_budget(getattr(route, "endpoint", None))
+        if budget is not None and stats.count > budget:
+            logger.warning("{} {}: {} запросов к БД при бюджете {}", scope["method"], route.path, stats.count, budget)
+            # Настройка читается при каждом запросе, чтобы тесты могли включать ее через monkeypatch
+            if settings.QUERY_BUDGET_STRICT:
+                raise QueryBudgetExceeded(
+                    f"{scope['method']} {route.path}: {stats.count} запросов к БД при бюджете {budget}"
+                )
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context.query_accounting_start = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(statement, time.perf_counter() - context.query_accounting_start)
@@ -0,0 +1,65 @@
+import math
+import time
+from collections import OrderedDict
+from typing import Hashable
+
+
+class TokenBucketTable:
+    """Таблица token bucket в памяти процесса.
+
+    Ключи распределены по шардам, каждый шард — OrderedDict с вытеснением давно не обращавшихся
+    ключей, поэтому память ограничена max_keys, а проверка стоит O(1). Ведро хранится как пара
+    (токены, время пополнения) и пополняется лениво при обращении.
+    """
+
+    def __init__(self, rate_per_second: float, burst: int, max_keys: int, shards: int = 16):
+        self._rate = rate_per_second
+        self._burst = float(burst)
+        self._shards: list[OrderedDict[Hashable, tuple[float, float]]] = [OrderedDict() for _ in range(shards)]
+        self._max_keys_per_shard = max(max_keys // shards, 1)
+        self.allowed = 0
+        self.limited = 0
+
+    def acquire(self, key: Hashable) -> float:
+        """Забирает токен. Возвращает 0, если запрос разрешен, иначе сколько секунд ждать."""
+        shard = self._shards[hash(key) % len(self._shards)]
+        now = time.monotonic()
+        entry = shard.get(key)
+        if entry is None:
+            tokens = self._burst
+        else:
+            tokens, updated_at = entry
+            tokens = min(self._burst, tokens + (now - updated_at) * self._rate)
+            shard.move_to_end(key)
+
+        if tokens >= 1.0:
+            shard[key] = (tokens - 1.0, now)
+            if len(shard) > self._max_keys_per_shard:
+                shard.popitem(last=False)
+            self.allowed += 1
+            return 0.0
+
+        shard[key] = (tokens, now)
+        self.limited += 1
+        return (1.0 - tokens) / self._rate
+
+    def refund(self, key: Hashable) -> None:
+        """Возвращает токен, взятый acquire, если запрос все же отклонен другим лимитом."""
+        shard = self._shards[hash(key) % len(self._shards)]
+        entry = shard.get(key)
+        if entry is None:
+            return
+        tokens, updated_at = entry
+        shard[key] = (min(self._burst, tokens + 1.0), updated_at)
+        self.allowed -= 1
+
+    def stats(self) -> dict:
+        return {
+            "keys": sum(len(shard) for shard in self._shards),
+            "allowed": self.allowed,
+            "limited": self.limited,
+        }
+
+
+def retry_after_header(seconds: float) -> dict[str, str]:
+    return {"Retry-After": str(max(math.ceil(seconds), 1))}
@@ -1,7 +1,6 @@
 import uuid
 from datetime import datetime, timedelta, timezone
 
-from jose import jwt
 from loguru import logger
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.requests import Request
@@ -11,12 +10,13 @@ from app.constants.enums import TokenType
 from app.models.user import User
 from app.core import settings
 from app.crud.user import UserSessionDAO
-from app.schemas.user import UserSessionCreateModel, UserSessionFilterModel
+from app.schemas.user import UserSessionCreateModel
+from app.utils.jwt_codec import get_jwt_codec
 
 
 def create_jwt_token(telegram_id: int, session_id: str, expires_delta: timedelta, token_type: TokenType) -> str:
     expire = datetime.now(tz=timezone.utc) + expires_delta
-    logger.info(f"Token type: {token_type.value}")
+    logger.debug("Token type: {}", token_type.value)
     payload = {
         "sub": str(telegram_id),
         "sid": session_id,
@@ -26,7 +26,7 @@ def create_jwt_token(telegram_id: int, session_id: str, expires_delta: timedelta
         "iat": int(datetime.now().timestamp()),
         "type": token_type.value
     }
-    return jwt.encode(payload, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    return get_jwt_codec().encode(payload)
 
 
 async def create_access_token(telegram_id: int, session_id: str) -> str:
@@ -49,16 +49,8 @@ async def create_refresh_token(telegram_id: int, session_id: str) -> str:
 
 async def issue_tokens(user: User, request: Request, response: Response, session: AsyncSession):
     user_agent = request.headers.get("User-Agent")
-    existing_session = await UserSessionDAO(session=session).find_one_or_none(
-        filters=UserSessionFilterModel(
-            user_id=user.id,
-            user_agent=user_agent,
-            is_active=True
-        )
-    )
-    if existing_session:
-        session_id = existing_session.id
-    else:
+    session_id = await UserSessionDAO(session=session).find_active_session_id(user_id=user.id, user_agent=user_agent)
+    if session_id is None:
         session_id = str(uuid.uuid4())
         await create_session(
             session_id,
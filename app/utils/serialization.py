@@ -0,0 +1,31 @@
+from functools import lru_cache
+from typing import Any
+
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+
+JSON_MEDIA_TYPE = "application/json"
+
+
+@lru_cache(maxsize=None)
+def get_adapter(schema: Any) -> TypeAdapter:
+    """TypeAdapter строится один раз на схему: валидатор и сериализатор компилируются заранее."""
+    return TypeAdapter(schema)
+
+
+def serialize(schema: Any, data: Any) -> bytes:
+    # Из ORM-объекта сразу в байты: одна валидация по атрибутам и JSON-кодировщик pydantic-core
+    adapter = get_adapter(schema)
+    return adapter.dump_json(adapter.validate_python(data, from_attributes=True))
+
+
+def model_response(schema: Any, data: Any, response: Response | None = None, status_code: int = 200) -> Response:
+    """Готовый JSON-ответ, который FastAPI отдает без повторной валидации через response_model.
+
+    Роут оставляет response_model в декораторе ради схемы OpenAPI. Заголовки и cookie,
+    выставленные на внедренном Response, переносятся в ответ.
+    """
+    result = Response(content=serialize(schema, data), media_type=JSON_MEDIA_TYPE, status_code=status_code)
+    if response is not None:
+        result.headers.raw.extend(response.headers.raw)
+    return result
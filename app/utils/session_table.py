@@ -0,0 +1,242 @@
+import fcntl
+import hashlib
+import os
+import struct
+import tempfile
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from multiprocessing import resource_tracker, shared_memory
+
+from loguru import logger
+
+from app.core import settings
+
+# Заголовок: magic, capacity, generation, writes
+_HEADER = struct.Struct("<QQQQ")
+# Слот: seq (нечетный во время записи), state, дайджест ключа, значение, expires_at
+_SLOT = struct.Struct("<IB3x16sqq")
+_SEQ = struct.Struct("<I")
+
+_PROBE_LIMIT = 8
+
+_EMPTY = 0
+_ACTIVE = 1
+_REVOKED = 2
+_CHANGED = 3
+
+
+@dataclass(frozen=True, slots=True)
+class SessionState:
+    is_active: bool
+    telegram_id: int
+    expires_at: int
+
+
+class SharedHashTable:
+    """Общая для всех воркеров хоста хеш-таблица в shared memory: ключ -> (состояние, число, срок).
+
+    Чтение идет без блокировок (seqlock на слот), запись — под flock, поэтому
+    промах или конкурентная запись просто означают поход в базу.
+    """
+
+    # Отличает раскладку и назначение сегмента: чужой сегмент с тем же именем пересоздается
+    _MAGIC = 0
+
+    def __init__(self, name: str, capacity: int):
+        self._name = name
+        self._capacity = capacity
+        self._size = _HEADER.size + capacity * _SLOT.size
+        self._lock_path = os.path.join(tempfile.gettempdir(), f"{name}.lock")
+        self._shm: shared_memory.SharedMemory | None = None
+        self._generation = 0
+        self._attach()
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    @property
+    def writes(self) -> int:
+        return _HEADER.unpack_from(self._shm.buf, 0)[3]
+
+    def is_stale(self) -> bool:
+        # Таблицу пересоздал другой воркер — наш отображенный сегмент больше не актуален
+        magic, _, generation, _ = _HEADER.unpack_from(self._shm.buf, 0)
+        return magic != self._MAGIC or generation != self._generation
+
+    def reset(self) -> None:
+        with self._locked():
+            self._shm.buf[_HEADER.size:self._size] = bytes(self._size - _HEADER.size)
+            self._generation += 1
+            _HEADER.pack_into(self._shm.buf, 0, self._MAGIC, self._capacity, self._generation, 0)
+        logger.info("Таблица {} очищена, поколение {}", self._name, self._generation)
+
+    def stats(self) -> dict:
+        return {"capacity": self._capacity, "generation": self._generation, "writes": self.writes}
+
+    def _read(self, name: str) -> tuple[int, int, int] | None:
+        """Состояние, значение и срок действующей записи; None — промах."""
+        if self.is_stale():
+            self._attach()
+            return None
+
+        key = self._digest(name)
+        buf = self._shm.buf
+        now = int(time.time())
+        for offset in self._probe(key):
+            seq, state, slot_key, value, expires_at = _SLOT.unpack_from(buf, offset)
+            if seq & 1 or _SEQ.unpack_from(buf, offset)[0] != seq:
+                return None
+            if state == _EMPTY:
+                return None
+            if slot_key == key:
+                if expires_at <= now:
+                    return None
+                return state, value, expires_at
+        return None
+
+    def _write(self, name: str, value: int, expires_at: int, state: int) -> None:
+        key = self._digest(name)
+        with self._locked():
+            if self.is_stale():
+                self._attach()
+            buf = self._shm.buf
+            offset = self._slot_for_write(key)
+            seq = _SEQ.unpack_from(buf, offset)[0]
+            _SEQ.pack_into(buf, offset, (seq + 1) & 0xFFFFFFFF)
+            _SLOT.pack_into(buf, offset, (seq + 1) & 0xFFFFFFFF, state, key, value, expires_at)
+            _SEQ.pack_into(buf, offset, (seq + 2) & 0xFFFFFFFF)
+            magic, capacity, generation, writes = _HEADER.unpack_from(buf, 0)
+            _HEADER.pack_into(buf, 0, magic, capacity, generation, writes + 1)
+
+    def _slot_for_write(self, key: bytes) -> int:
+        buf = self._shm.buf
+        # Сначала ищем сам ключ по всей цепочке: если записать его в более ранний свободный слот,
+        # старая копия дальше по цепочке всплывет, когда новую вытеснят
+        for offset in self._probe(key):
+            _, state, slot_key, _, _ = _SLOT.unpack_from(buf, offset)
+            if state != _EMPTY and slot_key == key:
+                return offset
+
+        now = int(time.time())
+        victim, victim_expires_at = None, None
+        for offset in self._probe(key):
+            _, state, _, _, expires_at = _SLOT.unpack_from(buf, offset)
+            if state == _EMPTY or expires_at <= now:
+                return offset
+            if victim is None or expires_at < victim_expires_at:
+                victim, victim_expires_at = offset, expires_at
+        # Цепочка заполнена — вытесняем запись, которая истекает раньше остальных
+        return victim
+
+    def _probe(self, key: bytes):
+        start = int.from_bytes(key[:8], "little") % self._capacity
+        for i in range(min(_PROBE_LIMIT, self._capacity)):
+            yield _HEADER.size + ((start + i) % self._capacity) * _SLOT.size
+
+    def _attach(self) -> None:
+        with self._locked():
+            try:
+                shm = shared_memory.SharedMemory(name=self._name)
+            except FileNotFoundError:
+                shm = self._create()
+            else:
+                magic, capacity, generation, _ = _HEADER.unpack_from(shm.buf, 0)
+                if magic != self._MAGIC or capacity != self._capacity or shm.size < self._size:
+                    # Сегмент другой раскладки: помечаем его устаревшим и создаем новый
+                    _HEADER.pack_into(shm.buf, 0, 0, capacity, generation + 1, 0)
+                    shm.close()
+                    shm.unlink()
+                    shm = self._create(generation=generation + 1)
+            # Сегмент живет дольше воркера, resource_tracker не должен удалять его при выходе
+            resource_tracker.unregister(shm._name, "shared_memory")
+
+            if self._shm is not None:
+                self._shm.close()
+            self._shm = shm
+            self._generation = _HEADER.unpack_from(shm.buf, 0)[2]
+        logger.info("Подключена таблица {}, поколение {}", self._name, self._generation)
+
+    def _create(self, generation: int = 0) -> shared_memory.SharedMemory:
+        shm = shared_memory.SharedMemory(name=self._name, create=True, size=self._size)
+        shm.buf[:self._size] = bytes(self._size)
+        _HEADER.pack_into(shm.buf, 0, self._MAGIC, self._capacity, generation, 0)
+        return shm
+
+    @contextmanager
+    def _locked(self):
+        fd = os.open(self._lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+    @staticmethod
+    def _digest(name: str) -> bytes:
+        return hashlib.blake2b(name.encode(), digest_size=16).digest()
+
+
+class SessionStateTable(SharedHashTable):
+    """Состояния сессий: по session_id — активна ли сессия, ее владелец и срок действия."""
+
+    _MAGIC = 0x43554245534E5331
+
+    def lookup(self, session_id: str) -> SessionState | None:
+        found = self._read(session_id)
+        if found is None:
+            return None
+        state, telegram_id, expires_at = found
+        return SessionState(is_active=state == _ACTIVE, telegram_id=telegram_id, expires_at=expires_at)
+
+    def mark_active(self, session_id: str, telegram_id: int, expires_at: float) -> None:
+        self._write(session_id, telegram_id, int(expires_at), _ACTIVE)
+
+    def mark_revoked(self, session_id: str, telegram_id: int, expires_at: float) -> None:
+        self._write(session_id, telegram_id, int(expires_at), _REVOKED)
+
+
+class UserChangeTable(SharedHashTable):
+    """Отметки об изменениях пользователей: по Telegram ID — время последнего изменения в миллисекундах.
+
+    Индекс пользователей воркера не отвечает за пользователя, чья отметка новее версии его записи.
+    """
+
+    _MAGIC = 0x4355424555534331
+
+    def changed_at(self, telegram_id: int) -> int | None:
+        found = self._read(str(telegram_id))
+        if found is None:
+            return None
+        _, changed_at_ms, _ = found
+        return changed_at_ms
+
+    def mark_changed(self, telegram_id: int, changed_at_ms: int, expires_at: float) -> None:
+        self._write(str(telegram_id), changed_at_ms, int(expires_at), _CHANGED)
+
+
+_tables: dict[str, SharedHashTable | None] = {}
+
+
+def get_session_table() -> SessionStateTable | None:
+    return _get_table(settings.SESSION_TABLE_NAME, SessionStateTable)
+
+
+def get_user_change_table() -> UserChangeTable | None:
+    # Отдельный сегмент, чтобы отметки не вытесняли состояния сессий
+    return _get_table(f"{settings.SESSION_TABLE_NAME}_users", UserChangeTable)
+
+
+def _get_table(name: str, table_class: type[SharedHashTable]) -> SharedHashTable | None:
+    if not settings.SESSION_TABLE_ENABLED:
+        return None
+    # None в словаре — таблицу уже не удалось создать, повторно не пытаемся
+    if name not in _tables:
+        try:
+            _tables[name] = table_class(name=name, capacity=settings.SESSION_TABLE_SLOTS)
+        except OSError as e:
+            _tables[name] = None
+            logger.warning("Таблица {} в shared memory недоступна, проверка идет через базу: {}", name, e)
+    return _tables[name]
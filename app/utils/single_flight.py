@@ -0,0 +1,52 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+# Ведущий запрос отменен (например, клиент отключился): ожидающие выполняют чтение сами
+_RETRY = object()
+
+
+class SingleFlight:
+    """Склейка одинаковых одновременных чтений.
+
+    Пока чтение по ключу выполняется, остальные вызовы с тем же ключом ждут его результат,
+    а не идут в БД сами. Результат ничего не кэширует: следующий вызов после завершения
+    снова выполнит чтение.
+    """
+
+    def __init__(self):
+        self._in_flight: dict[Hashable, asyncio.Future] = {}
+        self.queries = 0
+        self.saved = 0
+
+    async def run(self, key: Hashable, load: Callable[[], Awaitable[Any]]) -> tuple[Any, bool]:
+        """Возвращает (результат, получен ли он от другого вызова)."""
+        while (future := self._in_flight.get(key)) is not None:
+            # shield: отмена ожидающего не должна отменять общее чтение
+            outcome = await asyncio.shield(future)
+            if outcome is _RETRY:
+                continue
+            self.saved += 1
+            is_ok, value = outcome
+            if not is_ok:
+                raise value
+            return value, True
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        self.queries += 1
+        try:
+            value = await load()
+        except Exception as e:
+            future.set_result((False, e))
+            raise
+        except BaseException:
+            future.set_result(_RETRY)
+            raise
+        else:
+            future.set_result((True, value))
+            return value, False
+        finally:
+            del self._in_flight[key]
+
+    def stats(self) -> dict:
+        return {"in_flight": len(self._in_flight), "queries": self.queries, "saved": self.saved}
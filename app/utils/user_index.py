@@ -0,0 +1,182 @@
+import sys
+from array import array
+from bisect import bisect_left
+from typing import Iterable, NamedTuple
+
+_ADMIN_FLAG = 1
+# Длина имени хранится в array("H")
+_MAX_USERNAME_BYTES = 0xFFFF
+
+
+class IndexedUser(NamedTuple):
+    id: int
+    telegram_id: int
+    username: str
+    is_admin: bool
+
+
+class UserIndex:
+    """Компактный индекс пользователей по Telegram ID.
+
+    Колонки — массивы, отсортированные по telegram_id: telegram_id и id (по 8 байт), флаги (1 байт),
+    смещение и длина имени в общем буфере UTF-8 (4 + 2 байта). Отдельных Python-объектов на строку
+    нет, поиск — bisect. Измененные имена дописываются в конец буфера, старые байты считаются
+    мусором и убираются, когда мусора становится больше половины буфера.
+
+    Версия — время в миллисекундах, на которое данные актуальны: у индекса это начало загрузки,
+    у строки, измененной после загрузки, — время ее изменения.
+    """
+
+    def __init__(self):
+        self._telegram_ids = array("q")
+        self._user_ids = array("q")
+        self._flags = bytearray()
+        self._name_offsets = array("I")
+        self._name_lengths = array("H")
+        self._names = bytearray()
+        self._garbage_bytes = 0
+        self._row_versions: dict[int, int] = {}
+        self.is_loaded = False
+        self.version = 0
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[tuple[int, int, bool, str]]) -> "UserIndex":
+        """Строит индекс из строк (telegram_id, id, is_admin, username), отсортированных по telegram_id."""
+        index = cls()
+        for telegram_id, user_id, is_admin, username in rows:
+            index.append(telegram_id, user_id, is_admin, username)
+        index.is_loaded = True
+        return index
+
+    def append(self, telegram_id: int, user_id: int, is_admin: bool, username: str) -> None:
+        """Добавляет строку в конец при построении; telegram_id должны идти по возрастанию."""
+        if self._telegram_ids and telegram_id <= self._telegram_ids[-1]:
+            raise ValueError("Строки индекса должны быть отсортированы по telegram_id без повторов")
+        name = _encode_username(username)
+        self._telegram_ids.append(telegram_id)
+        self._user_ids.append(user_id)
+        self._flags.append(_ADMIN_FLAG if is_admin else 0)
+        self._name_offsets.append(len(self._names))
+        self._name_lengths.append(len(name))
+        self._names += name
+
+    def __len__(self) -> int:
+        return len(self._telegram_ids)
+
+    def get(self, telegram_id: int) -> IndexedUser | None:
+        position = self._position(telegram_id)
+        if position is None:
+            return None
+        return IndexedUser(
+            id=self._user_ids[position],
+            telegram_id=telegram_id,
+            username=self._username(position),
+            is_admin=bool(self._flags[position] & _ADMIN_FLAG),
+        )
+
+    def is_admin(self, telegram_id: int) -> bool | None:
+        """None, если пользователя нет в индексе."""
+        position = self._position(telegram_id)
+        if position is None:
+            return None
+        return bool(self._flags[position] & _ADMIN_FLAG)
+
+    def version_of(self, telegram_id: int) -> int:
+        return self._row_versions.get(telegram_id, self.version)
+
+    def upsert(self, user_id: int, telegram_id: int, username: str, is_admin: bool, version: int | None = None) -> None:
+        if version is not None:
+            self._row_versions[telegram_id] = version
+        name = _encode_username(username)
+        position = bisect_left(self._telegram_ids, telegram_id)
+        flags = _ADMIN_FLAG if is_admin else 0
+        if position < len(self._telegram_ids) and self._telegram_ids[position] == telegram_id:
+            self._user_ids[position] = user_id
+            self._flags[position] = flags
+            if self._username_bytes(position) != name:
+                self._garbage_bytes += self._name_lengths[position]
+                self._name_offsets[position] = len(self._names)
+                self._name_lengths[position] = len(name)
+                self._names += name
+                self._compact_if_needed()
+            return
+        self._telegram_ids.insert(position, telegram_id)
+        self._user_ids.insert(position, user_id)
+        self._flags.insert(position, flags)
+        self._name_offsets.insert(position, len(self._names))
+        self._name_lengths.insert(position, len(name))
+        self._names += name
+
+    def remove(self, telegram_id: int, version: int | None = None) -> bool:
+        if version is not None:
+            self._row_versions[telegram_id] = version
+        position = self._position(telegram_id)
+        if position is None:
+            return False
+        self._garbage_bytes += self._name_lengths[position]
+        del self._telegram_ids[position]
+        del self._user_ids[position]
+        del self._flags[position]
+        del self._name_offsets[position]
+        del self._name_lengths[position]
+        self._compact_if_needed()
+        return True
+
+    def replace(self, other: "UserIndex") -> None:
+        """Подменяет содержимое индекса целиком, без await: читатели видят либо старое, либо новое."""
+        self._telegram_ids = other._telegram_ids
+        self._user_ids = other._user_ids
+        self._flags = other._flags
+        self._name_offsets = other._name_offsets
+        self._name_lengths = other._name_lengths
+        self._names = other._names
+        self._garbage_bytes = other._garbage_bytes
+        self._row_versions = other._row_versions
+        self.is_loaded = other.is_loaded
+        self.version = other.version
+
+    def memory_bytes(self) -> int:
+        buffers = (self._telegram_ids, self._user_ids, self._flags, self._name_offsets, self._name_lengths, self._names)
+        return sum(sys.getsizeof(buffer) for buffer in buffers)
+
+    def stats(self) -> dict:
+        return {
+            "loaded": self.is_loaded,
+            "version": self.version,
+            "users": len(self),
+            "changed_users": len(self._row_versions),
+            "memory_bytes": self.memory_bytes(),
+            "names_bytes": len(self._names),
+            "garbage_bytes": self._garbage_bytes,
+        }
+
+    def _position(self, telegram_id: int) -> int | None:
+        position = bisect_left(self._telegram_ids, telegram_id)
+        if position < len(self._telegram_ids) and self._telegram_ids[position] == telegram_id:
+            return position
+        return None
+
+    def _username_bytes(self, position: int) -> bytes:
+        offset = self._name_offsets[position]
+        return bytes(self._names[offset:offset + self._name_lengths[position]])
+
+    def _username(self, position: int) -> str:
+        return self._username_bytes(position).decode()
+
+    def _compact_if_needed(self) -> None:
+        if self._garbage_bytes * 2 <= len(self._names):
+            return
+        names = bytearray()
+        for position in range(len(self._telegram_ids)):
+            name = self._username_bytes(position)
+            self._name_offsets[position] = len(names)
+            names += name
+        self._names = names
+        self._garbage_bytes = 0
+
+
+def _encode_username(username: str) -> bytes:
+    name = username.encode()
+    if len(name) > _MAX_USERNAME_BYTES:
+        raise ValueError(f"Имя пользователя длиннее {_MAX_USERNAME_BYTES} байт")
+    return name
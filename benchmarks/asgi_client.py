@@ -0,0 +1,62 @@
+"""ASGI-клиент для бенчмарков: приложение вызывается напрямую, без сети."""
+import json
+from urllib.parse import urlencode
+
+
+class ASGIClient:
+    """Минимальный клиент: собирает scope, отдает тело одним сообщением и копит ответ."""
+
+    def __init__(self, asgi_app, user_agent: str):
+        self._app = asgi_app
+        self._user_agent = user_agent
+
+    async def request(
+            self,
+            method: str,
+            path: str,
+            params: dict | None = None,
+            headers: dict | None = None,
+            json_body: dict | None = None,
+    ) -> tuple[int, dict[str, str], bytes]:
+        body = json.dumps(json_body).encode() if json_body is not None else b""
+        raw_headers = [(b"host", b"benchmark"), (b"user-agent", self._user_agent.encode())]
+        if json_body is not None:
+            raw_headers += [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+        raw_headers += [(key.lower().encode(), value.encode()) for key, value in (headers or {}).items()]
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "https",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": urlencode(params or {}).encode(),
+            "root_path": "",
+            "headers": raw_headers,
+            "client": ("127.0.0.1", 50000),
+            "server": ("benchmark", 443),
+        }
+        is_sent = False
+        status = 0
+        response_headers: dict[str, str] = {}
+        chunks: list[bytes] = []
+
+        async def receive() -> dict:
+            nonlocal is_sent
+            if is_sent:
+                return {"type": "http.disconnect"}
+            is_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def send(message: dict) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                for key, value in message.get("headers", []):
+                    response_headers[key.decode().lower()] = value.decode()
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await self._app(scope, receive, send)
+        return status, response_headers, b"".join(chunks)
@@ -0,0 +1,212 @@
+"""Бенчмарк эндпоинтов входа и пользователя: приложение вызывается напрямую как ASGI, без сети.
+
+База — временный SQLite-файл, заполненный заданным числом пользователей и сессий.
+Для каждого эндпоинта считаются p50/p95/p99, запросы в секунду и запросы к БД на один HTTP-запрос.
+Результат можно сохранить в JSON (--output) и сравнить с прошлым прогоном (--baseline).
+
+Запуск: python -m benchmarks.endpoints [--users N] [--sessions-per-user N] [--requests N] [--concurrency N]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable
+
+from benchmarks.environment import configure_environment
+
+DATABASE_PATH = os.path.join(tempfile.gettempdir(), f"cube_bot_benchmark_{os.getpid()}.sqlite3")
+METRICS_DIR = tempfile.mkdtemp(prefix="cube_bot_benchmark_metrics_")
+
+configure_environment(
+    DATABASE_URL=f"sqlite+aiosqlite:///{DATABASE_PATH}",
+    METRICS_DIR=METRICS_DIR,
+    LOG_LEVEL="WARNING",
+    SESSION_JANITOR_ENABLED="false",
+    # Бенчмарк многократно входит одними и теми же пользователями с одного адреса
+    RATE_LIMIT_ENABLED="false",
+)
+
+from app.main import app  # noqa: E402
+from app.utils.query_accounting import count_queries  # noqa: E402
+from benchmarks.asgi_client import ASGIClient  # noqa: E402
+from benchmarks.seed import TELEGRAM_ID_OFFSET, USER_AGENTS, create_schema, seed_database  # noqa: E402
+
+REGISTER_TELEGRAM_ID_OFFSET = 90_000_000
+ENDPOINTS = ["login", "me", "refresh", "register"]
+
+
+def percentile(sorted_values: list[float], rank: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, round(rank / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def run_scenario(
+        name: str,
+        requests: int,
+        concurrency: int,
+        make_call: Callable[[int, int], Awaitable[int]],
+) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    next_index = 0
+
+    # Каждый воркер работает за "своего" пользователя, чтобы цепочки refresh не пересекались
+    async def worker(worker_id: int) -> None:
+        nonlocal next_index, errors
+        while next_index < requests:
+            index = next_index
+            next_index += 1
+            start = time.perf_counter()
+            status = await make_call(worker_id, index)
+            latencies.append(time.perf_counter() - start)
+            if status >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    with count_queries() as stats:
+        await asyncio.gather(*(worker(worker_id) for worker_id in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "endpoint": name,
+        "requests": requests,
+        "errors": errors,
+        "rps": round(requests / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "queries_per_request": round(stats.count / requests, 2),
+    }
+
+
+async def run_benchmark(args: argparse.Namespace) -> list[dict]:
+    await create_schema(f"sqlite+aiosqlite:///{DATABASE_PATH}")
+    seed_database(DATABASE_PATH, args.users, args.sessions_per_user)
+
+    client = ASGIClient(app, user_agent=USER_AGENTS[0])
+    telegram_ids = [TELEGRAM_ID_OFFSET + 1 + (i * args.users // args.concurrency) for i in range(args.concurrency)]
+    access_tokens: dict[int, str] = {}
+    refresh_tokens: dict[int, str] = {}
+
+    async def login(worker_id: int, index: int) -> int:
+        status, headers, _ = await client.request(
+            "POST", "/v1/auth/login", params={"telegram_id": telegram_ids[worker_id]}
+        )
+        access_tokens[worker_id] = headers.get("x-access-token", "")
+        refresh_tokens[worker_id] = headers.get("x-refresh-token", "")
+        return status
+
+    async def me(worker_id: int, index: int) -> int:
+        status, _, _ = await client.request("GET", "/v1/auth/me", headers={"X-Access-Token": access_tokens[worker_id]})
+        return status
+
+    async def refresh(worker_id: int, index: int) -> int:
+        status, headers, _ = await client.request(
+            "GET", "/v1/auth/refresh", headers={"X-Refresh-Token": refresh_tokens[worker_id]}
+        )
+        # Старый refresh-токен после ротации недействителен, дальше идем по новой цепочке
+        refresh_tokens[worker_id] = headers.get("x-refresh-token", refresh_tokens[worker_id])
+        return status
+
+    async def register(worker_id: int, index: int) -> int:
+        telegram_id = REGISTER_TELEGRAM_ID_OFFSET + index
+        status, _, _ = await client.request(
+            "POST", "/v1/user/register", json_body={"telegram_id": telegram_id, "username": f"new{telegram_id}"}
+        )
+        return status
+
+    calls = {"login": login, "me": me, "refresh": refresh, "register": register}
+    results = []
+    async with app.router.lifespan_context(app):
+        # Прогрев: токены для me/refresh и первые соединения пула
+        for worker_id in range(args.concurrency):
+            await login(worker_id, 0)
+        for name in args.endpoints:
+            result = await run_scenario(name, args.requests, args.concurrency, calls[name])
+            results.append(result)
+            print(
+                f"{name:<10} p50 {result['p50_ms']:>8.2f} ms  p95 {result['p95_ms']:>8.2f} ms  "
+                f"p99 {result['p99_ms']:>8.2f} ms  {result['rps']:>8.1f} rps  "
+                f"{result['queries_per_request']:>5.2f} q/req  errors {result['errors']}"
+            )
+    return results
+
+
+def compare_with_baseline(results: list[dict], baseline_path: str, max_regression: float | None) -> bool:
+    with open(baseline_path, encoding="utf-8") as file:
+        baseline = {item["endpoint"]: item for item in json.load(file)["results"]}
+
+    is_ok = True
+    print(f"\nСравнение с {baseline_path}:")
+    for result in results:
+        previous = baseline.get(result["endpoint"])
+        if previous is None:
+            continue
+        changes = []
+        for key in ("p50_ms", "p95_ms", "p99_ms", "rps", "queries_per_request"):
+            before, after = previous[key], result[key]
+            delta = (after - before) / before * 100 if before else 0.0
+            changes.append(f"{key} {before} -> {after} ({delta:+.1f}%)")
+            # Для задержек рост — регрессия, для rps — падение
+            regression = -delta if key == "rps" else delta
+            if max_regression is not None and key != "queries_per_request" and regression > max_regression:
+                is_ok = False
+        if result["queries_per_request"] > previous["queries_per_request"]:
+            is_ok = False
+        print(f"{result['endpoint']:<10} " + ", ".join(changes))
+    return is_ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--sessions-per-user", type=int, default=5)
+    parser.add_argument("--requests", type=int, default=2000, help="запросов на каждый эндпоинт")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=ENDPOINTS)
+    parser.add_argument("--output", help="куда записать результаты в JSON")
+    parser.add_argument("--baseline", help="JSON прошлого прогона для сравнения")
+    parser.add_argument(
+        "--max-regression", type=float, default=None,
+        help="допустимое ухудшение задержек и rps в процентах; при превышении код выхода 1",
+    )
+    args = parser.parse_args()
+    args.concurrency = max(1, min(args.concurrency, args.users))
+
+    try:
+        results = asyncio.run(run_benchmark(args))
+    finally:
+        if os.path.exists(DATABASE_PATH):
+            os.remove(DATABASE_PATH)
+        shutil.rmtree(METRICS_DIR, ignore_errors=True)
+
+    if args.output:
+        report = {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "config": {
+                "users": args.users,
+                "sessions_per_user": args.sessions_per_user,
+                "requests": args.requests,
+                "concurrency": args.concurrency,
+            },
+            "results": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+
+    is_ok = True
+    if args.baseline:
+        is_ok = compare_with_baseline(results, args.baseline, args.max_regression)
+    sys.exit(0 if is_ok else 1)
+
+
+if __name__ == "__main__":
+    main()
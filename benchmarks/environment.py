@@ -0,0 +1,24 @@
+import os
+
+# Минимальные настройки, чтобы приложение импортировалось без .env
+BENCHMARK_ENVIRONMENT = {
+    "DB_HOST": "",
+    "DB_PORT": "",
+    "DB_NAME": "",
+    "DB_USER": "",
+    "DB_PASSWORD": "",
+    "ACCESS_EXPIRE_MINUTES": "15",
+    "REFRESH_EXPIRE_DAYS": "30",
+    "ALGORITHM": "HS256",
+    "SECRET_KEY": "benchmark-secret",
+    "JWT_ISSUER": "cube-bot",
+    "JWT_AUDIENCE": "cube-bot-clients",
+    "JWT_CLOCK_SKEW_SECONDS": "30",
+    "MODE": "development",
+    "SESSION_TABLE_ENABLED": "false",
+}
+
+
+def configure_environment(**overrides: str) -> None:
+    for key, value in {**BENCHMARK_ENVIRONMENT, **overrides}.items():
+        os.environ.setdefault(key, value)
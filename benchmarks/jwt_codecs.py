@@ -0,0 +1,99 @@
+"""Сравнение бэкендов JWT: подпись и проверка одного токена доступа.
+
+- python-jose HS256 с секретом строкой, как было до кодеков (ключ разбирается на каждый вызов);
+- HmacJwtCodec: тот же HS256 с заранее разобранным ключом;
+- python-jose ES256 с PEM строкой;
+- AsymmetricJwtCodec: ES256 и EdDSA на cryptography с заранее загруженными ключами.
+
+Запуск: python -m benchmarks.jwt_codecs [--iterations N]
+"""
+import argparse
+import time
+from typing import Callable
+
+from benchmarks.environment import configure_environment
+
+configure_environment()
+
+from cryptography.hazmat.primitives import serialization  # noqa: E402
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519  # noqa: E402
+from jose import jwt  # noqa: E402
+
+from app.core import settings  # noqa: E402
+from app.utils.jwt_codec import AsymmetricJwtCodec, HmacJwtCodec  # noqa: E402
+
+KID = "benchmark"
+
+
+def make_payload() -> dict:
+    now = int(time.time())
+    return {
+        "sub": "123456789",
+        "sid": "5f0c6f8e-2b1d-4c1e-9a47-1f7d7c9b1e21",
+        "iss": settings.JWT_ISSUER,
+        "aud": settings.JWT_AUDIENCE,
+        "exp": now + 900,
+        "iat": now,
+        "type": "access-token",
+    }
+
+
+def measure(iterations: int, operation: Callable[[], object]) -> float:
+    for _ in range(min(iterations, 200)):
+        operation()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        operation()
+    return (time.perf_counter() - start) / iterations * 1_000_000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+
+    payload = make_payload()
+    secret = settings.SECRET_KEY
+    audience, issuer = settings.JWT_AUDIENCE, settings.JWT_ISSUER
+    es256_key = ec.generate_private_key(ec.SECP256R1())
+    es256_pem = es256_key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ).decode()
+    es256_public_pem = es256_key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    ).decode()
+
+    hmac_codec = HmacJwtCodec(secret=secret, algorithm="HS256", audience=audience, issuer=issuer)
+    es256_codec = AsymmetricJwtCodec("ES256", {KID: es256_key}, {}, active_kid=KID, leeway_seconds=30)
+    eddsa_codec = AsymmetricJwtCodec(
+        "EdDSA", {KID: ed25519.Ed25519PrivateKey.generate()}, {}, active_kid=KID, leeway_seconds=30
+    )
+
+    # Токен, подписанный кодеком, должен проверяться сторонней библиотекой по JWKS
+    jwks_key = es256_codec.jwks()["keys"][0]
+    assert jwt.decode(es256_codec.encode(payload), jwks_key, algorithms=["ES256"], audience=audience, issuer=issuer)
+
+    backends = {
+        "jose HS256 (секрет строкой)": (
+            lambda: jwt.encode(payload, secret, algorithm="HS256"),
+            lambda token: jwt.decode(token, secret, algorithms=["HS256"], audience=audience, issuer=issuer),
+        ),
+        "HmacJwtCodec HS256": (lambda: hmac_codec.encode(payload), hmac_codec.decode),
+        "jose ES256 (PEM строкой)": (
+            lambda: jwt.encode(payload, es256_pem, algorithm="ES256"),
+            lambda token: jwt.decode(token, es256_public_pem, algorithms=["ES256"], audience=audience, issuer=issuer),
+        ),
+        "AsymmetricJwtCodec ES256": (lambda: es256_codec.encode(payload), es256_codec.decode),
+        "AsymmetricJwtCodec EdDSA": (lambda: eddsa_codec.encode(payload), eddsa_codec.decode),
+    }
+
+    print(f"{'бэкенд':<32} {'подпись, мкс':>14} {'проверка, мкс':>14} {'длина':>7}")
+    for name, (encode, decode) in backends.items():
+        token = encode()
+        encode_us = measure(args.iterations, encode)
+        decode_us = measure(args.iterations, lambda: decode(token))
+        print(f"{name:<32} {encode_us:>14.1f} {decode_us:>14.1f} {len(token):>7}")
+
+
+if __name__ == "__main__":
+    main()
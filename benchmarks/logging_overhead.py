@@ -0,0 +1,90 @@
+"""Накладные расходы логирования в DAO на один запрос: f-строки против ленивого SampledLogger.
+
+Запуск: python -m benchmarks.logging_overhead [--iterations N]
+"""
+import argparse
+import os
+import time
+
+from benchmarks.environment import configure_environment
+
+configure_environment()
+
+from loguru import logger  # noqa: E402
+
+from app.core import logging as app_logging  # noqa: E402
+from app.core.logging import BackgroundSink, SampledLogger  # noqa: E402
+
+
+class _FakeRecord:
+    def __init__(self, record_id: int):
+        self.id = record_id
+        self.telegram_id = 123456789
+        self.username = "Ivan"
+
+    def __repr__(self) -> str:
+        return f"<User id={self.id} telegram_id={self.telegram_id} username={self.username}>"
+
+
+FILTERS = {"user_id": 42, "user_agent": "TelegramBot (like TwitterBot)", "is_active": True}
+RECORD = _FakeRecord(42)
+
+
+def request_before() -> None:
+    # Так DAO логировали до перехода на SampledLogger: строки собираются всегда
+    log_message = f"Запись User с Telegram ID {RECORD.telegram_id} {'найдена' if RECORD else 'не найдена'}."
+    logger.info(log_message)
+    logger.info(f"Поиск одной записи UserSession по фильтрам: {FILTERS}")
+    log_message = f"Запись {'найдена' if RECORD else 'не найдена'} по фильтрам: {FILTERS}"
+    logger.info(log_message)
+    logger.info(f"Данные: {RECORD}")
+
+
+def make_request_after(dao_logger: SampledLogger):
+    def request_after() -> None:
+        dao_logger.info("Запись {} с Telegram ID {} {}.", "User", RECORD.telegram_id, "найдена" if RECORD else "не найдена")
+        dao_logger.info("Поиск одной записи {} по фильтрам: {}", "UserSession", FILTERS)
+        dao_logger.info("Запись {} по фильтрам: {}", "найдена" if RECORD else "не найдена", FILTERS)
+        logger.debug("Данные: {}", RECORD)
+    return request_after
+
+
+def _configure(level: str, enqueue: bool, stream) -> None:
+    # Та же конфигурация, что в setup_logging, но вывод идет в /dev/null
+    logger.remove()
+    sink = BackgroundSink(stream, max_size=10000) if enqueue else stream
+    logger.add(sink, level=level, colorize=False, backtrace=False, diagnose=False)
+    app_logging._min_level_no = logger.level(level).no
+
+
+def _measure(request, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        request()
+    return (time.perf_counter() - start) / iterations * 1_000_000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=50_000)
+    args = parser.parse_args()
+
+    scenarios = [
+        ("WARNING", "WARNING", False, 1),
+        ("INFO, запись в потоке обработчика", "INFO", False, 1),
+        ("INFO, BackgroundSink", "INFO", True, 1),
+        ("INFO, BackgroundSink, семплирование 1/100", "INFO", True, 100),
+    ]
+
+    print(f"{'сценарий':<44} {'до, мкс/запрос':>16} {'после, мкс/запрос':>18}")
+    with open(os.devnull, "w") as stream:
+        for title, level, enqueue, sample_rate in scenarios:
+            _configure(level, enqueue, stream)
+            before = _measure(request_before, args.iterations)
+            after = _measure(make_request_after(SampledLogger(every=sample_rate)), args.iterations)
+            logger.remove()
+            print(f"{title:<44} {before:>16.2f} {after:>18.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import sqlite3
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.db import Base
+from app.models.program import Program  # noqa: F401
+from app.models.user import User, UserSession  # noqa: F401
+
+USER_AGENTS = ["TelegramBot (like TwitterBot)", "Mozilla/5.0", "python-httpx/0.28", "okhttp/4.12"]
+TELEGRAM_ID_OFFSET = 10_000_000
+
+
+async def create_schema(url: str) -> None:
+    engine = create_async_engine(url)
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    await engine.dispose()
+
+
+def seed_database(path: str, users: int, sessions_per_user: int, admins: int = 1) -> list[str]:
+    """Заполняет SQLite-файл пользователями и сессиями, возвращает id сессий в порядке вставки."""
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    connection = sqlite3.connect(path)
+    connection.executemany(
+        "INSERT INTO users (id, telegram_id, username, is_admin) VALUES (?, ?, ?, ?)",
+        (
+            (user_id, TELEGRAM_ID_OFFSET + user_id, f"user{user_id}", int(user_id <= admins))
+            for user_id in range(1, users + 1)
+        ),
+    )
+    sessions = []
+    for user_id in range(1, users + 1):
+        for i in range(sessions_per_user):
+            # Как после серии refresh: одна активная сессия на клиента и хвост неактивных
+            sessions.append((
+                str(uuid.uuid4()), user_id, USER_AGENTS[i % len(USER_AGENTS)],
+                now - timedelta(days=i), now + timedelta(days=30 - i), int(i < len(USER_AGENTS)),
+            ))
+    connection.executemany(
+        "INSERT INTO user_sessions (id, user_id, user_agent, created_at, expires_at, is_active) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        sessions,
+    )
+    connection.execute("ANALYZE")
+    connection.commit()
+    connection.close()
+    return [session[0] for session in sessions]
@@ -0,0 +1,75 @@
+"""Микробенчмарк сериализации ответа /v1/auth/me.
+
+Сравниваются:
+- прежний путь: UserModel.model_validate в роуте, затем повторная валидация и кодирование по response_model;
+- тот же путь через jsonable_encoder и json.dumps, как в версиях FastAPI без dump_json;
+- app.utils.serialization: ORM-объект сразу в байты через закэшированный TypeAdapter.
+
+Запуск: python -m benchmarks.serialization [--iterations N]
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import Callable
+
+from benchmarks.environment import configure_environment
+
+configure_environment()
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import Response  # noqa: E402
+from fastapi.routing import APIRoute, serialize_response  # noqa: E402
+
+from app.api.v1.auth import router as auth_router  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.schemas.user import UserModel  # noqa: E402
+from app.utils.serialization import model_response  # noqa: E402
+
+
+def find_route(path: str) -> APIRoute:
+    return next(route for route in auth_router.routes if isinstance(route, APIRoute) and route.path == path)
+
+
+async def measure(name: str, iterations: int, render: Callable) -> float:
+    for _ in range(1000):
+        await render()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await render()
+    per_call = (time.perf_counter() - start) / iterations
+    print(f"{name:<40} {per_call * 1_000_000:>8.2f} мкс")
+    return per_call
+
+
+async def main(iterations: int) -> None:
+    route = find_route("/v1/auth/me")
+    user = User(id=1, telegram_id=123456789, username="Ivan", is_admin=False)
+
+    async def response_model_dump_json() -> bytes:
+        content = await serialize_response(
+            field=route.response_field, response_content=UserModel.model_validate(user), dump_json=True
+        )
+        return Response(content=content, media_type="application/json").body
+
+    async def response_model_json_dumps() -> bytes:
+        content = await serialize_response(
+            field=route.response_field, response_content=UserModel.model_validate(user)
+        )
+        return Response(content=json.dumps(jsonable_encoder(content)), media_type="application/json").body
+
+    async def type_adapter() -> bytes:
+        return model_response(UserModel, user).body
+
+    assert json.loads(await response_model_dump_json()) == json.loads(await type_adapter())
+    baseline = await measure("response_model (dump_json)", iterations, response_model_dump_json)
+    legacy = await measure("response_model (jsonable_encoder)", iterations, response_model_json_dumps)
+    fast = await measure("TypeAdapter из ORM", iterations, type_adapter)
+    print(f"\nУскорение: x{baseline / fast:.2f} к dump_json, x{legacy / fast:.2f} к jsonable_encoder")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=100_000)
+    args = parser.parse_args()
+    asyncio.run(main(args.iterations))
@@ -0,0 +1,122 @@
+"""Холодный старт: импорт приложения, lifespan и первые запросы с прогревом и без него.
+
+Каждый режим запускается в отдельном процессе, чтобы импорт и кэши были действительно холодными.
+База — временный SQLite-файл с небольшим набором пользователей.
+
+Запуск: python -m benchmarks.startup [--users N]
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.environment import configure_environment
+
+REQUESTS = ["login", "me", "login (повтор)", "me (повтор)"]
+
+
+async def measure_child(users: int) -> dict:
+    started = time.perf_counter()
+    from app.main import app
+    import_seconds = time.perf_counter() - started
+
+    from app.services.warmup import startup_report
+    from benchmarks.asgi_client import ASGIClient
+    from benchmarks.seed import TELEGRAM_ID_OFFSET, USER_AGENTS
+
+    client = ASGIClient(app, user_agent=USER_AGENTS[0])
+    latencies = {}
+
+    async def timed(name: str, *args, **kwargs) -> dict[str, str]:
+        request_started = time.perf_counter()
+        status, headers, _ = await client.request(*args, **kwargs)
+        latencies[name] = time.perf_counter() - request_started
+        assert status == 200, (name, status)
+        return headers
+
+    started = time.perf_counter()
+    async with app.router.lifespan_context(app):
+        lifespan_seconds = time.perf_counter() - started
+        telegram_ids = [TELEGRAM_ID_OFFSET + 1, TELEGRAM_ID_OFFSET + users]
+        for suffix, telegram_id in zip(("", " (повтор)"), telegram_ids):
+            headers = await timed(f"login{suffix}", "POST", "/v1/auth/login", params={"telegram_id": telegram_id})
+            await timed(f"me{suffix}", "GET", "/v1/auth/me", headers={"X-Access-Token": headers["x-access-token"]})
+        report = startup_report.snapshot()
+    return {
+        "import_seconds": import_seconds,
+        "lifespan_seconds": lifespan_seconds,
+        "phases_seconds": report["phases_seconds"],
+        "latencies": latencies,
+    }
+
+
+def run_child(args: argparse.Namespace) -> None:
+    directory = tempfile.mkdtemp(prefix="cube_bot_startup_")
+    database_path = os.path.join(directory, "db.sqlite3")
+    configure_environment(
+        DATABASE_URL=f"sqlite+aiosqlite:///{database_path}",
+        METRICS_DIR=directory,
+        LOG_LEVEL="WARNING",
+        SESSION_JANITOR_ENABLED="false",
+        DB_WARMUP_ENABLED=args.warmup,
+    )
+    try:
+        # Схема и данные готовятся в отдельном процессе: здесь app еще не должен быть импортирован
+        subprocess.run(
+            [sys.executable, "-m", "benchmarks.startup", "--seed", database_path, "--users", str(args.users)],
+            check=True,
+        )
+        result = asyncio.run(measure_child(args.users))
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    print(json.dumps(result))
+
+
+def run_seed(path: str, users: int) -> None:
+    configure_environment(DATABASE_URL=f"sqlite+aiosqlite:///{path}")
+    from benchmarks.seed import create_schema, seed_database
+
+    asyncio.run(create_schema(f"sqlite+aiosqlite:///{path}"))
+    seed_database(path, users, sessions_per_user=1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--warmup", help=argparse.SUPPRESS)
+    parser.add_argument("--seed", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.seed:
+        run_seed(args.seed, args.users)
+        return
+    if args.warmup:
+        run_child(args)
+        return
+
+    results = {}
+    for warmup in ("false", "true"):
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.startup", "--warmup", warmup, "--users", str(args.users)],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        results[warmup] = json.loads(output.strip().splitlines()[-1])
+
+    print(f"{'':<24} {'без прогрева':>14} {'с прогревом':>14}")
+    for key, title in (("import_seconds", "импорт app.main"), ("lifespan_seconds", "lifespan")):
+        print(f"{title:<24} {results['false'][key] * 1000:>11.1f} мс {results['true'][key] * 1000:>11.1f} мс")
+    for name in REQUESTS:
+        before, after = results["false"]["latencies"][name], results["true"]["latencies"][name]
+        print(f"{name:<24} {before * 1000:>11.1f} мс {after * 1000:>11.1f} мс")
+    print("\nФазы старта с прогревом:")
+    for name, seconds in results["true"]["phases_seconds"].items():
+        print(f"  {name:<20} {seconds * 1000:>9.1f} мс")
+
+
+if __name__ == "__main__":
+    main()
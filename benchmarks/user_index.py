@@ -0,0 +1,120 @@
+"""Индекс пользователей в памяти: объем и время поиска по Telegram ID.
+
+Память (tracemalloc) для N синтетических пользователей:
+- app.utils.user_index.UserIndex — колонки-массивы и общий буфер имен;
+- dict[int, IndexedUser] — словарь с кортежем на пользователя;
+- dict[int, dict] — словарь со строкой-словарем на пользователя, как после SELECT.
+
+Поиск через UserDAO.find_one_or_none_by_telegram_id на временном SQLite-файле: с загруженным
+индексом и без него (запрос в БД), плюс голый UserIndex.get.
+
+Запуск: python -m benchmarks.user_index [--users N] [--db-users N] [--lookups N]
+"""
+import argparse
+import asyncio
+import gc
+import os
+import random
+import shutil
+import tempfile
+import time
+import tracemalloc
+from typing import Callable
+
+from benchmarks.environment import configure_environment
+
+directory = tempfile.mkdtemp(prefix="cube_bot_user_index_")
+database_path = os.path.join(directory, "db.sqlite3")
+configure_environment(
+    DATABASE_URL=f"sqlite+aiosqlite:///{database_path}",
+    METRICS_DIR=directory,
+    LOG_LEVEL="WARNING",
+    USER_INDEX_ENABLED="true",
+)
+
+from app.core.logging import setup_logging  # noqa: E402
+from app.crud.user import UserDAO, user_index  # noqa: E402
+from app.db.session import async_session_maker  # noqa: E402
+from app.services.user_index import user_index_loader  # noqa: E402
+from app.utils.user_index import IndexedUser, UserIndex  # noqa: E402
+from benchmarks.seed import TELEGRAM_ID_OFFSET, create_schema, seed_database  # noqa: E402
+
+
+def synthetic_rows(users: int):
+    for user_id in range(1, users + 1):
+        yield TELEGRAM_ID_OFFSET + user_id, user_id, user_id == 1, f"user{user_id}"
+
+
+def measure_memory(name: str, build: Callable[[], object]) -> int:
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    structure = build()
+    seconds = time.perf_counter() - started
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del structure
+    print(f"{name:<28} {allocated / 1024 / 1024:>9.1f} МБ {seconds:>8.2f} с")
+    return allocated
+
+
+async def measure_lookups(name: str, telegram_ids: list[int], lookup: Callable) -> None:
+    for telegram_id in telegram_ids[:100]:
+        await lookup(telegram_id)
+    started = time.perf_counter()
+    for telegram_id in telegram_ids:
+        assert await lookup(telegram_id) is not None
+    per_call = (time.perf_counter() - started) / len(telegram_ids)
+    print(f"{name:<40} {per_call * 1_000_000:>9.1f} мкс")
+
+
+async def lookup_benchmark(db_users: int, lookups: int) -> None:
+    await create_schema(f"sqlite+aiosqlite:///{database_path}")
+    seed_database(database_path, db_users, sessions_per_user=0)
+    await user_index_loader.reload()
+    telegram_ids = [TELEGRAM_ID_OFFSET + random.randint(1, db_users) for _ in range(lookups)]
+
+    async def dao_lookup(telegram_id: int):
+        async with async_session_maker() as session:
+            return await UserDAO(session).find_one_or_none_by_telegram_id(telegram_id)
+
+    async def index_lookup(telegram_id: int):
+        return user_index.get(telegram_id)
+
+    print(f"\nПоиск по Telegram ID, {db_users} пользователей в SQLite, {lookups} запросов:")
+    await measure_lookups("UserIndex.get", telegram_ids, index_lookup)
+    await measure_lookups("UserDAO, индекс загружен", telegram_ids, dao_lookup)
+    # Незагруженный индекс DAO не использует: каждый поиск идет в БД
+    user_index.is_loaded = False
+    await measure_lookups("UserDAO, запрос в БД", telegram_ids, dao_lookup)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--db-users", type=int, default=10_000)
+    parser.add_argument("--lookups", type=int, default=5_000)
+    args = parser.parse_args()
+    setup_logging()
+
+    print(f"Память на {args.users} пользователей:")
+    compact = measure_memory("UserIndex", lambda: UserIndex.from_rows(synthetic_rows(args.users)))
+    tuples = measure_memory("dict[int, IndexedUser]", lambda: {
+        telegram_id: IndexedUser(user_id, telegram_id, username, is_admin)
+        for telegram_id, user_id, is_admin, username in synthetic_rows(args.users)
+    })
+    dicts = measure_memory("dict[int, dict]", lambda: {
+        telegram_id: {"id": user_id, "telegram_id": telegram_id, "username": username, "is_admin": is_admin}
+        for telegram_id, user_id, is_admin, username in synthetic_rows(args.users)
+    })
+    print(f"UserIndex на пользователя: {compact / args.users:.1f} байт "
+          f"(кортежи {tuples / args.users:.1f}, словари {dicts / args.users:.1f})")
+
+    try:
+        asyncio.run(lookup_benchmark(args.db_users, args.lookups))
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""Add session lookup indexes
+
+Revision ID: 5f3a9c1d7e42
+Revises: d94ec65ca42f
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5f3a9c1d7e42'
+down_revision: Union[str, None] = 'd94ec65ca42f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_user_sessions_user_id_user_agent_is_active',
+        'user_sessions',
+        ['user_id', 'user_agent', 'is_active'],
+        unique=False,
+    )
+    op.create_index(
+        'ix_user_sessions_active_user_id_user_agent',
+        'user_sessions',
+        ['user_id', 'user_agent'],
+        unique=False,
+        postgresql_where=sa.text('is_active'),
+        sqlite_where=sa.text('is_active = 1'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_user_sessions_active_user_id_user_agent', table_name='user_sessions')
+    op.drop_index('ix_user_sessions_user_id_user_agent_is_active', table_name='user_sessions')
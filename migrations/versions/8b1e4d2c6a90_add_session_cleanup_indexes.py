@@ -0,0 +1,37 @@
+"""Add session cleanup indexes
+
+Revision ID: 8b1e4d2c6a90
+Revises: 5f3a9c1d7e42
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b1e4d2c6a90'
+down_revision: Union[str, None] = '5f3a9c1d7e42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_user_sessions_expires_at', 'user_sessions', ['expires_at'], unique=False)
+    op.create_index(
+        'ix_user_sessions_inactive_id',
+        'user_sessions',
+        ['id'],
+        unique=False,
+        postgresql_where=sa.text('NOT is_active'),
+        sqlite_where=sa.text('is_active = 0'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_user_sessions_inactive_id', table_name='user_sessions')
+    op.drop_index('ix_user_sessions_expires_at', table_name='user_sessions')
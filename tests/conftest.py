@@ -0,0 +1,157 @@
+import glob
+import os
+import shutil
+import sqlite3
+import tempfile
+from multiprocessing import shared_memory
+
+import pytest
+
+# Настройки читаются при импорте app, поэтому окружение задается до него
+_directory = tempfile.mkdtemp(prefix="cube_bot_tests_")
+DATABASE_PATH = os.path.join(_directory, "db.sqlite3")
+SESSION_TABLE_NAME = f"cube_bot_sessions_test_{os.getpid()}"
+
+os.environ.update({
+    "DB_HOST": "",
+    "DB_PORT": "",
+    "DB_NAME": "",
+    "DB_USER": "",
+    "DB_PASSWORD": "",
+    "ACCESS_EXPIRE_MINUTES": "15",
+    "REFRESH_EXPIRE_DAYS": "30",
+    "ALGORITHM": "HS256",
+    "SECRET_KEY": "test-secret",
+    "JWT_ISSUER": "cube-bot",
+    "JWT_AUDIENCE": "cube-bot-clients",
+    "JWT_CLOCK_SKEW_SECONDS": "30",
+    "MODE": "development",
+    "DATABASE_URL": f"sqlite+aiosqlite:///{DATABASE_PATH}",
+    "REPLICA_DATABASE_URL": "",
+    "METRICS_DIR": _directory,
+    "LOG_LEVEL": "WARNING",
+    "LOG_ENQUEUE": "false",
+    "DB_WARMUP_ENABLED": "false",
+    "SESSION_JANITOR_ENABLED": "false",
+    "SESSION_TABLE_NAME": SESSION_TABLE_NAME,
+    "RATE_LIMIT_ENABLED": "false",
+    "QUERY_BUDGET_STRICT": "true",
+    "USER_INDEX_ENABLED": "true",
+})
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+
+from app.db import Base  # noqa: E402
+from app.db.session import database  # noqa: E402
+from app.main import app  # noqa: E402
+from app.crud.user import user_index  # noqa: E402
+from app.services.auth import token_cache  # noqa: E402
+from app.services.user_index import user_index_loader  # noqa: E402
+from app.utils.session_table import get_session_table, get_user_change_table  # noqa: E402
+from app.utils.user_index import UserIndex  # noqa: E402
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(autouse=True)
+def schema():
+    # Схема создается заново для каждого теста синхронным движком на тот же файл
+    engine = create_engine(f"sqlite:///{DATABASE_PATH}")
+    Base.metadata.create_all(engine)
+    yield
+    Base.metadata.drop_all(engine)
+    engine.dispose()
+
+
+@pytest.fixture(autouse=True)
+def reset_caches():
+    yield
+    token_cache.clear()
+    if user_index is not None:
+        user_index.replace(UserIndex())
+    for table in (get_session_table(), get_user_change_table()):
+        if table is not None:
+            table.reset()
+
+
+@pytest.fixture
+async def db():
+    """База приложения для тестов без HTTP; движок закрывается в том же event loop."""
+    yield database.connect()
+    await database.dispose()
+
+
+@pytest.fixture
+def database_path() -> str:
+    return DATABASE_PATH
+
+
+@pytest.fixture
+def sql():
+    """Выполняет SQL напрямую в тестовой базе, в обход приложения и его кэшей."""
+    def execute(statement: str, *parameters) -> list[tuple]:
+        connection = sqlite3.connect(DATABASE_PATH)
+        try:
+            rows = connection.execute(statement, parameters).fetchall()
+            connection.commit()
+            return rows
+        finally:
+            connection.close()
+    return execute
+
+
+@pytest.fixture
+def client():
+    with TestClient(app, base_url="https://testserver") as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def register(client):
+    def register_user(telegram_id: int, username: str = "ivan") -> dict:
+        response = client.post("/v1/user/register", json={"telegram_id": telegram_id, "username": username})
+        assert response.status_code == 200, response.text
+        return response.json()
+    return register_user
+
+
+@pytest.fixture
+def login(client):
+    def login_user(telegram_id: int, user_agent: str = "pytest") -> dict[str, str]:
+        response = client.post("/v1/auth/login", params={"telegram_id": telegram_id}, headers={"User-Agent": user_agent})
+        assert response.status_code == 200, response.text
+        return {
+            "access": response.headers["X-Access-Token"],
+            "refresh": response.headers["X-Refresh-Token"],
+            "session_id": response.headers["X-Session-ID"],
+        }
+    return login_user
+
+
+@pytest.fixture
+def promote(client, sql):
+    """Назначает администратора в обход API, как это делается вручную в базе, и перечитывает индекс."""
+    def promote_user(telegram_id: int) -> None:
+        sql("UPDATE users SET is_admin = 1 WHERE telegram_id = ?", telegram_id)
+        client.portal.call(user_index_loader.reload)
+    return promote_user
+
+
+def pytest_sessionfinish(session, exitstatus):
+    for name in (SESSION_TABLE_NAME, f"{SESSION_TABLE_NAME}_users"):
+        try:
+            shared_memory.SharedMemory(name=name).unlink()
+        except FileNotFoundError:
+            pass
+    # Файлы блокировок таблиц лежат рядом с сегментами, включая таблицы отдельных тестов
+    locks = os.path.join(tempfile.gettempdir(), SESSION_TABLE_NAME)
+    for path in (f"{locks}.lock", *glob.glob(f"{locks}_*.lock")):
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+    shutil.rmtree(_directory, ignore_errors=True)
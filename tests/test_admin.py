@@ -0,0 +1,34 @@
+import pytest
+
+ADMIN_ROUTES = ["/v1/admin/users", "/v1/admin/sessions", "/v1/admin/users/export", "/v1/admin/sessions/export"]
+
+
+@pytest.mark.parametrize("path", ADMIN_ROUTES)
+def test_admin_telegram_id_alone_is_not_enough(client, register, login, promote, path):
+    register(1, "admin")
+    login(1)
+    promote(1)
+
+    response = client.get(path, params={"admin_telegram_id": 1})
+
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("path", ADMIN_ROUTES)
+def test_non_admin_token_is_forbidden(client, register, login, path):
+    register(1)
+    headers = {"X-Access-Token": login(1)["access"]}
+
+    assert client.get(path, headers=headers).status_code == 403
+
+
+@pytest.mark.parametrize("path", ADMIN_ROUTES)
+def test_admin_token_is_accepted(client, register, login, promote, path):
+    register(1, "admin")
+    headers = {"X-Access-Token": login(1)["access"]}
+    promote(1)
+
+    response = client.get(path, headers=headers)
+
+    assert response.status_code == 200, response.text
+    assert len(response.text.splitlines()) == 1
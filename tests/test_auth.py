@@ -0,0 +1,80 @@
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from app.crud.user import user_index
+from app.db.session import read_session_maker
+from app.depends.auth_dep import check_access_token, check_refresh_token
+from app.utils.session_table import get_session_table
+
+
+def me(client, access_token: str):
+    return client.get("/v1/auth/me", headers={"X-Access-Token": access_token})
+
+
+def test_me_is_served_from_session_table_and_user_index(client, register, login):
+    register(1)
+    tokens = login(1)
+
+    first = me(client, tokens["access"])
+    writes = get_session_table().writes
+    second = me(client, tokens["access"])
+
+    assert first.status_code == second.status_code == 200
+    assert first.headers["X-Query-Count"] == "1"
+    assert second.headers["X-Query-Count"] == "0"
+    assert second.json() == {"telegram_id": 1, "username": "ivan", "is_admin": False}
+    # Состояние сессии уже в таблице: повторная запись под блокировкой не нужна
+    assert get_session_table().writes == writes
+
+
+def test_active_session_without_index_entry_reads_database(client, register, login):
+    register(1)
+    tokens = login(1)
+    me(client, tokens["access"])
+    user_index.remove(1)
+    writes = get_session_table().writes
+
+    response = me(client, tokens["access"])
+
+    assert response.status_code == 200
+    assert response.headers["X-Query-Count"] == "1"
+    assert get_session_table().writes == writes
+
+
+def test_session_revoked_by_other_worker_is_rejected_without_database(client, register, login):
+    register(1)
+    tokens = login(1)
+    me(client, tokens["access"])
+
+    get_session_table().mark_revoked(tokens["session_id"], 1, time.time() + 60)
+    response = me(client, tokens["access"])
+
+    assert response.status_code == 403
+    assert response.headers["X-Query-Count"] == "0"
+
+
+def test_session_of_other_user_is_rejected(client, register, login):
+    register(1)
+    tokens = login(1)
+    get_session_table().mark_active(tokens["session_id"], 2, time.time() + 60)
+
+    assert me(client, tokens["access"]).status_code == 403
+
+
+def test_check_token_dependencies(client, register, login):
+    register(1)
+    tokens = login(1)
+
+    async def check(dependency, token: str) -> bool:
+        async with read_session_maker() as session:
+            return await dependency(token=token, session=session)
+
+    assert client.portal.call(check, check_access_token, tokens["access"]) is True
+    assert client.portal.call(check, check_refresh_token, tokens["refresh"]) is True
+
+    client.post("/v1/auth/logout", headers={"X-Access-Token": tokens["access"]})
+    with pytest.raises(HTTPException) as error:
+        client.portal.call(check, check_access_token, tokens["access"])
+    assert error.value.status_code == 403
@@ -0,0 +1,206 @@
+import base64
+import json
+import time
+
+import pytest
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+from jose import jwt
+
+from app.core import settings
+from app.utils.jwt_codec import AsymmetricJwtCodec, ExpiredTokenError, InvalidTokenError, JwtCodec, get_jwt_codec
+
+
+def b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def generate_key(algorithm: str):
+    if algorithm == "ES256":
+        return ec.generate_private_key(ec.SECP256R1())
+    return ed25519.Ed25519PrivateKey.generate()
+
+
+def make_codec(algorithm: str, private_keys: dict, active_kid: str, public_keys: dict | None = None):
+    return AsymmetricJwtCodec(
+        algorithm=algorithm,
+        private_keys=private_keys,
+        public_keys=public_keys or {},
+        active_kid=active_kid,
+        leeway_seconds=30,
+    )
+
+
+def with_header(token: str, header) -> str:
+    _, payload, signature = token.split(".")
+    return f"{b64(json.dumps(header).encode())}.{payload}.{signature}"
+
+
+@pytest.fixture
+def asymmetric_app(tmp_path, monkeypatch):
+    """Приложение с ES256: ключ в каталоге, кодек пересобирается из настроек."""
+    key = generate_key("ES256")
+    (tmp_path / "main.pem").write_bytes(key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ))
+    monkeypatch.setattr(settings, "ALGORITHM", "ES256")
+    monkeypatch.setattr(settings, "JWT_KEYS_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "JWT_ACTIVE_KID", "main")
+    get_jwt_codec.cache_clear()
+    yield key
+    get_jwt_codec.cache_clear()
+
+
+@pytest.mark.parametrize("header", [[1, 2], "ES256", None, {"alg": "ES256"}, {"alg": "ES256", "kid": ["main"]}])
+def test_hostile_header_is_invalid_token(header):
+    codec = make_codec("ES256", {"main": generate_key("ES256")}, "main")
+    token = codec.encode({"sub": "1", "exp": time.time() + 60})
+
+    with pytest.raises(InvalidTokenError):
+        codec.decode(with_header(token, header))
+
+
+@pytest.mark.parametrize("header", [[1, 2], {"alg": "ES256", "kid": ["main"]}])
+def test_hostile_header_is_rejected_with_401(client, register, login, asymmetric_app, header):
+    register(1)
+    tokens = login(1)
+
+    response = client.get("/v1/auth/me", headers={"X-Access-Token": with_header(tokens["access"], header)})
+
+    assert response.status_code == 401
+
+
+def test_codec_without_encode_and_decode_cannot_be_created():
+    class PartialCodec(JwtCodec):
+        def encode(self, payload: dict) -> str:
+            return ""
+
+    with pytest.raises(TypeError):
+        PartialCodec()
+
+
+@pytest.mark.parametrize("algorithm", ["ES256", "EdDSA"])
+def test_round_trip(algorithm):
+    codec = make_codec(algorithm, {"main": generate_key(algorithm)}, "main")
+    payload = {"sub": "1", "sid": "session", "exp": int(time.time()) + 60}
+
+    token = codec.encode(payload)
+
+    header = json.loads(base64.urlsafe_b64decode(token.split(".")[0] + "=="))
+    assert header == {"alg": algorithm, "typ": "JWT", "kid": "main"}
+    assert codec.decode(token) == payload
+
+
+def test_es256_signature_is_raw_r_and_s():
+    codec = make_codec("ES256", {"main": generate_key("ES256")}, "main")
+    token = codec.encode({"sub": "1"})
+    signature = base64.urlsafe_b64decode(token.split(".")[2] + "==")
+
+    assert len(signature) == 64
+    # Подпись в DER, как ее отдает cryptography, не принимается
+    header, payload, _ = token.split(".")
+    key = codec._signing_key
+    der = key.sign(f"{header}.{payload}".encode(), ec.ECDSA(hashes.SHA256()))
+    with pytest.raises(InvalidTokenError):
+        codec.decode(f"{header}.{payload}.{b64(der)}")
+
+
+@pytest.mark.parametrize("algorithm", ["ES256", "EdDSA"])
+def test_tampered_payload_is_rejected(algorithm):
+    codec = make_codec(algorithm, {"main": generate_key(algorithm)}, "main")
+    header, _, signature = codec.encode({"sub": "1"}).split(".")
+
+    with pytest.raises(InvalidTokenError):
+        codec.decode(f"{header}.{b64(json.dumps({'sub': '2'}).encode())}.{signature}")
+
+
+def test_unknown_kid_is_rejected():
+    signer = make_codec("ES256", {"other": generate_key("ES256")}, "other")
+    verifier = make_codec("ES256", {"main": generate_key("ES256")}, "main")
+
+    with pytest.raises(InvalidTokenError, match="kid"):
+        verifier.decode(signer.encode({"sub": "1"}))
+
+
+def test_token_signed_with_other_key_under_same_kid_is_rejected():
+    signer = make_codec("ES256", {"main": generate_key("ES256")}, "main")
+    verifier = make_codec("ES256", {"main": generate_key("ES256")}, "main")
+
+    with pytest.raises(InvalidTokenError, match="Подпись"):
+        verifier.decode(signer.encode({"sub": "1"}))
+
+
+@pytest.mark.parametrize("alg", ["EdDSA", "HS256", "none"])
+def test_algorithm_from_header_is_not_trusted(alg):
+    codec = make_codec("ES256", {"main": generate_key("ES256")}, "main")
+    token = codec.encode({"sub": "1"})
+
+    with pytest.raises(InvalidTokenError, match="алгоритм"):
+        codec.decode(with_header(token, {"alg": alg, "typ": "JWT", "kid": "main"}))
+
+
+def test_key_of_other_algorithm_is_refused():
+    with pytest.raises(ValueError):
+        make_codec("EdDSA", {"main": generate_key("ES256")}, "main")
+
+
+def test_expired_token_is_rejected_after_leeway():
+    codec = make_codec("EdDSA", {"main": generate_key("EdDSA")}, "main")
+
+    assert codec.decode(codec.encode({"exp": time.time() - 10}))
+    with pytest.raises(ExpiredTokenError):
+        codec.decode(codec.encode({"exp": time.time() - 31}))
+
+
+def test_rotation_keeps_tokens_of_previous_key_valid():
+    old_key, new_key = generate_key("ES256"), generate_key("ES256")
+    before = make_codec("ES256", {"2025": old_key}, "2025")
+    token = before.encode({"sub": "1"})
+
+    # Новый активный ключ; от старого остался только публичный
+    after = make_codec("ES256", {"2026": new_key}, "2026", public_keys={"2025": old_key.public_key()})
+
+    assert after.decode(token) == {"sub": "1"}
+    assert json.loads(base64.urlsafe_b64decode(after.encode({}).split(".")[0] + "=="))["kid"] == "2026"
+    assert {key["kid"] for key in after.jwks()["keys"]} == {"2025", "2026"}
+
+
+def test_es256_token_verifies_with_published_jwk_in_jose():
+    codec = make_codec("ES256", {"main": generate_key("ES256")}, "main")
+    token = codec.encode({"sub": "1", "aud": "clients", "iss": "cube-bot", "exp": int(time.time()) + 60})
+    [published] = codec.jwks()["keys"]
+
+    assert published["kty"] == "EC" and published["crv"] == "P-256" and published["kid"] == "main"
+    assert jwt.decode(token, published, algorithms=["ES256"], audience="clients", issuer="cube-bot")["sub"] == "1"
+
+
+def test_eddsa_token_verifies_with_published_jwk():
+    # python-jose не поддерживает OKP: проверяем по RFC 8037 напрямую ключом из JWK
+    codec = make_codec("EdDSA", {"main": generate_key("EdDSA")}, "main")
+    token = codec.encode({"sub": "1"})
+    [published] = codec.jwks()["keys"]
+    header, payload, signature = token.split(".")
+
+    assert (published["kty"], published["crv"], published["alg"]) == ("OKP", "Ed25519", "EdDSA")
+    public_key = ed25519.Ed25519PublicKey.from_public_bytes(base64.urlsafe_b64decode(published["x"] + "="))
+    public_key.verify(base64.urlsafe_b64decode(signature + "=="), f"{header}.{payload}".encode())
+
+
+def test_jwks_endpoint_key_verifies_access_token(client, register, login, asymmetric_app):
+    register(1)
+    tokens = login(1)
+
+    response = client.get("/.well-known/jwks.json")
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == "public, max-age=300"
+    [published] = response.json()["keys"]
+
+    claims = jwt.decode(
+        tokens["access"], published, algorithms=["ES256"], audience=settings.JWT_AUDIENCE, issuer=settings.JWT_ISSUER
+    )
+    assert claims["sub"] == "1"
+    assert client.get("/v1/auth/me", headers={"X-Access-Token": tokens["access"]}).status_code == 200
+
+
+def test_jwks_endpoint_is_empty_for_hmac(client):
+    assert client.get("/.well-known/jwks.json").json() == {"keys": []}
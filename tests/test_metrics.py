@@ -0,0 +1,98 @@
+import os
+
+from app.utils.metrics import LATENCY_BUCKETS, MetricsFile, MetricsRegistry, UNMATCHED_ROUTE
+
+
+def scrape(client) -> dict[str, float]:
+    """Разбирает ответ /metrics в словарь "имя{метки}" -> значение."""
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    samples = {}
+    for line in response.text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    return samples
+
+
+def delta(before: dict[str, float], after: dict[str, float], name: str) -> float:
+    return after.get(name, 0) - before.get(name, 0)
+
+
+def test_requests_are_counted_by_route_and_status(client, register):
+    route = 'method="POST",route="/v1/user/register"'
+    before = scrape(client)
+
+    register(1)
+    client.post("/v1/user/register", json={"telegram_id": 2})
+    after = scrape(client)
+
+    assert delta(before, after, f'http_requests_total{{{route},status="2xx"}}') == 1
+    assert delta(before, after, f'http_requests_total{{{route},status="4xx"}}') == 1
+    assert delta(before, after, f"http_request_duration_seconds_count{{{route}}}") == 2
+    assert delta(before, after, f'http_request_duration_seconds_bucket{{{route},le="+Inf"}}') == 2
+    assert delta(before, after, f"http_request_db_queries_total{{{route}}}") >= 1
+
+
+def test_histogram_buckets_are_cumulative(client, register):
+    register(1)
+    samples = scrape(client)
+
+    route = 'method="POST",route="/v1/user/register"'
+    buckets = [samples[f'http_request_duration_seconds_bucket{{{route},le="{bound}"}}'] for bound in LATENCY_BUCKETS]
+    buckets.append(samples[f'http_request_duration_seconds_bucket{{{route},le="+Inf"}}'])
+    assert buckets == sorted(buckets)
+    assert buckets[-1] == samples[f"http_request_duration_seconds_count{{{route}}}"]
+
+
+def test_unknown_path_uses_unmatched_route(client):
+    before = scrape(client)
+
+    assert client.get("/no/such/path").status_code == 404
+    after = scrape(client)
+
+    assert delta(before, after, f'http_requests_total{{method="GET",route="{UNMATCHED_ROUTE}",status="4xx"}}') == 1
+
+
+def test_in_flight_counts_the_scrape_itself(client):
+    # Единственный запрос в обработке во время сбора — сам /metrics
+    assert scrape(client)["http_requests_in_flight"] == 1
+
+
+def test_metrics_file_observe_and_read(tmp_path):
+    path = str(tmp_path / "1.metrics")
+    metrics_file = MetricsFile(path, max_routes=2, pid=os.getpid())
+
+    metrics_file.observe("GET /a", 200, 0.003, 0.001, 2)
+    metrics_file.observe("GET /a", 503, 20.0, 0, 0)
+    metrics_file.observe("GET /b", 204, 0.0001, 0, 0)
+    # Маршрутов больше, чем слотов: лишние попадают в последний
+    metrics_file.observe("GET /c", 200, 0.0001, 0, 0)
+    metrics_file.add_in_flight(1)
+
+    pid, in_flight, slots = MetricsFile(path, max_routes=2).read()
+    assert pid == os.getpid()
+    assert in_flight == 1
+    assert set(slots) == {"GET /a", "GET /b"}
+    count, sum_us, db_sum_us, db_queries, *rest = slots["GET /a"]
+    statuses, buckets = rest[:5], rest[5:]
+    assert (count, sum_us, db_sum_us, db_queries) == (2, 20_003_000, 1000, 2)
+    assert statuses == [0, 1, 0, 0, 1]
+    assert buckets[LATENCY_BUCKETS.index(0.005)] == 1
+    assert buckets[-1] == 1
+    assert slots["GET /b"][0] == 2
+
+
+def test_registry_skips_in_flight_of_dead_workers(tmp_path):
+    registry = MetricsRegistry(str(tmp_path), max_routes=4)
+    registry.file.observe("GET /a", 200, 0.01, 0, 0)
+    # Файл завершившегося воркера: счетчики суммируются, запросы в обработке — нет
+    dead = MetricsFile(str(tmp_path / "999999999.metrics"), max_routes=4, pid=999_999_999)
+    dead.observe("GET /a", 200, 0.01, 0, 0)
+    dead.add_in_flight(5)
+
+    in_flight, totals = registry.collect()
+
+    assert in_flight == 0
+    assert totals["GET /a"][0] == 2
@@ -0,0 +1,78 @@
+import json
+
+import pytest
+
+from app.crud.user import UserDAO
+from app.db.session import async_session_maker
+from app.schemas.user import UserCreateModel
+
+pytestmark = pytest.mark.anyio
+
+
+async def seed_users(count: int) -> None:
+    async with async_session_maker() as session:
+        await UserDAO(session).add_many(
+            [UserCreateModel(telegram_id=1000 + i, username=f"user{i}") for i in range(1, count + 1)]
+        )
+        await session.commit()
+
+
+async def test_find_page_walks_all_rows_once(db):
+    await seed_users(25)
+    pages = []
+    after_id = None
+    async with async_session_maker() as session:
+        while True:
+            page = await UserDAO(session).find_page(after_id=after_id, limit=10)
+            pages.append([user.id for user in page])
+            if len(page) < 10:
+                break
+            after_id = page[-1].id
+
+    assert [len(page) for page in pages] == [10, 10, 5]
+    ids = [user_id for page in pages for user_id in page]
+    assert ids == sorted(ids)
+    assert len(set(ids)) == 25
+
+
+async def test_find_page_picks_up_rows_inserted_after_cursor(db):
+    await seed_users(10)
+    async with async_session_maker() as session:
+        first = await UserDAO(session).find_page(limit=5)
+    # Новая запись получает id больше курсора: попадает в следующие страницы и не сдвигает их
+    async with async_session_maker() as session:
+        await UserDAO(session).add(UserCreateModel(telegram_id=100, username="late"))
+        await session.commit()
+    async with async_session_maker() as session:
+        rest = await UserDAO(session).find_page(after_id=first[-1].id, limit=100)
+
+    assert [user.id for user in rest] == list(range(first[-1].id + 1, first[-1].id + 7))
+
+
+async def test_stream_all_yields_every_row_in_id_order(db):
+    await seed_users(23)
+    async with async_session_maker() as session:
+        ids = [user.id async for user in UserDAO(session).stream_all(batch_size=7)]
+
+    assert ids == list(range(1, 24))
+
+
+def test_admin_listing_follows_next_after_id(client, sql, register, login, promote):
+    register(1, "admin")
+    tokens = login(1)
+    promote(1)
+    for i in range(1, 6):
+        sql("INSERT INTO users (telegram_id, username, is_admin) VALUES (?, ?, 0)", 1000 + i, f"user{i}")
+
+    telegram_ids = []
+    params = {"limit": 4}
+    while True:
+        response = client.get("/v1/admin/users", params=params, headers={"X-Access-Token": tokens["access"]})
+        assert response.status_code == 200, response.text
+        telegram_ids += [json.loads(line)["telegram_id"] for line in response.text.splitlines()]
+        next_after_id = response.headers.get("X-Next-After-Id")
+        if next_after_id is None:
+            break
+        params["after_id"] = next_after_id
+
+    assert telegram_ids == [1, 1001, 1002, 1003, 1004, 1005]
@@ -0,0 +1,184 @@
+import pytest
+
+from app.constants.enums import Age
+from app.crud.user import ProgramDAO
+from app.db.session import async_session_maker
+from app.schemas.program import ProgramModel
+from app.services.program import ProgramIndex, age_range, program_catalog
+
+PROGRAMS = [
+    ProgramModel(program_name="Конструирование", min_age=5, max_age=7),
+    ProgramModel(program_name="Робототехника", min_age=6, max_age=12),
+    ProgramModel(program_name="Программирование", min_age=10, max_age=18),
+    ProgramModel(program_name="Олимпиада", min_age=13, max_age=13),
+]
+
+
+def names(programs) -> list[str]:
+    return [program["program_name"] if isinstance(program, dict) else program.program_name for program in programs]
+
+
+@pytest.fixture
+def programs(client, sql):
+    for program in PROGRAMS:
+        sql("INSERT INTO programs (program_name, min_age, max_age) VALUES (?, ?, ?)",
+            program.program_name, program.min_age, program.max_age)
+    client.portal.call(program_catalog.reload)
+    return PROGRAMS
+
+
+def match(client, **params):
+    return client.get("/v1/program/match", params=params)
+
+
+def test_age_range_parses_groups():
+    assert [age_range(age) for age in Age] == [(5, 7), (8, 12), (13, 18)]
+
+
+@pytest.mark.parametrize("age, expected", [
+    (0, []),
+    (4, []),
+    (5, ["Конструирование"]),
+    (6, ["Конструирование", "Робототехника"]),
+    (7, ["Конструирование", "Робототехника"]),
+    (8, ["Робототехника"]),
+    (10, ["Программирование", "Робототехника"]),
+    (12, ["Программирование", "Робототехника"]),
+    (13, ["Олимпиада", "Программирование"]),
+    (14, ["Программирование"]),
+    (18, ["Программирование"]),
+    (19, []),
+    (100, []),
+])
+def test_find_by_age_boundaries(age, expected):
+    assert names(ProgramIndex(PROGRAMS).find_by_age(age)) == expected
+
+
+def test_find_by_age_matches_linear_scan():
+    index = ProgramIndex(PROGRAMS)
+    for age in range(0, 101):
+        expected = sorted(p.program_name for p in PROGRAMS if p.min_age <= age <= p.max_age)
+        assert names(index.find_by_age(age)) == expected, age
+
+
+@pytest.mark.parametrize("group, expected", [
+    (Age.CHILD, ["Конструирование", "Робототехника"]),
+    (Age.PRE_TEEN, ["Программирование", "Робототехника"]),
+    (Age.TEENAGER, ["Олимпиада", "Программирование"]),
+])
+def test_find_by_group_overlapping_ranges(group, expected):
+    assert names(ProgramIndex(PROGRAMS).find_by_group(group)) == expected
+
+
+def test_empty_index():
+    index = ProgramIndex([])
+
+    assert index.find_by_age(10) == ()
+    assert all(index.find_by_group(age) == () for age in Age)
+
+
+def test_match_by_age(client, programs):
+    response = match(client, age=13)
+
+    assert response.status_code == 200
+    assert names(response.json()) == ["Олимпиада", "Программирование"]
+    assert response.headers["X-Query-Count"] == "0"
+
+
+def test_match_by_group(client, programs):
+    response = match(client, group=Age.PRE_TEEN.value)
+
+    assert response.status_code == 200
+    assert names(response.json()) == ["Программирование", "Робототехника"]
+    assert response.headers["X-Query-Count"] == "0"
+
+
+@pytest.mark.parametrize("params", [{}, {"age": 8, "group": Age.PRE_TEEN.value}])
+def test_match_requires_exactly_one_filter(client, programs, params):
+    assert match(client, **params).status_code == 400
+
+
+@pytest.mark.parametrize("params", [{"age": -1}, {"age": 101}, {"group": "8-12"}])
+def test_match_rejects_invalid_values(client, programs, params):
+    assert match(client, **params).status_code == 422
+
+
+def test_match_is_unavailable_until_catalog_loaded(client, programs, monkeypatch):
+    monkeypatch.setattr(program_catalog, "is_loaded", False)
+
+    assert match(client, age=10).status_code == 503
+
+
+def catalog(client, if_none_match: str | None = None):
+    headers = {"If-None-Match": if_none_match} if if_none_match is not None else {}
+    return client.get("/v1/program/catalog", headers=headers)
+
+
+def test_catalog_returns_programs_with_etag(client, programs):
+    response = catalog(client)
+
+    assert response.status_code == 200
+    assert names(response.json()) == sorted(program.program_name for program in PROGRAMS)
+    assert response.headers["ETag"] == program_catalog.snapshot.etag
+    assert response.headers["Cache-Control"] == "no-cache"
+    assert response.headers["X-Query-Count"] == "0"
+
+
+@pytest.mark.parametrize("if_none_match", [
+    "{etag}",
+    "W/{etag}",
+    '"stale", {etag}',
+    '"stale",W/{etag}',
+    "*",
+])
+def test_catalog_not_modified(client, programs, if_none_match):
+    etag = catalog(client).headers["ETag"]
+    response = catalog(client, if_none_match.format(etag=etag))
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+
+
+@pytest.mark.parametrize("if_none_match", ['"stale"', 'W/"stale"', ""])
+def test_catalog_sent_when_etag_differs(client, programs, if_none_match):
+    response = catalog(client, if_none_match)
+
+    assert response.status_code == 200
+    assert len(response.json()) == len(PROGRAMS)
+
+
+def test_catalog_changes_after_program_commit(client, programs):
+    old = catalog(client)
+    old_version = program_catalog.snapshot.version
+
+    async def add_program() -> None:
+        async with async_session_maker() as session:
+            await ProgramDAO(session).add(ProgramModel(program_name="Шахматы", min_age=7, max_age=9))
+            await session.commit()
+        # Перезагрузку запускает after_commit; дожидаемся ее, а не спим
+        await program_catalog._reload_task
+
+    client.portal.call(add_program)
+    new = catalog(client, old.headers["ETag"])
+
+    assert new.status_code == 200
+    assert new.headers["ETag"] != old.headers["ETag"]
+    assert "Шахматы" in names(new.json())
+    assert program_catalog.snapshot.version == old_version + 1
+    assert names(match(client, age=8).json()) == ["Робототехника", "Шахматы"]
+
+
+def test_reload_without_changes_keeps_version(client, programs):
+    snapshot = program_catalog.snapshot
+
+    client.portal.call(program_catalog.reload)
+
+    assert program_catalog.snapshot.etag == snapshot.etag
+    assert program_catalog.snapshot.version == snapshot.version
+
+
+def test_catalog_is_unavailable_until_loaded(client, programs, monkeypatch):
+    monkeypatch.setattr(program_catalog, "is_loaded", False)
+
+    assert catalog(client).status_code == 503
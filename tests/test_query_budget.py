@@ -0,0 +1,73 @@
+import pytest
+
+from app.api.v1 import admin, auth, user
+from app.core import settings
+from app.utils.query_accounting import QUERY_BUDGET_ATTRIBUTE, QueryBudgetExceeded, get_query_budget
+
+
+def assert_within_budget(response, endpoint) -> None:
+    assert response.status_code == 200, response.text
+    budget = get_query_budget(endpoint)
+    assert budget is not None
+    assert int(response.headers["X-Query-Count"]) <= budget
+
+
+def test_routes_stay_within_their_budgets(client, promote):
+    response = client.post("/v1/user/register", json={"telegram_id": 1, "username": "admin"})
+    assert_within_budget(response, user.create_user_listener)
+
+    response = client.post("/v1/auth/login", params={"telegram_id": 1}, headers={"User-Agent": "pytest"})
+    assert_within_budget(response, auth.login_listener)
+    access, refresh = response.headers["X-Access-Token"], response.headers["X-Refresh-Token"]
+    session_id = response.headers["X-Session-ID"]
+
+    # Повторный вход с тем же клиентом переиспользует активную сессию
+    response = client.post("/v1/auth/login", params={"telegram_id": 1}, headers={"User-Agent": "pytest"})
+    assert_within_budget(response, auth.login_listener)
+    assert response.headers["X-Session-ID"] == session_id
+
+    assert_within_budget(client.get("/v1/auth/me", headers={"X-Access-Token": access}), auth.get_user_listener)
+
+    response = client.patch(
+        "/v1/user/update", json={"username": "admin", "is_admin": False}, headers={"X-Access-Token": access}
+    )
+    assert_within_budget(response, user.update_user_listener)
+    promote(1)
+
+    for path, endpoint in (
+        ("/v1/admin/users", admin.list_users_listener),
+        ("/v1/admin/sessions", admin.list_sessions_listener),
+    ):
+        assert_within_budget(client.get(path, headers={"X-Access-Token": access}), endpoint)
+
+    response = client.get("/v1/auth/refresh", headers={"X-Refresh-Token": refresh, "User-Agent": "pytest"})
+    assert_within_budget(response, auth.refresh_tokens_listener)
+    access = response.headers["X-Access-Token"]
+
+    response = client.post("/v1/auth/logout", headers={"X-Access-Token": access})
+    assert_within_budget(response, auth.logout_listener)
+
+    access = client.post("/v1/auth/login", params={"telegram_id": 1}).headers["X-Access-Token"]
+    response = client.delete("/v1/user/delete", headers={"X-Access-Token": access})
+    assert_within_budget(response, user.delete_user_listener)
+
+
+def test_budget_overrun_raises_in_strict_mode(client, register, login, monkeypatch):
+    register(1)
+    tokens = login(1)
+    monkeypatch.setattr(auth.get_user_listener, QUERY_BUDGET_ATTRIBUTE, 0)
+    # Первый запрос читает сессию из БД, поэтому бюджет 0 превышен
+    with pytest.raises(QueryBudgetExceeded):
+        client.get("/v1/auth/me", headers={"X-Access-Token": tokens["access"]})
+
+
+def test_budget_overrun_is_only_logged_without_strict_mode(client, register, login, monkeypatch):
+    register(1)
+    tokens = login(1)
+    monkeypatch.setattr(auth.get_user_listener, QUERY_BUDGET_ATTRIBUTE, 0)
+    monkeypatch.setattr(settings, "QUERY_BUDGET_STRICT", False)
+
+    response = client.get("/v1/auth/me", headers={"X-Access-Token": tokens["access"]})
+
+    assert response.status_code == 200
+    assert response.headers["X-Query-Count"] == "1"
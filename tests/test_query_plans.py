@@ -0,0 +1,71 @@
+import re
+import sqlite3
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.services.session_janitor import SessionJanitor
+from benchmarks.seed import TELEGRAM_ID_OFFSET, USER_AGENTS, seed_database
+
+USERS = 2_000
+SESSIONS_PER_USER = 10
+# Полный проход по таблице; частичный индекс допустим — в нем только строки, которые нужно найти
+FULL_SCAN = re.compile(r"^SCAN (users|user_sessions)\b(?! USING (COVERING )?INDEX ix_user_sessions_inactive_id)")
+
+
+@pytest.fixture
+def captured():
+    """Запросы, которые приложение реально отправляет в базу, сгруппированные по шагам сценария."""
+    statements: list[tuple[str, str, tuple]] = []
+    step = {"name": ""}
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((step["name"], statement, tuple(parameters or ())))
+
+    event.listen(Engine, "before_cursor_execute", capture)
+    yield step, statements
+    event.remove(Engine, "before_cursor_execute", capture)
+
+
+def test_auth_and_janitor_queries_do_not_scan_tables(client, database_path, captured):
+    seed_database(database_path, USERS, SESSIONS_PER_USER)
+    telegram_id = TELEGRAM_ID_OFFSET + USERS // 2
+    step, statements = captured
+
+    step["name"] = "login"
+    response = client.post("/v1/auth/login", params={"telegram_id": telegram_id}, headers={"User-Agent": USER_AGENTS[0]})
+    assert response.status_code == 200, response.text
+    access_token, refresh_token = response.headers["X-Access-Token"], response.headers["X-Refresh-Token"]
+
+    step["name"] = "me"
+    response = client.get("/v1/auth/me", headers={"X-Access-Token": access_token})
+    assert response.status_code == 200, response.text
+
+    step["name"] = "refresh"
+    response = client.get("/v1/auth/refresh", headers={"X-Refresh-Token": refresh_token, "User-Agent": USER_AGENTS[0]})
+    assert response.status_code == 200, response.text
+
+    step["name"] = "logout"
+    response = client.post("/v1/auth/logout", headers={"X-Access-Token": response.headers["X-Access-Token"]})
+    assert response.status_code == 200, response.text
+
+    step["name"] = "janitor"
+    janitor = SessionJanitor(batch_size=5_000, pause_seconds=0, interval_seconds=60, max_run_seconds=60)
+    assert client.portal.call(janitor.run_once) > 0
+
+    steps = {name for name, statement, _ in statements if "user_sessions" in statement}
+    assert steps == {"login", "me", "refresh", "logout", "janitor"}
+
+    connection = sqlite3.connect(database_path)
+    try:
+        full_scans = []
+        for name, statement, parameters in statements:
+            if not re.match(r"\s*(SELECT|INSERT|UPDATE|DELETE)", statement, re.IGNORECASE):
+                continue
+            plan = [row[3] for row in connection.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+            full_scans += [(name, statement, step) for step in plan if FULL_SCAN.match(step)]
+    finally:
+        connection.close()
+
+    assert full_scans == []
@@ -0,0 +1,45 @@
+import pytest
+
+from app.core import settings
+from app.depends import rate_limit_dep
+from app.utils.rate_limit import TokenBucketTable
+
+
+def test_refund_returns_token_up_to_burst():
+    table = TokenBucketTable(rate_per_second=0.001, burst=2, max_keys=10, shards=1)
+    assert table.acquire("key") == 0.0
+    assert table.acquire("key") == 0.0
+    assert table.acquire("key") > 0
+
+    table.refund("key")
+    table.refund("key")
+    table.refund("key")
+
+    assert table.acquire("key") == 0.0
+    assert table.acquire("key") == 0.0
+    assert table.acquire("key") > 0
+
+
+@pytest.fixture
+def limiters(monkeypatch):
+    telegram_id_limiter = TokenBucketTable(rate_per_second=0.001, burst=2, max_keys=10, shards=1)
+    ip_limiter = TokenBucketTable(rate_per_second=0.001, burst=1, max_keys=10, shards=1)
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(rate_limit_dep, "telegram_id_limiter", telegram_id_limiter)
+    monkeypatch.setattr(rate_limit_dep, "ip_limiter", ip_limiter)
+    return telegram_id_limiter, ip_limiter
+
+
+def test_ip_limit_does_not_drain_telegram_id_bucket(client, register, limiters):
+    telegram_id_limiter, _ = limiters
+    register(1)
+    assert client.post("/v1/auth/login", params={"telegram_id": 1}).status_code == 200
+
+    # IP исчерпан: отказы не должны забирать оставшийся токен пользователя
+    for _ in range(3):
+        response = client.post("/v1/auth/login", params={"telegram_id": 1})
+        assert response.status_code == 429
+        assert "Retry-After" in response.headers
+
+    assert telegram_id_limiter.acquire(("login", "1")) == 0.0
+    assert telegram_id_limiter.stats()["allowed"] == 2
@@ -0,0 +1,36 @@
+import pytest
+from sqlalchemy import select
+
+from app.db.session import read_session_maker
+from app.models.user import User
+from app.utils.query_accounting import count_queries
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_sequential_reads_release_connection_and_keep_objects(db, sql):
+    sql("INSERT INTO users (telegram_id, username, is_admin) VALUES (1, 'ivan', 0), (2, 'kate', 1)")
+
+    async with read_session_maker() as session:
+        with count_queries() as stats:
+            first = await session.scalar(select(User).filter_by(telegram_id=1))
+            assert not session.in_transaction()
+            second = (await session.execute(select(User).filter_by(telegram_id=2))).scalar_one()
+            assert not session.in_transaction()
+
+            # После освобождения значения доступны без нового запроса (expire_on_commit=False)
+            assert (first.telegram_id, first.username, first.is_admin) == (1, "ivan", False)
+            assert (second.telegram_id, second.username, second.is_admin) == (2, "kate", True)
+
+    assert stats.count == 2
+
+
+async def test_transaction_with_writes_is_not_released(db, sql):
+    async with read_session_maker() as session:
+        session.add(User(telegram_id=1, username="ivan", is_admin=False))
+        await session.execute(select(User).filter_by(telegram_id=1))
+
+        assert session.in_transaction()
+
+    # Сессию для чтения никто не коммитит: запись откатывается при закрытии
+    assert sql("SELECT COUNT(*) FROM users") == [(0,)]
@@ -0,0 +1,127 @@
+import asyncio
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.crud.user import UserSessionDAO
+from app.db import Base
+from app.db.session import DATABASE_URL
+from app.models.user import User, UserSession
+
+pytestmark = pytest.mark.anyio
+
+# PostgreSQL проверяется, только если задана отдельная тестовая база: ее таблицы пересоздаются
+POSTGRES_URL = os.environ.get("TEST_POSTGRES_URL")
+
+
+@pytest.fixture(params=["sqlite", "postgresql"])
+async def session_maker(request):
+    if request.param == "postgresql":
+        if not POSTGRES_URL:
+            pytest.skip("TEST_POSTGRES_URL не задан")
+        engine = create_async_engine(POSTGRES_URL)
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.drop_all)
+            await connection.run_sync(Base.metadata.create_all)
+    else:
+        engine = create_async_engine(DATABASE_URL)
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    if request.param == "postgresql":
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.drop_all)
+    await engine.dispose()
+
+
+async def create_session(session_maker, telegram_id: int, expires_in: timedelta, is_active: bool = True) -> str:
+    now = datetime.now(timezone.utc)
+    session_id = str(uuid.uuid4())
+    async with session_maker() as session:
+        user = (await session.execute(select(User).filter_by(telegram_id=telegram_id))).scalar_one_or_none()
+        if user is None:
+            user = User(telegram_id=telegram_id, username=f"user{telegram_id}", is_admin=False)
+            session.add(user)
+            await session.flush()
+        session.add(UserSession(
+            id=session_id, user_id=user.id, user_agent="pytest",
+            created_at=now, expires_at=now + expires_in, is_active=is_active,
+        ))
+        await session.commit()
+    return session_id
+
+
+async def rotate(session_maker, session_id: str, telegram_id: int):
+    now = datetime.now(timezone.utc)
+    new_session_id = str(uuid.uuid4())
+    async with session_maker() as session:
+        record = await UserSessionDAO(session).rotate(
+            session_id=session_id,
+            telegram_id=telegram_id,
+            new_session_id=new_session_id,
+            user_agent="pytest",
+            now=now,
+            expires_at=now + timedelta(days=30),
+        )
+        await session.commit()
+    return record, new_session_id
+
+
+async def session_states(session_maker) -> dict[str, bool]:
+    async with session_maker() as session:
+        rows = (await session.execute(select(UserSession.id, UserSession.is_active))).all()
+    return dict(rows)
+
+
+async def test_rotate_replaces_active_session(session_maker):
+    session_id = await create_session(session_maker, telegram_id=1, expires_in=timedelta(days=1))
+
+    record, new_session_id = await rotate(session_maker, session_id, telegram_id=1)
+
+    assert record is not None
+    assert record.user_id == 1
+    assert await session_states(session_maker) == {session_id: False, new_session_id: True}
+
+
+async def test_rotate_same_session_twice_succeeds_once(session_maker):
+    session_id = await create_session(session_maker, telegram_id=1, expires_in=timedelta(days=1))
+
+    first, _ = await rotate(session_maker, session_id, telegram_id=1)
+    second, second_session_id = await rotate(session_maker, session_id, telegram_id=1)
+
+    assert first is not None
+    assert second is None
+    assert second_session_id not in await session_states(session_maker)
+
+
+async def test_concurrent_rotations_create_one_session(session_maker):
+    if session_maker.kw["bind"].dialect.name == "sqlite":
+        pytest.skip("SQLite сериализует запись на уровне файла, гонка проверяется на PostgreSQL")
+    session_id = await create_session(session_maker, telegram_id=1, expires_in=timedelta(days=1))
+
+    results = await asyncio.gather(*(rotate(session_maker, session_id, telegram_id=1) for _ in range(5)))
+
+    assert sum(record is not None for record, _ in results) == 1
+    assert list((await session_states(session_maker)).values()).count(True) == 1
+
+
+@pytest.mark.parametrize(
+    ("expires_in", "is_active", "telegram_id"),
+    [
+        (timedelta(days=-1), True, 1),
+        (timedelta(days=1), False, 1),
+        (timedelta(days=1), True, 2),
+    ],
+    ids=["expired", "inactive", "foreign"],
+)
+async def test_rotate_rejects_invalid_session(session_maker, expires_in, is_active, telegram_id):
+    await create_session(session_maker, telegram_id=2, expires_in=timedelta(days=1))
+    session_id = await create_session(session_maker, telegram_id=1, expires_in=expires_in, is_active=is_active)
+    before = await session_states(session_maker)
+
+    record, _ = await rotate(session_maker, session_id, telegram_id=telegram_id)
+
+    assert record is None
+    assert await session_states(session_maker) == before
@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+
+from app.db.session import async_session_maker
+from app.models.user import User, UserSession
+from app.services.session_janitor import SessionJanitor
+
+pytestmark = pytest.mark.anyio
+
+
+async def seed_sessions(expired: int, inactive: int, active: int, expired_for: timedelta) -> set[str]:
+    """Создает сессии трех видов и возвращает id активных, которые должны пережить очистку."""
+    now = datetime.now(timezone.utc)
+    async with async_session_maker() as session:
+        user = User(telegram_id=1, username="ivan", is_admin=False)
+        session.add(user)
+        await session.flush()
+        rows = (
+            [(f"expired-{i}", now - expired_for - timedelta(seconds=i), True) for i in range(expired)]
+            + [(f"inactive-{i}", now + timedelta(days=1), False) for i in range(inactive)]
+            + [(f"active-{i}", now + timedelta(days=1), True) for i in range(active)]
+        )
+        session.add_all(
+            UserSession(id=session_id, user_id=user.id, user_agent=session_id, expires_at=expires_at,
+                        is_active=is_active)
+            for session_id, expires_at, is_active in rows
+        )
+        await session.commit()
+    return {f"active-{i}" for i in range(active)}
+
+
+async def remaining_sessions() -> set[str]:
+    async with async_session_maker() as session:
+        return set((await session.scalars(select(UserSession.id))).all())
+
+
+async def test_run_purges_expired_and_inactive_in_batches(db):
+    active = await seed_sessions(expired=5, inactive=4, active=3, expired_for=timedelta(hours=1))
+    janitor = SessionJanitor(batch_size=2, pause_seconds=0, interval_seconds=60, max_run_seconds=60)
+
+    purged = await janitor.run_once()
+
+    assert purged == 9
+    assert await remaining_sessions() == active
+    snapshot = janitor.snapshot()
+    assert snapshot["rows_purged_total"] == 9
+    assert snapshot["last_run_rows"] == 9
+    assert snapshot["runs"] == 1
+    assert snapshot["lag_seconds"] == 0
+
+
+async def test_lag_reports_oldest_expired_session_left(db):
+    await seed_sessions(expired=3, inactive=0, active=1, expired_for=timedelta(hours=1))
+    # Прогон без времени на удаление: остается только замер отставания
+    janitor = SessionJanitor(batch_size=2, pause_seconds=0, interval_seconds=60, max_run_seconds=0)
+
+    assert await janitor.run_once() == 0
+    assert 3600 + 2 <= janitor.lag_seconds < 3600 + 60
+
+    janitor._max_run_seconds = 60
+    assert await janitor.run_once() == 3
+    assert janitor.rows_purged_total == 3
+    assert janitor.lag_seconds == 0
+    assert janitor.runs == 2
@@ -0,0 +1,160 @@
+import multiprocessing
+import os
+import time
+import uuid
+from multiprocessing import shared_memory
+
+import pytest
+
+from app.utils.session_table import SessionStateTable, UserChangeTable, _HEADER, _SEQ
+
+
+@pytest.fixture
+def table_name():
+    name = f"cube_bot_sessions_test_{os.getpid()}_{uuid.uuid4().hex[:8]}"
+    yield name
+    try:
+        shared_memory.SharedMemory(name=name).unlink()
+    except FileNotFoundError:
+        pass
+
+
+def test_lookup_returns_written_state(table_name):
+    table = SessionStateTable(name=table_name, capacity=64)
+    expires_at = time.time() + 60
+
+    table.mark_active("active", 1, expires_at)
+    table.mark_revoked("revoked", 2, expires_at)
+
+    active = table.lookup("active")
+    assert active.is_active and active.telegram_id == 1 and active.expires_at == int(expires_at)
+    assert not table.lookup("revoked").is_active
+    assert table.lookup("missing") is None
+
+
+def test_expired_entry_is_a_miss(table_name):
+    table = SessionStateTable(name=table_name, capacity=64)
+    table.mark_active("expired", 1, time.time() - 1)
+
+    assert table.lookup("expired") is None
+
+
+def test_slot_being_written_is_a_miss(table_name):
+    table = SessionStateTable(name=table_name, capacity=64)
+    table.mark_active("sid", 1, time.time() + 60)
+    offset = next(table._probe(table._digest("sid")))
+    seq = _SEQ.unpack_from(table._shm.buf, offset)[0]
+
+    # Нечетный seq — запись в слот еще идет
+    _SEQ.pack_into(table._shm.buf, offset, seq + 1)
+    assert table.lookup("sid") is None
+
+    _SEQ.pack_into(table._shm.buf, offset, seq + 2)
+    assert table.lookup("sid").is_active
+
+
+def test_other_worker_sees_writes_and_reset(table_name):
+    writer = SessionStateTable(name=table_name, capacity=64)
+    reader = SessionStateTable(name=table_name, capacity=64)
+    writer.mark_revoked("sid", 1, time.time() + 60)
+
+    assert reader.lookup("sid").is_active is False
+
+    writer.reset()
+    # После сброса другим воркером первое чтение переподключает сегмент и считается промахом
+    assert reader.is_stale()
+    assert reader.lookup("sid") is None
+    assert reader.generation == writer.generation
+    assert not reader.is_stale()
+
+
+def test_full_probe_chain_evicts_earliest_expiry(table_name):
+    table = SessionStateTable(name=table_name, capacity=8)
+    now = time.time()
+    for i in range(8):
+        table.mark_active(f"sid{i}", i, now + 100 + i)
+
+    table.mark_active("new", 100, now + 1000)
+
+    assert table.lookup("new").telegram_id == 100
+    assert table.lookup("sid0") is None
+    assert sum(table.lookup(f"sid{i}") is not None for i in range(8)) == 7
+
+
+def _write_forever(name: str, capacity: int, base: int, stop) -> None:
+    table = SessionStateTable(name=name, capacity=capacity)
+    i = 0
+    while not stop.is_set():
+        i += 1
+        # Пара (telegram_id, expires_at) всегда согласована: expires_at - telegram_id == base
+        table.mark_active("contended", i, base + i)
+
+
+def test_concurrent_reader_never_sees_torn_slot(table_name):
+    base = int(time.time()) + 3600
+    table = SessionStateTable(name=table_name, capacity=64)
+    table.mark_active("contended", 0, base)
+    stop = multiprocessing.Event()
+    writer = multiprocessing.Process(target=_write_forever, args=(table_name, 64, base, stop))
+    writer.start()
+    try:
+        hits = 0
+        deadline = time.monotonic() + 1.0
+        while time.monotonic() < deadline:
+            state = table.lookup("contended")
+            if state is not None:
+                hits += 1
+                assert state.expires_at - state.telegram_id == base
+        assert hits > 0
+        assert _HEADER.unpack_from(table._shm.buf, 0)[3] > 1
+    finally:
+        stop.set()
+        writer.join(timeout=5)
+
+
+def test_rewrite_replaces_key_further_down_the_chain(table_name):
+    # Две ячейки — одна цепочка на все ключи; порядок ключей в ней зависит от хеша, поэтому
+    # последовательность повторяется на нескольких таблицах
+    tables = [SessionStateTable(name=f"{table_name}_{i}", capacity=2) for i in range(8)]
+    try:
+        expires_soon = int(time.time()) + 1
+        for table in tables:
+            table.mark_active("short", 1, expires_soon)
+            table.mark_active("session", 2, time.time() + 100)
+        while int(time.time()) < expires_soon:
+            time.sleep(0.05)
+
+        for table in tables:
+            table.mark_revoked("session", 2, time.time() + 50)
+            # Новая запись вытесняет ту, что истекает раньше, — отметку об отзыве
+            table.mark_active("other", 3, time.time() + 100)
+
+        for table in tables:
+            state = table.lookup("session")
+            assert state is None or not state.is_active
+    finally:
+        for i in range(len(tables)):
+            shared_memory.SharedMemory(name=f"{table_name}_{i}").unlink()
+
+
+def test_user_change_table_keeps_latest_change(table_name):
+    table = UserChangeTable(name=table_name, capacity=64)
+
+    assert table.changed_at(1) is None
+    table.mark_changed(1, 1_000, time.time() + 60)
+    table.mark_changed(1, 2_000, time.time() + 60)
+    table.mark_changed(2, 3_000, time.time() - 1)
+
+    assert table.changed_at(1) == 2_000
+    assert table.changed_at(2) is None
+
+
+def test_segment_of_other_table_kind_is_recreated(table_name):
+    sessions = SessionStateTable(name=table_name, capacity=64)
+    sessions.mark_active("1", 1, time.time() + 60)
+
+    # Таблица другого назначения под тем же именем не читает чужие слоты
+    changes = UserChangeTable(name=table_name, capacity=64)
+
+    assert changes.changed_at(1) is None
+    assert sessions.lookup("1") is None
@@ -0,0 +1,160 @@
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.crud.user import UserDAO
+from app.db import Base
+from app.db.routing import READ_PRIMARY_KEY, Replica, RoutingSession
+from app.db.session import async_session_maker
+from app.utils.query_accounting import count_queries
+from app.utils.single_flight import SingleFlight
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_concurrent_calls_share_one_load():
+    flight = SingleFlight()
+    calls = 0
+    release = asyncio.Event()
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return "value"
+
+    tasks = [asyncio.create_task(flight.run("key", load)) for _ in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*tasks)
+
+    assert calls == 1
+    assert sorted(is_shared for _, is_shared in results) == [False, True, True, True, True]
+    assert {value for value, _ in results} == {"value"}
+    assert flight.stats() == {"in_flight": 0, "queries": 1, "saved": 4}
+
+
+async def test_next_call_after_completion_loads_again():
+    flight = SingleFlight()
+
+    async def load():
+        return object()
+
+    first, _ = await flight.run("key", load)
+    second, is_shared = await flight.run("key", load)
+
+    assert first is not second
+    assert not is_shared
+
+
+async def test_error_is_raised_in_every_waiter():
+    flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def load():
+        await release.wait()
+        raise ValueError("boom")
+
+    tasks = [asyncio.create_task(flight.run("key", load)) for _ in range(3)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    assert all(isinstance(result, ValueError) for result in results)
+    assert flight.stats()["in_flight"] == 0
+
+
+async def test_cancelled_leader_lets_waiter_load_itself():
+    flight = SingleFlight()
+    leader_started = asyncio.Event()
+    calls = 0
+
+    async def slow_load():
+        nonlocal calls
+        calls += 1
+        leader_started.set()
+        await asyncio.sleep(10)
+
+    async def fast_load():
+        nonlocal calls
+        calls += 1
+        return "value"
+
+    leader = asyncio.create_task(flight.run("key", slow_load))
+    await leader_started.wait()
+    waiter = asyncio.create_task(flight.run("key", fast_load))
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    assert await waiter == ("value", False)
+    assert calls == 2
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+
+
+async def test_cancelled_waiter_does_not_cancel_leader():
+    flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def load():
+        await release.wait()
+        return "value"
+
+    leader = asyncio.create_task(flight.run("key", load))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(flight.run("key", load))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    release.set()
+
+    assert await leader == ("value", False)
+
+
+async def test_concurrent_user_lookups_run_one_query(db, sql):
+    sql("INSERT INTO users (telegram_id, username, is_admin) VALUES (1, 'ivan', 0)")
+
+    async def lookup():
+        async with async_session_maker() as session:
+            user = await UserDAO(session).find_one_or_none_by_telegram_id(1)
+            # Объект принадлежит своей сессии, даже если значения получены от другого вызова
+            assert user in session
+            return user.username
+
+    with count_queries() as stats:
+        usernames = await asyncio.gather(*(lookup() for _ in range(5)))
+
+    assert usernames == ["ivan"] * 5
+    assert stats.count == 1
+
+
+async def test_primary_read_is_not_coalesced_with_replica_read(db, sql, database_path, tmp_path):
+    sql("INSERT INTO users (telegram_id, username, is_admin) VALUES (1, 'ivan', 0)")
+    # Реплика отстает: пользователя в ней еще нет
+    replica_path = tmp_path / "replica.sqlite3"
+    replica_sync_engine = create_engine(f"sqlite:///{replica_path}")
+    Base.metadata.create_all(replica_sync_engine)
+    replica_sync_engine.dispose()
+    replica = Replica(create_async_engine(f"sqlite+aiosqlite:///{replica_path}"), retry_seconds=60)
+    primary_engine = create_async_engine(f"sqlite+aiosqlite:///{database_path}")
+    session_maker = async_sessionmaker(
+        primary_engine, expire_on_commit=False, sync_session_class=RoutingSession, replica=replica
+    )
+
+    async def lookup(is_primary: bool):
+        async with session_maker() as session:
+            if is_primary:
+                session.info[READ_PRIMARY_KEY] = True
+            user = await UserDAO(session).find_one_or_none_by_telegram_id(1)
+            return user.username if user else None
+
+    try:
+        with count_queries() as stats:
+            usernames = await asyncio.gather(lookup(is_primary=False), lookup(is_primary=True))
+    finally:
+        await primary_engine.dispose()
+        await replica.engine.dispose()
+
+    assert usernames == [None, "ivan"]
+    assert stats.count == 2
@@ -0,0 +1,85 @@
+import time
+
+from app.constants.enums import TokenType
+from app.services.auth import VerifiedTokenCache, token_cache
+
+
+def payload(session_id: str, expires_in: float = 60) -> dict:
+    return {"sid": session_id, "exp": time.time() + expires_in}
+
+
+def test_entry_lives_until_token_exp():
+    cache = VerifiedTokenCache(max_size=10)
+    cache.put("fresh", TokenType.ACCESS_TOKEN, payload("a"))
+    cache.put("expired", TokenType.ACCESS_TOKEN, payload("b", expires_in=-1))
+
+    assert cache.get("fresh", TokenType.ACCESS_TOKEN) is not None
+    assert cache.get("fresh", TokenType.REFRESH_TOKEN) is None
+    assert cache.get("expired", TokenType.ACCESS_TOKEN) is None
+    assert cache.stats() == {"size": 1, "hits": 1, "misses": 2}
+
+
+def test_oldest_entry_is_evicted_when_full():
+    cache = VerifiedTokenCache(max_size=2)
+    cache.put("first", TokenType.ACCESS_TOKEN, payload("a"))
+    cache.put("second", TokenType.ACCESS_TOKEN, payload("b"))
+    cache.get("first", TokenType.ACCESS_TOKEN)
+
+    cache.put("third", TokenType.ACCESS_TOKEN, payload("c"))
+
+    assert cache.get("second", TokenType.ACCESS_TOKEN) is None
+    assert cache.get("first", TokenType.ACCESS_TOKEN) is not None
+
+
+def test_evict_session_drops_all_its_tokens():
+    cache = VerifiedTokenCache(max_size=10)
+    cache.put("access", TokenType.ACCESS_TOKEN, payload("a"))
+    cache.put("refresh", TokenType.REFRESH_TOKEN, payload("a"))
+    cache.put("other", TokenType.ACCESS_TOKEN, payload("b"))
+
+    cache.evict_session("a")
+
+    assert cache.get("access", TokenType.ACCESS_TOKEN) is None
+    assert cache.get("refresh", TokenType.REFRESH_TOKEN) is None
+    assert cache.get("other", TokenType.ACCESS_TOKEN) is not None
+
+
+def test_refresh_evicts_old_session_tokens(client, register, login):
+    register(1)
+    tokens = login(1)
+    assert client.get("/v1/auth/me", headers={"X-Access-Token": tokens["access"]}).status_code == 200
+    assert token_cache.get(tokens["access"], TokenType.ACCESS_TOKEN) is not None
+
+    response = client.get("/v1/auth/refresh", headers={"X-Refresh-Token": tokens["refresh"], "User-Agent": "pytest"})
+    assert response.status_code == 200, response.text
+
+    assert token_cache.get(tokens["access"], TokenType.ACCESS_TOKEN) is None
+    assert token_cache.get(tokens["refresh"], TokenType.REFRESH_TOKEN) is None
+    assert client.get("/v1/auth/me", headers={"X-Access-Token": tokens["access"]}).status_code == 403
+    new_access = response.headers["X-Access-Token"]
+    assert client.get("/v1/auth/me", headers={"X-Access-Token": new_access}).status_code == 200
+
+
+def test_logout_evicts_session_tokens(client, register, login):
+    register(1)
+    tokens = login(1)
+    assert client.get("/v1/auth/me", headers={"X-Access-Token": tokens["access"]}).status_code == 200
+
+    response = client.post("/v1/auth/logout", headers={"X-Access-Token": tokens["access"]})
+    assert response.status_code == 200, response.text
+
+    assert token_cache.get(tokens["access"], TokenType.ACCESS_TOKEN) is None
+    assert client.get("/v1/auth/me", headers={"X-Access-Token": tokens["access"]}).status_code == 403
+
+
+def test_health_reports_cache_counters(client, register, login):
+    register(1)
+    tokens = login(1)
+    before = client.get("/health/token-cache").json()["token_cache"]
+    for _ in range(3):
+        client.get("/v1/auth/me", headers={"X-Access-Token": tokens["access"]})
+
+    after = client.get("/health/token-cache").json()["token_cache"]
+
+    assert after["size"] == 1
+    assert (after["hits"] - before["hits"], after["misses"] - before["misses"]) == (2, 1)
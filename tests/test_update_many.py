@@ -0,0 +1,53 @@
+from typing import Optional
+
+import pytest
+from pydantic import BaseModel
+
+from app.crud.user import UserDAO
+from app.db.session import async_session_maker
+from app.utils.query_accounting import count_queries
+
+pytestmark = pytest.mark.anyio
+
+
+class UserValues(BaseModel):
+    username: Optional[str] = None
+    is_admin: Optional[bool] = None
+
+
+async def test_update_many_applies_values_per_id_in_chunks(db, sql):
+    for telegram_id, username in ((1, "ivan"), (2, "kate"), (3, "olga"), (4, "petr")):
+        sql("INSERT INTO users (telegram_id, username, is_admin) VALUES (?, ?, 0)", telegram_id, username)
+
+    async with async_session_maker() as session:
+        with count_queries() as stats:
+            records = await UserDAO(session).update_many(
+                {
+                    1: UserValues(username="ivan2"),
+                    2: UserValues(is_admin=True),
+                    3: UserValues(username="olga2", is_admin=True),
+                },
+                chunk_size=2,
+            )
+        await session.commit()
+
+    # Одна инструкция UPDATE ... CASE на каждую пачку из chunk_size id
+    assert stats.count == 2
+    assert sorted((record.id, record.username, record.is_admin) for record in records) == [
+        (1, "ivan2", False), (2, "kate", True), (3, "olga2", True),
+    ]
+    # Колонки, не заданные для записи, и записи вне набора не меняются
+    assert sql("SELECT id, username, is_admin FROM users ORDER BY id") == [
+        (1, "ivan2", 0), (2, "kate", 1), (3, "olga2", 1), (4, "petr", 0),
+    ]
+
+
+async def test_update_many_skips_empty_values(db, sql):
+    sql("INSERT INTO users (telegram_id, username, is_admin) VALUES (1, 'ivan', 0)")
+
+    async with async_session_maker() as session:
+        with count_queries() as stats:
+            records = await UserDAO(session).update_many({1: UserValues()})
+
+    assert records == []
+    assert stats.count == 0
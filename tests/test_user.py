@@ -0,0 +1,48 @@
+from app.crud.user import user_index
+
+
+def test_delete_returns_deleted_user_and_removes_sessions(client, register, login, sql):
+    register(1)
+    tokens = login(1)
+
+    response = client.delete("/v1/user/delete", headers={"X-Access-Token": tokens["access"]})
+
+    assert response.status_code == 200, response.text
+    assert response.json() == {"telegram_id": 1, "username": "ivan", "is_admin": False, "is_deleted": True}
+    assert sql("SELECT COUNT(*) FROM users") == [(0,)]
+    assert sql("SELECT COUNT(*) FROM user_sessions") == [(0,)]
+    assert user_index.get(1) is None
+    assert client.post("/v1/auth/login", params={"telegram_id": 1}).status_code == 404
+    assert client.get("/v1/auth/me", headers={"X-Access-Token": tokens["access"]}).status_code == 404
+
+
+def test_deleted_admin_loses_admin_access(client, register, login, promote):
+    register(1, "admin")
+    tokens = login(1)
+    promote(1)
+    headers = {"X-Access-Token": tokens["access"]}
+    assert client.get("/v1/admin/users", headers=headers).status_code == 200
+
+    assert client.delete("/v1/user/delete", headers=headers).status_code == 200
+
+    assert client.get("/v1/admin/users", headers=headers).status_code == 404
+
+
+def test_user_cannot_grant_admin_to_self(client, register, login):
+    register(1)
+    headers = {"X-Access-Token": login(1)["access"]}
+
+    response = client.patch("/v1/user/update", json={"username": "ivan", "is_admin": True}, headers=headers)
+
+    assert response.status_code == 403
+    assert client.get("/v1/auth/me", headers=headers).json()["is_admin"] is False
+
+
+def test_admin_can_grant_admin(client, register, login, promote):
+    register(1, "admin")
+    headers = {"X-Access-Token": login(1)["access"]}
+    promote(1)
+
+    response = client.patch("/v1/user/update", json={"username": "admin", "is_admin": True}, headers=headers)
+
+    assert response.status_code == 200, response.text
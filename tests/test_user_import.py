@@ -0,0 +1,82 @@
+import pytest
+
+from app.constants.enums import ImportStatus
+from app.db.session import async_session_maker
+from app.services.user import import_users
+
+pytestmark = pytest.mark.anyio
+
+
+async def lines_of(text: str):
+    for line in text.split("\n"):
+        yield line
+
+
+async def run_import(text: str, is_csv: bool = False):
+    async with async_session_maker() as session:
+        report = await import_users(lines=lines_of(text), is_csv=is_csv, session=session)
+        await session.commit()
+    return report
+
+
+async def test_import_skips_existing_and_repeated_rows(db, sql):
+    sql("INSERT INTO users (telegram_id, username, is_admin) VALUES (1, 'old', 0)")
+
+    report = await run_import("\n".join([
+        '{"telegram_id": 1, "username": "new"}',
+        '{"telegram_id": 2, "username": "kate"}',
+        '{"telegram_id": 2, "username": "again"}',
+        '{"telegram_id": -5, "username": "bad"}',
+        '',
+        '{"telegram_id": 3, "username": "olga"}',
+    ]))
+
+    assert [(row.line, row.status) for row in report.rows] == [
+        (1, ImportStatus.EXISTS),
+        (2, ImportStatus.CREATED),
+        (3, ImportStatus.DUPLICATE),
+        (4, ImportStatus.INVALID),
+        (6, ImportStatus.CREATED),
+    ]
+    assert (report.total, report.created, report.skipped, report.invalid) == (5, 2, 2, 1)
+    # Существующая запись не перезаписывается
+    assert sql("SELECT telegram_id, username FROM users ORDER BY telegram_id") == [(1, "old"), (2, "kate"), (3, "olga")]
+
+
+async def test_repeated_import_creates_nothing(db, sql):
+    text = "telegram_id,username\n1,ivan\n2,kate"
+    first = await run_import(text, is_csv=True)
+    second = await run_import(text, is_csv=True)
+
+    assert first.created == 2
+    assert second.created == 0
+    assert {row.status for row in second.rows} == {ImportStatus.EXISTS}
+    assert sql("SELECT COUNT(*) FROM users") == [(2,)]
+
+
+async def test_import_spans_several_chunks(db, sql, monkeypatch):
+    from app.core import settings
+    monkeypatch.setattr(settings, "USER_IMPORT_CHUNK_SIZE", 3)
+    sql("INSERT INTO users (telegram_id, username, is_admin) VALUES (4, 'old', 0)")
+
+    report = await run_import("\n".join(f'{{"telegram_id": {i}, "username": "user{i}"}}' for i in range(1, 11)))
+
+    assert report.created == 9
+    assert [row.status for row in report.rows if row.telegram_id == 4] == [ImportStatus.EXISTS]
+    assert sql("SELECT COUNT(*) FROM users") == [(10,)]
+
+
+def test_import_endpoint_requires_admin_token(client, register, login, promote, sql):
+    register(1, "admin")
+    headers = {"X-Access-Token": login(1)["access"]}
+    body = '{"telegram_id": 2, "username": "kate"}\n'
+
+    assert client.post("/v1/user/import", params={"admin_telegram_id": 1}, content=body).status_code == 400
+    assert client.post("/v1/user/import", headers=headers, content=body).status_code == 403
+
+    promote(1)
+    response = client.post("/v1/user/import", headers=headers, content=body)
+
+    assert response.status_code == 200, response.text
+    assert response.json()["created"] == 1
+    assert sql("SELECT COUNT(*) FROM users") == [(2,)]
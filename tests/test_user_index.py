@@ -0,0 +1,98 @@
+import time
+
+import pytest
+
+from app.core import settings
+from app.crud.user import UserDAO, user_index
+from app.db.session import async_session_maker
+from app.services.user_index import user_index_loader
+from app.utils.session_table import get_user_change_table
+from app.utils.user_index import UserIndex
+
+
+def me(client, access_token: str):
+    return client.get("/v1/auth/me", headers={"X-Access-Token": access_token})
+
+
+def mark_changed_by_other_worker(telegram_id: int) -> None:
+    # Так отмечает изменение воркер, который его закоммитил; свой индекс этот воркер не трогает
+    get_user_change_table().mark_changed(telegram_id, time.time_ns() // 1_000_000 + 1, time.time() + 60)
+
+
+@pytest.mark.anyio
+async def test_database_read_does_not_fill_index(db, sql):
+    user_index.replace(UserIndex.from_rows([]))
+    sql("INSERT INTO users (telegram_id, username, is_admin) VALUES (1, 'ivan', 0)")
+
+    async with async_session_maker() as session:
+        user = await UserDAO(session).find_one_or_none_by_telegram_id(1)
+
+    assert user.username == "ivan"
+    assert user_index.get(1) is None
+
+
+def test_own_change_is_served_from_index(client, register, login):
+    register(1)
+    tokens = login(1)
+    me(client, tokens["access"])
+
+    assert me(client, tokens["access"]).headers["X-Query-Count"] == "0"
+
+
+def test_update_by_other_worker_bypasses_index(client, register, login, sql):
+    register(1)
+    tokens = login(1)
+    me(client, tokens["access"])
+
+    sql("UPDATE users SET username = 'renamed' WHERE telegram_id = 1")
+    mark_changed_by_other_worker(1)
+    response = me(client, tokens["access"])
+
+    assert response.headers["X-Query-Count"] == "1"
+    assert response.json()["username"] == "renamed"
+    # Отметка действует до перезагрузки: в индексе по-прежнему старое имя
+    assert user_index.get(1).username == "ivan"
+
+
+def test_delete_by_other_worker_bypasses_index(client, register, login, sql):
+    register(1)
+    tokens = login(1)
+    me(client, tokens["access"])
+
+    sql("DELETE FROM user_sessions")
+    sql("DELETE FROM users")
+    mark_changed_by_other_worker(1)
+
+    assert me(client, tokens["access"]).status_code == 404
+
+
+def test_admin_demoted_by_other_worker_loses_access(client, register, login, promote, sql):
+    register(1, "admin")
+    headers = {"X-Access-Token": login(1)["access"]}
+    promote(1)
+    assert client.get("/v1/admin/users", headers=headers).status_code == 200
+
+    sql("UPDATE users SET is_admin = 0 WHERE telegram_id = 1")
+    mark_changed_by_other_worker(1)
+
+    assert client.get("/v1/admin/users", headers=headers).status_code == 403
+
+
+def test_index_past_max_age_is_not_used(client, register, login, monkeypatch):
+    register(1)
+    tokens = login(1)
+    me(client, tokens["access"])
+    monkeypatch.setattr(user_index, "version", time.time_ns() // 1_000_000 - 11_000)
+    monkeypatch.setattr(settings, "USER_INDEX_MAX_AGE_SECONDS", 10)
+
+    assert me(client, tokens["access"]).headers["X-Query-Count"] == "1"
+
+
+@pytest.mark.anyio
+async def test_reload_versions_index_by_its_start(db, sql):
+    sql("INSERT INTO users (telegram_id, username, is_admin) VALUES (1, 'ivan', 0)")
+    await user_index_loader.reload()
+
+    assert user_index.is_loaded
+    assert user_index.get(1).username == "ivan"
+    assert user_index.version_of(1) == user_index.version <= time.time_ns() // 1_000_000